@@ -2,7 +2,7 @@ from flask import Blueprint, render_template, redirect, url_for, request, flash,
 from flask_login import login_user, logout_user, login_required, current_user
 from werkzeug.utils import secure_filename
 import os
-from langchain_openai import ChatOpenAI
+from llm_gateway import create_chat_model
 from .models import User, Resume
 from .utils import (
     get_user_by_username,
@@ -21,6 +21,9 @@ import logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# Shared by every signup, so resume analysis reuses the gateway's pooled connections
+resume_model = create_chat_model()
+
 auth_bp = Blueprint('auth', __name__)
 
 @login_manager.user_loader
@@ -86,12 +89,8 @@ def signup():
                 file.save(file_path)
                 resume_text = extract_text_from_file(file_path)
 
-                # Instantiate the ChatOpenAI model
-                openai_api_key = os.getenv('OPENAI_API_KEY')
-                model = ChatOpenAI(openai_api_key=openai_api_key)
-
                 # Send resume text to ChatGPT and update user record with the response
-                response_data = get_resume_analysis(model, resume_text)
+                response_data = get_resume_analysis(resume_model, resume_text)
 
                 # Print the response data for debugging
                 logger.info("Response Data: %s", response_data)
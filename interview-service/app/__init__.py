@@ -15,9 +15,13 @@ def create_app():
 
     Base.metadata.create_all(bind=engine)
 
+    # Under gevent, make sure every kind of I/O yields before serving anything
+    from .utils.worker_utils import run_worker_self_check, install_concurrency_limit
+    run_worker_self_check()
+
     try:
         logger.debug("Attempting to import blueprints")
-        from .routes import first_round_bp, second_round_bp, third_round_bp
+        from .routes import first_round_bp, second_round_bp, third_round_bp, internal_bp, audio_bp, transcription_bp
         logger.debug("Imports successful")
     except ImportError as e:
         logger.error(f"Import error: {e}")
@@ -26,6 +30,21 @@ def create_app():
     app.register_blueprint(first_round_bp, url_prefix='/first_round')
     app.register_blueprint(second_round_bp, url_prefix='/second_round')
     app.register_blueprint(third_round_bp, url_prefix='/third_round')
+    app.register_blueprint(internal_bp, url_prefix='/internal')
+    app.register_blueprint(audio_bp, url_prefix='/audio')
+    app.register_blueprint(transcription_bp)
+
+    install_concurrency_limit(app)
+
+    # Fork the local Whisper workers before any background threads start
+    from .utils.transcription_utils import TRANSCRIPTION_BACKEND
+    if TRANSCRIPTION_BACKEND == 'local':
+        from .utils.local_whisper_utils import start_local_transcription
+        start_local_transcription()
+
+    # Pre-render question bank audio in the background
+    from .utils.audio_warmup_utils import start_audio_warmup
+    start_audio_warmup()
 
     @app.teardown_appcontext
     def shutdown_session(exception=None):
@@ -0,0 +1,54 @@
+import os
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import AsyncSession, create_async_engine
+from sqlalchemy.orm import sessionmaker
+from .config import Config
+from .metrics import register_gauge
+
+# Pool for the ASGI turn handlers; one event loop per process, so one pool per process
+ASYNC_DB_POOL_SIZE = int(os.getenv('ASYNC_DB_POOL_SIZE', '10'))
+ASYNC_DB_MAX_OVERFLOW = int(os.getenv('ASYNC_DB_MAX_OVERFLOW', '20'))
+ASYNC_DB_POOL_TIMEOUT = int(os.getenv('ASYNC_DB_POOL_TIMEOUT', '30'))
+ASYNC_DB_POOL_RECYCLE = int(os.getenv('ASYNC_DB_POOL_RECYCLE', '1800'))
+
+# The async driver for each database the sync engines are configured with
+ASYNC_DRIVERS = {
+    'postgresql': 'postgresql+asyncpg',
+    'sqlite': 'sqlite+aiosqlite',
+}
+
+def async_database_url(url):
+    url = make_url(url)
+    backend = url.get_backend_name()
+    if backend not in ASYNC_DRIVERS:
+        raise ValueError(f"No async driver configured for {backend} databases")
+    return url.set(drivername=ASYNC_DRIVERS[backend])
+
+_async_engine = None
+_async_sessionmaker = None
+
+def init_async_database():
+    # Called by asgi.py at import. The WSGI workers never build the async engine or import its driver.
+    global _async_engine, _async_sessionmaker
+    if _async_engine is None:
+        _async_engine = create_async_engine(
+            async_database_url(Config.SQLALCHEMY_DATABASE_URI),
+            pool_size=ASYNC_DB_POOL_SIZE,
+            max_overflow=ASYNC_DB_MAX_OVERFLOW,
+            pool_timeout=ASYNC_DB_POOL_TIMEOUT,
+            pool_recycle=ASYNC_DB_POOL_RECYCLE,
+            pool_pre_ping=True,
+        )
+        # One session per query group; rows are plain snapshots, so nothing is loaded lazily after a session closes
+        _async_sessionmaker = sessionmaker(_async_engine, class_=AsyncSession, expire_on_commit=False)
+        register_gauge('db.async_pool.checked_out', lambda: _async_engine.sync_engine.pool.checkedout())
+    return _async_engine
+
+def get_async_engine():
+    if _async_engine is None:
+        raise RuntimeError("The async database is only available in the ASGI app, call init_async_database() first")
+    return _async_engine
+
+def async_session():
+    get_async_engine()
+    return _async_sessionmaker()
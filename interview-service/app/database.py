@@ -1,7 +1,42 @@
+import os
+import time
 from sqlalchemy import create_engine
 from sqlalchemy.orm import scoped_session, sessionmaker
+from sqlalchemy.pool import QueuePool
 from .config import Config
+from .metrics import observe, increment, register_gauge
 
-# Database setup
-engine = create_engine(Config.SQLALCHEMY_DATABASE_URI)
-db_session = scoped_session(sessionmaker(autocommit=False, autoflush=False, bind=engine))
\ No newline at end of file
+# Connection pool sizing, shared by every request and worker thread in the process
+DB_POOL_SIZE = int(os.getenv('DB_POOL_SIZE', '5'))
+DB_MAX_OVERFLOW = int(os.getenv('DB_MAX_OVERFLOW', '10'))
+DB_POOL_TIMEOUT = int(os.getenv('DB_POOL_TIMEOUT', '30'))
+DB_POOL_RECYCLE = int(os.getenv('DB_POOL_RECYCLE', '1800'))
+
+class InstrumentedQueuePool(QueuePool):
+    # Records how long each checkout waits for a free connection
+    def _do_get(self):
+        start = time.perf_counter()
+        try:
+            return super()._do_get()
+        except Exception:
+            increment('db.pool.checkout_failures')
+            raise
+        finally:
+            observe('db.pool.checkout_wait_seconds', time.perf_counter() - start)
+
+# Database setup: one engine per process
+engine = create_engine(
+    Config.SQLALCHEMY_DATABASE_URI,
+    poolclass=InstrumentedQueuePool,
+    pool_size=DB_POOL_SIZE,
+    max_overflow=DB_MAX_OVERFLOW,
+    pool_timeout=DB_POOL_TIMEOUT,
+    pool_recycle=DB_POOL_RECYCLE,
+    pool_pre_ping=True,
+)
+
+# Sessions are scoped to the current thread and removed when each request (or copied request context) tears down
+db_session = scoped_session(sessionmaker(autocommit=False, autoflush=False, bind=engine))
+
+register_gauge('db.pool.checked_out', lambda: engine.pool.checkedout())
+register_gauge('db.pool.saturation', lambda: engine.pool.checkedout() / (DB_POOL_SIZE + DB_MAX_OVERFLOW))
@@ -0,0 +1,40 @@
+import threading
+
+# Lightweight in-process metrics registry, exposed through /internal/metrics
+_lock = threading.Lock()
+_counters = {}
+_timings = {}
+_gauges = {}
+
+def increment(name, amount=1):
+    with _lock:
+        _counters[name] = _counters.get(name, 0) + amount
+
+def observe(name, value):
+    with _lock:
+        timing = _timings.setdefault(name, {'count': 0, 'total': 0.0, 'max': 0.0})
+        timing['count'] += 1
+        timing['total'] += value
+        timing['max'] = max(timing['max'], value)
+
+def register_gauge(name, func):
+    with _lock:
+        _gauges[name] = func
+
+def snapshot():
+    with _lock:
+        counters = dict(_counters)
+        timings = {name: dict(timing) for name, timing in _timings.items()}
+        gauges = dict(_gauges)
+
+    for timing in timings.values():
+        timing['avg'] = timing['total'] / timing['count'] if timing['count'] else 0.0
+
+    gauge_values = {}
+    for name, func in gauges.items():
+        try:
+            gauge_values[name] = func()
+        except Exception as e:
+            gauge_values[name] = f"error: {e}"
+
+    return {'counters': counters, 'timings': timings, 'gauges': gauge_values}
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, Text, DateTime, Boolean, ForeignKey, ARRAY, Interval
+from sqlalchemy import Column, Integer, String, Text, DateTime, Boolean, ForeignKey, ARRAY, Interval, UniqueConstraint, Sequence, Float
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
@@ -7,6 +7,11 @@ from datetime import datetime
 
 Base = declarative_base()
 
+# Interview session ids are handed out in blocks of SESSION_ID_BLOCK_SIZE (see unique_session_utils).
+# They start above the range of the old random six digit ids. Changing the block size needs an ALTER SEQUENCE.
+SESSION_ID_BLOCK_SIZE = 20
+session_id_sequence = Sequence('interview_session_id_seq', start=1000000, increment=SESSION_ID_BLOCK_SIZE, metadata=Base.metadata)
+
 class Users(UserMixin, Base):
     __tablename__ = 'users'
 
@@ -51,6 +56,28 @@ class InterviewHistory(Base):
     user = relationship("Users", back_populates="interview_history")
     question_rel = relationship("Questions", back_populates="interview_history")
 
+class InterviewSessions(Base):
+    # Running score aggregate for one interview, updated as each history batch is written
+    __tablename__ = 'interview_sessions'
+    user_id = Column(Integer, ForeignKey('users.id'), primary_key=True)
+    session_id = Column(Integer, primary_key=True)
+    interview_round = Column(String(50), nullable=True)
+    started_at = Column(DateTime(timezone=True), server_default=func.now())
+    updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
+    score_count = Column(Integer, nullable=False, default=0)
+    score_sum = Column(Integer, nullable=False, default=0)
+    score_min = Column(Integer, nullable=True)
+    score_max = Column(Integer, nullable=True)
+    top_score_question_id = Column(Integer, nullable=True)
+    top_score_question = Column(Text, nullable=True)
+    low_score_question_id = Column(Integer, nullable=True)
+    low_score_question = Column(Text, nullable=True)
+    summary_next_steps = Column(Text, nullable=True)
+
+    @property
+    def score_average(self):
+        return round(self.score_sum / self.score_count) if self.score_count else None
+
 class JobDescriptions(Base):
     __tablename__ = 'job_descriptions'
     id = Column(Integer, primary_key=True)
@@ -181,3 +208,63 @@ class Questions(Base):
             'job_title': self.job_title,
             'user_id': self.user_id
         }
+
+class LLMCache(Base):
+    # Responses to prompts built only from stored rows, shared by every worker process
+    __tablename__ = 'llm_cache'
+    cache_key = Column(String(64), primary_key=True)
+    prompt_type = Column(String(50), nullable=False)
+    user_id = Column(Integer, nullable=True, index=True)
+    response = Column(Text, nullable=False)
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    expires_at = Column(DateTime(timezone=True), nullable=False, index=True)
+
+class CompactedContexts(Base):
+    # Deduplicated, truncated copies of the resume and job listing fields the interview prompts use
+    __tablename__ = 'compacted_contexts'
+    __table_args__ = (UniqueConstraint('user_id', 'field_name'),)
+    id = Column(Integer, primary_key=True)
+    user_id = Column(Integer, nullable=False, index=True)
+    field_name = Column(String(100), nullable=False)
+    source_hash = Column(String(64), nullable=False)
+    compacted_text = Column(Text, nullable=False)
+    original_tokens = Column(Integer, nullable=False)
+    compacted_tokens = Column(Integer, nullable=False)
+    updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
+
+class InterviewState(Base):
+    # Server-side interview progress, see interview_state_utils
+    __tablename__ = 'interview_state'
+    session_id = Column(Integer, primary_key=True)
+    version = Column(Integer, nullable=False)
+    state = Column(Text, nullable=False)
+    # Unix time of the last write, portable across Postgres and SQLite
+    updated_at = Column(Float, nullable=False, index=True)
+
+class RecordingSegments(Base):
+    # Transcripts of answer segments, see segment_transcription_utils. Any worker may receive a segment or the finalize.
+    __tablename__ = 'recording_segments'
+    recording_id = Column(String(128), primary_key=True)
+    segment_index = Column(Integer, primary_key=True)
+    # NULL when the segment failed to transcribe
+    transcript = Column(Text, nullable=True)
+    # Unix time of the write, portable across Postgres and SQLite
+    updated_at = Column(Float, nullable=False, index=True)
+
+class ContextVersions(Base):
+    # Bumped whenever a user's resume or job listing changes, see context_utils. Every worker compares
+    # its interview snapshots against this row, so one invalidation reaches every process.
+    __tablename__ = 'context_versions'
+    user_id = Column(Integer, primary_key=True)
+    version = Column(Integer, nullable=False)
+    # Unix time of the last bump, portable across Postgres and SQLite
+    updated_at = Column(Float, nullable=False)
+
+class SharedVersions(Base):
+    # Named counters bumped when data behind a process-local index changes, e.g. 'question_bank'.
+    # Each worker polls its counter and rebuilds when it moved, so one notification reaches every process.
+    __tablename__ = 'shared_versions'
+    name = Column(String(64), primary_key=True)
+    version = Column(Integer, nullable=False)
+    # Unix time of the last bump, portable across Postgres and SQLite
+    updated_at = Column(Float, nullable=False)
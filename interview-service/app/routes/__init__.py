@@ -6,7 +6,10 @@ logger.debug("Importing blueprints in routes/__init__.py")
 from .first_round import first_round_bp
 from .second_round import second_round_bp
 from .third_round import third_round_bp
+from .internal import internal_bp
+from .audio import audio_bp
+from .transcription import transcription_bp
 
 logger.debug("Blueprints imported successfully")
 
-__all__ = ['first_round_bp', 'second_round_bp', 'third_round_bp']
\ No newline at end of file
+__all__ = ['first_round_bp', 'second_round_bp', 'third_round_bp', 'internal_bp', 'audio_bp', 'transcription_bp']
\ No newline at end of file
@@ -0,0 +1,51 @@
+import re
+from flask import Blueprint, Response, jsonify, request, send_file, url_for
+from elevenlabs.client import ApiError
+from app.utils.audio_utils import tts_cache, tts_cache_key, stream_speech, speech_token, read_speech_token
+import logging
+
+logger = logging.getLogger(__name__)
+logger.debug("Creating audio blueprint")
+
+audio_bp = Blueprint('audio', __name__)
+
+AUDIO_KEY_PATTERN = re.compile(r'^[0-9a-f]{64}$')
+
+@audio_bp.route('/<key>.mp3', methods=['GET'])
+def question_audio(key):
+    if not AUDIO_KEY_PATTERN.match(key):
+        return jsonify({'error': 'Invalid audio key'}), 404
+
+    # The key is a hash of the text and voice settings, so the audio never changes
+    cache_control = 'public, max-age=31536000, immutable'
+
+    path = tts_cache.get(key)
+    if path:
+        response = send_file(path, mimetype='audio/mpeg', conditional=True, max_age=31536000)
+        response.headers['Cache-Control'] = cache_control
+        return response
+
+    speech = read_speech_token(key, request.args.get('s'))
+    if speech is None:
+        return jsonify({'error': 'Audio not found'}), 404
+
+    try:
+        chunks = stream_speech(*speech)
+    except ApiError as e:
+        logger.error(f"Error generating speech: {e}")
+        return jsonify({'error': 'Failed to generate audio'}), 502
+
+    # Relay chunks as ElevenLabs produces them; without a Content-Length the response is sent chunked
+    response = Response(chunks, mimetype='audio/mpeg')
+    response.headers['Cache-Control'] = cache_control
+    response.headers['X-Accel-Buffering'] = 'no'
+    return response
+
+def question_audio_url(text, voice_id):
+    # Audio is relayed from ElevenLabs when the browser first requests the URL, then served from the cache
+    if not text or not voice_id or voice_id == 'none':
+        return None
+    token = speech_token(text, voice_id)
+    if token is None:
+        return None
+    return url_for('audio.question_audio', key=tts_cache_key(text, voice_id), s=token)
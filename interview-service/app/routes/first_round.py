@@ -1,17 +1,15 @@
-from werkzeug.utils import secure_filename
-from pydub import AudioSegment
-import os
-import io
-import random
-import csv
-from openai import OpenAI
-from flask import Blueprint, render_template, request, jsonify, current_app, session, redirect, url_for, send_from_directory, Response
-from app.utils.first_round_utils import *
-from app.utils.interview_history_utils import record_interview_history
-from app.utils.unique_session_utils import ensure_unique_session_id
-from app.models import JobDescriptions
-from app.database import db_session
-from sqlalchemy.exc import IntegrityError
+import json
+from flask import Blueprint, render_template, request, jsonify, current_app, redirect, url_for, Response, stream_with_context
+from app.utils.first_round_utils import get_summary_message
+from app.utils.interview_history_utils import record_interview_history, flush_interview_history
+from app.utils.unique_session_utils import generate_session_id
+from app.utils.executor_utils import submit_llm_task, wait_for_result
+from app.utils.prefetch_utils import prefetch_question, take_prefetched_question, cancel_prefetch
+from app.utils.context_utils import start_interview_context, get_interview_context
+from app.utils.interview_state_utils import start_interview_state, get_interview_state, update_interview_state
+from app.utils.round_engine_utils import get_round, evaluate_answer
+from app.routes.audio import question_audio_url
+from app.utils.audio_warmup_utils import warm_interview_phrases
 import logging
 
 logger = logging.getLogger(__name__)
@@ -30,13 +28,19 @@ def first_round_view():
     session_id = request.args.get('session_id', None)
 
     if not session_id:
-        session_id = ensure_unique_session_id(user_id)
+        session_id = generate_session_id()
         return redirect(url_for('first_round.first_round_view', username=username, user_id=user_id, interview_round=interview_round, job_title=job_title, company_name=company_name, company_industry=company_industry, session_id=session_id))
 
-    initial_question = get_first_question(username, user_id)
+    # Snapshot the job, resume and user fields once for the whole interview
+    context = start_interview_context(session_id, user_id)
+    current_round = get_round(interview_round)
+    initial_question, _ = current_round.step(1).ask(context)
 
-    # Set the initial question time in the session
-    session['question_time'] = '30:00'  # Assuming the timer starts at 30 minutes
+    # Set the initial question time in the interview state
+    start_interview_state(session_id, question_time='30:00')  # Assuming the timer starts at 30 minutes
+
+    # Start generating the second question while the candidate answers the first
+    schedule_question_prefetch(session_id, current_round, 2, context)
 
     return render_template('first_round.html', username=username, user_id=user_id, interview_round=interview_round, job_title=job_title, company_name=company_name, company_industry=company_industry, session_id=session_id, initial_question=initial_question)
 
@@ -44,130 +48,132 @@ def first_round_view():
 def submit_answer():
     session_id = request.form.get('session_id')
     user_id = request.form.get('user_id')
-    username = get_user_by_id(user_id).username
+    context = get_interview_context(session_id, user_id)
     question = request.form.get('question')
     answer = request.form.get('answer_1')
     feedback = request.form.get('feedback', None)
     score = request.form.get('score', None)
     interview_round = request.form.get('interview_round')
     question_id = request.form.get('question_id', None)
-
-    job_details = fetch_interview_data(user_id)
+    voice = request.form.get('voice')
 
     # Retrieve the stored question time
-    question_time = session.get('question_time')
+    state = get_interview_state(session_id)
+    question_time = state.get('question_time')
     current_time = request.form.get('current_time')
+    timer = calculate_timer(question_time, current_time)
 
-    # Debugging statements
-    print(f"Question Time: {question_time}")
-    print(f"Current Time: {current_time}")
+    question_num = request.form.get('question_num', 1)
+    current_round = get_round(interview_round)
 
-    if question_time and current_time:
-        question_time_minutes, question_time_seconds = map(int, question_time.split(':'))
-        current_time_minutes, current_time_seconds = map(int, current_time.split(':'))
+    # The next question does not depend on the answer, so take the prefetched one or
+    # generate it while the answer is evaluated
+    next_question_num = None if question_num == 'last' else int(question_num) + 1
+    next_question_future = take_question(session_id, current_round, next_question_num, context, state) if next_question_num else None
 
-        # Convert times to total seconds
-        question_total_seconds = question_time_minutes * 60 + question_time_seconds
-        current_total_seconds = current_time_minutes * 60 + current_time_seconds
-
-        # Calculate the timer value
-        timer_seconds = question_total_seconds - current_total_seconds
-        timer_hours = timer_seconds // 3600
-        timer_seconds %= 3600
-        timer_minutes = timer_seconds // 60
-        timer_seconds %= 60
+    try:
+        if answer == 'skipped':
+            feedback = 'skipped'
+            score = None
+        else:
+            most_recent_question = state.get('most_recent_question')
+            score, feedback = evaluate_answer(current_round.step(question_num), answer, context, most_recent_question, question_id or None, feedback, score)
+    except Exception:
+        if next_question_future:
+            next_question_future.cancel()
+        raise
 
-        timer = f"{timer_hours:02}:{timer_minutes:02}:{timer_seconds:02}"
-    else:
-        timer = "00:00:00"
+    # The last answer ends the interview, so the buffered history is written before responding.
+    # Rows the database cannot take yet stay buffered and are retried by the history writer.
+    record_interview_history(session_id, user_id, question, answer, score, feedback, timer, interview_round, context.job_title, context.job_level, context.company_name, context.company_industry, question_id or None, flush=next_question_future is None)
 
-    # More debugging statements
-    print(f"Calculated Timer: {timer}")
+    # Update the most recent question and answer
+    if next_question_future is None:
+        update_interview_state(session_id, most_recent_question=question, most_recent_answer=answer)
+        return jsonify({'message': 'Interview complete', 'summary': get_summary_message()}), 200
 
-    if answer == 'skipped':
-        feedback = 'skipped'
-        score = None
-    else:
-        question_num = request.form.get('question_num', 1)
-        if question_num == 'last':
-            feedback_function = get_last_feedback
-            score_function = get_last_score
-        else:
-            question_num = int(question_num)
-            feedback_function = globals()[f"get_{num_to_ordinal(question_num)}_feedback"]
-            score_function = globals()[f"get_{num_to_ordinal(question_num)}_score"]
-
-        # Dynamically determine the arguments for the feedback function
-        feedback_func_code = feedback_function.__code__
-        feedback_func_varnames = feedback_func_code.co_varnames[:feedback_func_code.co_argcount]
-
-        # Prepare arguments based on function requirements
-        feedback_args = []
-        for varname in feedback_func_varnames:
-            if varname == 'answer':
-                feedback_args.append(answer)
-            elif varname == 'user_id':
-                feedback_args.append(user_id)
-            elif varname == 'question_id':
-                feedback_args.append(question_id)
-
-        feedback = feedback_function(*feedback_args) if feedback is None else feedback
-
-        # Dynamically determine the arguments for the score function
-        score_func_code = score_function.__code__
-        score_func_varnames = score_func_code.co_varnames[:score_func_code.co_argcount]
-
-        # Prepare arguments based on function requirements
-        score_args = []
-        for varname in score_func_varnames:
-            if varname == 'answer':
-                score_args.append(answer)
-            elif varname == 'user_id':
-                score_args.append(user_id)
-
-        score = score_function(*score_args) if score is None else score
+    # Store the current interview timer for the next question
+    update_interview_state(session_id, most_recent_question=question, most_recent_answer=answer, question_time=current_time)
 
-    try:
-        record_interview_history(session_id, user_id, question, answer, score, feedback, timer, interview_round, job_details.job_title, job_details.job_level, job_details.company_name, job_details.company_industry, question_id or None)
-    except IntegrityError as e:
-        current_app.logger.error(f"Error recording interview history: {e}")
-        return jsonify({'error': 'Failed to record interview history'}), 500
+    next_question, question_id = wait_for_result(next_question_future)
+    schedule_question_prefetch(session_id, current_round, next_question_num + 1, context)
+    warm_interview_phrases(current_round, context, voice)
 
-    # Update the most recent question and answer
-    set_most_recent_question_answer(question, answer)
+    return jsonify({'question': next_question, 'question_num': next_question_num, 'question_id': question_id, 'question_audio': question_audio_url(next_question, voice)})
 
-    if question_num == 'last':
-        return jsonify({'message': 'Interview complete', 'summary': get_summary_message()}), 200
 
-    next_question_num = int(request.form.get('question_num', 1)) + 1
-    next_question_function = globals().get(f"get_{num_to_ordinal(next_question_num)}_question", None)
-    if next_question_function:
-        # Dynamically determine the arguments for the next question function
-        func_code = next_question_function.__code__
-        func_varnames = func_code.co_varnames[:func_code.co_argcount]
-
-        # Prepare arguments based on function requirements
-        next_question_args = []
-        for varname in func_varnames:
-            if varname == 'username':
-                next_question_args.append(username)
-            elif varname == 'user_id':
-                next_question_args.append(user_id)
-
-        next_question_data = next_question_function(*next_question_args)
-        if isinstance(next_question_data, tuple):
-            next_question, question_id = next_question_data
-        else:
-            next_question = next_question_data
-            question_id = None
+@first_round_bp.route('/submit_answer_stream', methods=['POST'])
+def submit_answer_stream():
+    session_id = request.form.get('session_id')
+    user_id = request.form.get('user_id')
+    context = get_interview_context(session_id, user_id)
+    question = request.form.get('question')
+    answer = request.form.get('answer_1')
+    interview_round = request.form.get('interview_round')
+    question_id = request.form.get('question_id', None) or None
+    question_num = request.form.get('question_num', 1)
+    voice = request.form.get('voice')
 
-        # Store the current interview timer for the next question
-        session['question_time'] = current_time
-    else:
-        return jsonify({'message': 'Interview complete', 'summary': get_summary_message()}), 200
+    if not answer or answer == 'skipped':
+        return jsonify({'error': 'Skipped questions are submitted to skip_question'}), 400
 
-    return jsonify({'question': next_question, 'question_num': next_question_num, 'question_id': question_id})
+    current_round = get_round(interview_round)
+    step = current_round.step(question_num)
 
+    # Retrieve the stored question time
+    state = get_interview_state(session_id)
+    question_time = state.get('question_time')
+    current_time = request.form.get('current_time')
+    timer = calculate_timer(question_time, current_time)
+
+    # Read the question being evaluated before the state moves on to the next turn
+    most_recent_question = state.get('most_recent_question')
+
+    # The score and the next question are produced while the feedback streams
+    score_future = submit_llm_task(step.score, answer, context, most_recent_question)
+
+    next_question_num = None if question_num == 'last' else int(question_num) + 1
+    next_question_future = take_question(session_id, current_round, next_question_num, context, state) if next_question_num else None
+
+    # Move the interview state on up front, so the next turn can be served by any worker
+    changes = {'most_recent_question': question, 'most_recent_answer': answer}
+    if next_question_future:
+        changes['question_time'] = current_time
+    update_interview_state(session_id, **changes)
+
+    def generate():
+        try:
+            feedback_parts = []
+            for token in step.stream_feedback(answer, context, most_recent_question, question_id):
+                feedback_parts.append(token)
+                yield format_sse('feedback', {'token': token})
+            feedback = ''.join(feedback_parts).strip() or "No feedback received"
+
+            score = wait_for_result(score_future)
+            yield format_sse('score', {'score': score})
+
+            record_interview_history(session_id, user_id, question, answer, score, feedback, timer, interview_round, context.job_title, context.job_level, context.company_name, context.company_industry, question_id, flush=next_question_future is None)
+
+            if next_question_future is None:
+                yield format_sse('complete', {'message': 'Interview complete', 'summary': get_summary_message()})
+                return
+
+            next_question, next_question_id = wait_for_result(next_question_future)
+            schedule_question_prefetch(session_id, current_round, next_question_num + 1, context)
+            warm_interview_phrases(current_round, context, voice)
+            yield format_sse('question', {'question': next_question, 'question_num': next_question_num, 'question_id': next_question_id, 'question_audio': question_audio_url(next_question, voice)})
+        except Exception as e:
+            current_app.logger.error(f"Error streaming answer evaluation: {e}")
+            score_future.cancel()
+            if next_question_future:
+                next_question_future.cancel()
+            yield format_sse('error', {'error': 'Failed to evaluate answer'})
+
+    response = Response(stream_with_context(generate()), mimetype='text/event-stream')
+    response.headers['Cache-Control'] = 'no-cache'
+    # Stop nginx from buffering the event stream
+    response.headers['X-Accel-Buffering'] = 'no'
+    return response
 
 @first_round_bp.route('/skip_question', methods=['POST'])
 def skip_question():
@@ -176,63 +182,41 @@ def skip_question():
     question = request.form.get('question')
     interview_round = request.form.get('interview_round')
     question_id = request.form.get('question_id', None)
+    voice = request.form.get('voice')
 
-    job_details = fetch_interview_data(user_id)
+    context = get_interview_context(session_id, user_id)
 
     # Retrieve the stored question time
-    question_time = session.get('question_time')
+    state = get_interview_state(session_id)
+    question_time = state.get('question_time')
     current_time = request.form.get('current_time')
-
-    # Debugging statements
-    print(f"Question Time: {question_time}")
-    print(f"Current Time: {current_time}")
-
-    if question_time and current_time:
-        question_time_minutes, question_time_seconds = map(int, question_time.split(':'))
-        current_time_minutes, current_time_seconds = map(int, current_time.split(':'))
-
-        # Convert times to total seconds
-        question_total_seconds = question_time_minutes * 60 + question_time_seconds
-        current_total_seconds = current_time_minutes * 60 + current_time_seconds
-
-        # Calculate the timer value
-        timer_seconds = question_total_seconds - current_total_seconds
-        timer_hours = timer_seconds // 3600
-        timer_seconds %= 3600
-        timer_minutes = timer_seconds // 60
-        timer_seconds %= 60
-
-        timer = f"{timer_hours:02}:{timer_minutes:02}:{timer_seconds:02}"
-    else:
-        timer = "00:00:00"
-
-    # More debugging statements
-    print(f"Calculated Timer: {timer}")
+    timer = calculate_timer(question_time, current_time)
 
     feedback = 'skipped'
     answer = 'skipped'
     score = None
 
-    try:
-        # Set question_id to None if it's an empty string
-        if not question_id:
-            question_id = None
+    # Set question_id to None if it's an empty string
+    if not question_id:
+        question_id = None
 
-        record_interview_history(session_id, user_id, question, answer, score, feedback, timer, interview_round, job_details.job_title, job_details.job_level, job_details.company_name, job_details.company_industry, question_id)
-    except IntegrityError as e:
-        current_app.logger.error(f"Error recording skipped question in interview history: {e}")
-        return jsonify({'error': 'Failed to record skipped question'}), 500
+    record_interview_history(session_id, user_id, question, answer, score, feedback, timer, interview_round, context.job_title, context.job_level, context.company_name, context.company_industry, question_id)
 
+    current_round = get_round(interview_round)
     next_question_num = int(request.form.get('question_num', 1)) + 1
-    next_question_function = globals().get(f"get_{num_to_ordinal(next_question_num)}_question", None)
-    if next_question_function:
-        next_question = next_question_function(get_user_by_id(user_id).username)
-        # Store the current interview timer for the next question
-        session['question_time'] = current_time
-    else:
+    next_question_future = take_question(session_id, current_round, next_question_num, context, state)
+    if next_question_future is None:
+        flush_interview_history()
         return jsonify({'message': 'Interview complete'}), 200
 
-    return jsonify({'question': next_question, 'question_num': next_question_num})
+    next_question, next_question_id = wait_for_result(next_question_future)
+
+    # Store the current interview timer for the next question
+    update_interview_state(session_id, question_time=current_time)
+    schedule_question_prefetch(session_id, current_round, next_question_num + 1, context)
+    warm_interview_phrases(current_round, context, voice)
+
+    return jsonify({'question': next_question, 'question_num': next_question_num, 'question_id': next_question_id, 'question_audio': question_audio_url(next_question, voice)})
 
 @first_round_bp.route('/end_interview', methods=['POST'])
 def end_interview():
@@ -242,27 +226,62 @@ def end_interview():
     interview_round = request.form.get('interview_round')
     question_id = request.form.get('question_id', None)
 
-    job_details = fetch_interview_data(user_id)
+    # The candidate is wrapping up, so any speculative question is no longer needed
+    cancel_prefetch(session_id)
+
+    context = get_interview_context(session_id, user_id)
 
     feedback = 'skipped'
     answer = 'skipped'
     score = None
 
-    try:
-        # Set question_id to None if it's an empty string
-        if not question_id:
-            question_id = None
+    # Set question_id to None if it's an empty string
+    if not question_id:
+        question_id = None
 
-        record_interview_history(session_id, user_id, question, answer, score, feedback, "00:00:00", interview_round, job_details.job_title, job_details.job_level, job_details.company_name, job_details.company_industry, question_id)
-    except IntegrityError as e:
-        current_app.logger.error(f"Error recording skipped question in interview history: {e}")
-        return jsonify({'error': 'Failed to record skipped question'}), 500
+    record_interview_history(session_id, user_id, question, answer, score, feedback, "00:00:00", interview_round, context.job_title, context.job_level, context.company_name, context.company_industry, question_id, flush=True)
 
     # Serve the last question
-    next_question = get_last_question(get_user_by_id(user_id).username)
-    return jsonify({'question': next_question, 'question_num': 'last'})
+    next_question, _ = get_round(interview_round).closing.ask(context)
+    return jsonify({'question': next_question, 'question_num': 'last', 'question_audio': question_audio_url(next_question, request.form.get('voice'))})
+
+def take_question(session_id, current_round, question_num, context, state=None):
+    # Returns a future for the question, or None once the round has no more questions
+    step = current_round.step(question_num)
+    if step is None:
+        return None
+    future = take_prefetched_question(session_id, question_num, context, state)
+    if future is None:
+        future = submit_llm_task(step.ask, context)
+    return future
+
+def schedule_question_prefetch(session_id, current_round, question_num, context):
+    step = current_round.step(question_num)
+    if step:
+        prefetch_question(session_id, question_num, step.ask, context)
+
+def calculate_timer(question_time, current_time):
+    if question_time and current_time:
+        question_time_minutes, question_time_seconds = map(int, question_time.split(':'))
+        current_time_minutes, current_time_seconds = map(int, current_time.split(':'))
+
+        # Convert times to total seconds
+        question_total_seconds = question_time_minutes * 60 + question_time_seconds
+        current_total_seconds = current_time_minutes * 60 + current_time_seconds
+
+        # Calculate the timer value
+        timer_seconds = question_total_seconds - current_total_seconds
+        timer_hours = timer_seconds // 3600
+        timer_seconds %= 3600
+        timer_minutes = timer_seconds // 60
+        timer_seconds %= 60
+
+        timer = f"{timer_hours:02}:{timer_minutes:02}:{timer_seconds:02}"
+    else:
+        timer = "00:00:00"
 
-def num_to_ordinal(num):
-    ordinals = ["first", "second", "third", "fourth", "fifth", "sixth", "seventh", "eighth", "ninth", "tenth", "last"]
-    return ordinals[num - 1]
+    logger.debug(f"Question time {question_time}, current time {current_time}, timer {timer}")
+    return timer
 
+def format_sse(event, data):
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
@@ -0,0 +1,63 @@
+import os
+import hmac
+from flask import Blueprint, jsonify, request
+from app.metrics import snapshot
+from app.utils.context_utils import invalidate_user_contexts
+from app.utils.question_bank_utils import question_bank, bump_question_bank_version
+from app.utils.llm_cache_utils import llm_response_cache
+from app.utils.context_compaction_utils import compact_user_context
+import logging
+
+logger = logging.getLogger(__name__)
+logger.debug("Creating internal blueprint")
+
+internal_bp = Blueprint('internal', __name__)
+
+# Shared secret the other services send in X-Internal-Token; without it every internal route is refused
+INTERNAL_API_TOKEN = os.getenv('INTERNAL_API_TOKEN', '')
+
+@internal_bp.before_request
+def require_internal_token():
+    if not INTERNAL_API_TOKEN:
+        logger.error("INTERNAL_API_TOKEN is not set, refusing internal request")
+        return jsonify({'error': 'Forbidden'}), 403
+    if not hmac.compare_digest(request.headers.get('X-Internal-Token', ''), INTERNAL_API_TOKEN):
+        return jsonify({'error': 'Forbidden'}), 403
+    return None
+
+@internal_bp.route('/metrics', methods=['GET'])
+def metrics():
+    return jsonify(snapshot())
+
+@internal_bp.route('/context/invalidate', methods=['POST'])
+def invalidate_context():
+    # Called by the training-data-service after a resume or job listing changes
+    data = request.get_json(silent=True) or {}
+    user_id = data.get('user_id')
+    if not user_id:
+        return jsonify({'error': 'Missing user_id'}), 400
+
+    invalidated = invalidate_user_contexts(user_id)
+    # Generated questions for the old resume or job listing would never be asked again, so drop them now
+    cached_responses = llm_response_cache.invalidate_user(user_id)
+    # Compact the new fields now, so the next interview does not pay for it
+    compact_user_context(user_id)
+    return jsonify({'invalidated': invalidated, 'cached_responses': cached_responses}), 200
+
+@internal_bp.route('/question_bank/refresh', methods=['POST'])
+def refresh_question_bank():
+    # Called by the training-data-service after a question is created, edited or deleted
+    data = request.get_json(silent=True) or {}
+    question_id = data.get('question_id')
+    action = data.get('action', 'upsert')
+
+    if question_id and action == 'delete':
+        question_bank.remove(question_id)
+    elif question_id:
+        question_bank.upsert(question_id)
+    else:
+        question_bank.refresh()
+    # Only this worker received the notification; the others rebuild when they see the new version
+    bump_question_bank_version()
+
+    return jsonify({'size': len(question_bank)}), 200
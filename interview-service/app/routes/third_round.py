@@ -1,5 +1,9 @@
-from flask import Blueprint, render_template, request, jsonify, current_app, session, redirect, url_for
-from ..utils import generate_session_id
+from flask import Blueprint, render_template, request, jsonify, current_app, redirect, url_for
+from ..utils.unique_session_utils import generate_session_id
+from ..utils.context_utils import start_interview_context
+from ..utils.interview_state_utils import start_interview_state
+from ..utils.round_engine_utils import get_round
+from .first_round import schedule_question_prefetch
 import logging
 
 logger = logging.getLogger(__name__)
@@ -13,20 +17,22 @@ def third_round():
         logger.debug("third_round route called")
         username = request.args.get('username')
         user_id = request.args.get('user_id')
-        interview_round = request.args.get('interview_round')
+        interview_round = request.args.get('interview_round') or 'third_round'
         session_id = request.args.get('session_id')
 
-        session.pop('last_question', None)
-
         if not session_id:
             session_id = generate_session_id()
             return redirect(url_for('third_round.third_round', username=username, user_id=user_id, interview_round=interview_round, session_id=session_id))
 
-        initial_question = third_round_question(user_id, session_id)
+        # The third round runs through the same round engine and answer endpoints as the first round
+        context = start_interview_context(session_id, user_id)
+        current_round = get_round(interview_round)
+        initial_question, _ = current_round.step(1).ask(context)
+
+        start_interview_state(session_id, question_time='30:00')
+        schedule_question_prefetch(session_id, current_round, 2, context)
 
-        return render_template('third_round.html', username=username, initial_question=initial_question, session_id=session_id)
+        return render_template('third_round.html', username=username, user_id=user_id, interview_round=interview_round, initial_question=initial_question, session_id=session_id)
     except Exception as e:
         current_app.logger.error(f"Error in third_round route: {e}")
         return jsonify({"error": "An error occurred while processing your request. Please try again later."}), 500
-
-# Ensure other routes are updated to use 'third_round_bp'
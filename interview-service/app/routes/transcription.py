@@ -0,0 +1,56 @@
+from flask import Blueprint, request, jsonify
+from app.utils.transcription_utils import transcribe_audio_bytes, AudioFormatError
+from app.utils.segment_transcription_utils import add_segment, partial_transcript, finalize_recording, IncompleteRecordingError
+import logging
+
+logger = logging.getLogger(__name__)
+logger.debug("Creating transcription blueprint")
+
+transcription_bp = Blueprint('transcription', __name__)
+
+@transcription_bp.route('/transcribe_audio', methods=['POST'])
+def transcribe_audio():
+    if 'audio' not in request.files:
+        return jsonify({'error': 'No audio file uploaded'}), 400
+
+    # The upload is read into memory and never written to disk
+    data = request.files['audio'].read()
+    try:
+        text = transcribe_audio_bytes(data)
+    except AudioFormatError as e:
+        return jsonify({'error': str(e)}), 415
+    except Exception as e:
+        logger.error(f"Error during transcription: {e}")
+        return jsonify({'error': 'Failed to transcribe audio'}), 500
+
+    return jsonify({'transcription': text})
+
+@transcription_bp.route('/transcribe_audio/segment', methods=['POST'])
+def transcribe_segment():
+    # One self-contained segment of an answer that is still being recorded
+    recording_id = request.form.get('recording_id')
+    index = request.form.get('index', type=int)
+    if not recording_id or index is None or 'audio' not in request.files:
+        return jsonify({'error': 'Missing recording_id, index or audio'}), 400
+
+    data = request.files['audio'].read()
+    if not data:
+        return jsonify({'error': 'The audio segment is empty'}), 400
+
+    add_segment(recording_id, index, data)
+    return jsonify({'received': index, 'partial': partial_transcript(recording_id)}), 202
+
+@transcription_bp.route('/transcribe_audio/finalize', methods=['POST'])
+def finalize_transcription():
+    recording_id = request.form.get('recording_id')
+    segment_count = request.form.get('segment_count', type=int)
+    if not recording_id or segment_count is None:
+        return jsonify({'error': 'Missing recording_id or segment_count'}), 400
+
+    try:
+        text = finalize_recording(recording_id, segment_count)
+    except IncompleteRecordingError as e:
+        # The client falls back to uploading the whole answer to /transcribe_audio
+        logger.warning(str(e))
+        return jsonify({'error': 'Some segments of the recording are missing'}), 409
+    return jsonify({'transcription': text})
@@ -52,6 +52,158 @@ $(document).ready(function() {
         submitAnswer('skipped');
     });
 
+    // Show the voice picker; questions are read aloud whenever a voice is selected
+    $('#generate_audio').on('click', function() {
+        $('#voice-selection').toggle();
+    });
+
+    // Record the answer in short self-contained segments. Each segment is uploaded and transcribed
+    // while the candidate keeps talking, so only the last one is pending when they stop.
+    const SEGMENT_MS = 10000;
+    let recording = null;
+
+    $('#record-answer').on('click', function() {
+        if (recording) {
+            recording.stopping = true;
+            recording.recorder.stop();
+            return;
+        }
+        navigator.mediaDevices.getUserMedia({ audio: true }).then(function(stream) {
+            recording = {
+                id: `${sessionId}-${Date.now()}-${Math.random().toString(36).slice(2)}`,
+                stream: stream,
+                index: 0,
+                uploads: [],
+                stopping: false,
+                recorder: null,
+                full: recordFull(stream)
+            };
+            startSegment(recording);
+            $('#record-answer').addClass('recording');
+        }).catch(function(error) {
+            console.error('Error accessing microphone:', error);
+        });
+    });
+
+    function recordFull(stream) {
+        // The whole answer in one recording, sent to /transcribe_audio if the segments cannot be finalized
+        const recorder = new MediaRecorder(stream);
+        const chunks = [];
+        recorder.ondataavailable = function(event) {
+            if (event.data.size > 0) {
+                chunks.push(event.data);
+            }
+        };
+        const blob = new Promise(function(resolve) {
+            recorder.onstop = function() {
+                resolve(new Blob(chunks, { type: recorder.mimeType }));
+            };
+        });
+        recorder.start();
+        return { recorder: recorder, blob: blob };
+    }
+
+    function startSegment(current) {
+        // A fresh MediaRecorder per segment, so every upload carries its own container header
+        const recorder = new MediaRecorder(current.stream);
+        const chunks = [];
+        recorder.ondataavailable = function(event) {
+            if (event.data.size > 0) {
+                chunks.push(event.data);
+            }
+        };
+        recorder.onstop = function() {
+            clearTimeout(timer);
+            if (chunks.length) {
+                current.uploads.push(uploadSegment(current, current.index++, new Blob(chunks, { type: recorder.mimeType })));
+            }
+            if (current.stopping) {
+                finishRecording(current);
+            } else {
+                startSegment(current);
+            }
+        };
+        const timer = setTimeout(function() {
+            if (recorder.state === 'recording') {
+                recorder.stop();
+            }
+        }, SEGMENT_MS);
+        current.recorder = recorder;
+        recorder.start();
+    }
+
+    function uploadSegment(current, index, blob) {
+        const formData = new FormData();
+        formData.append('recording_id', current.id);
+        formData.append('index', index);
+        formData.append('audio', blob, `segment-${index}`);
+
+        return fetch(Flask.url_for('transcription.transcribe_segment'), {
+            method: 'POST',
+            body: formData
+        }).then(function(response) {
+            if (!response.ok) {
+                throw new Error(`Segment ${index} upload failed with status ${response.status}`);
+            }
+            return response.json();
+        }).then(function(payload) {
+            if (payload.partial) {
+                $('#status-message').text(payload.partial);
+            }
+        });
+    }
+
+    function finishRecording(current) {
+        if (current.full.recorder.state !== 'inactive') {
+            current.full.recorder.stop();
+        }
+        current.stream.getTracks().forEach(function(track) { track.stop(); });
+        recording = null;
+        $('#record-answer').removeClass('recording');
+        $('#status-message').text('Transcribing your answer...');
+
+        Promise.all(current.uploads).then(function() {
+            const formData = new FormData();
+            formData.append('recording_id', current.id);
+            formData.append('segment_count', current.index);
+            return fetch(Flask.url_for('transcription.finalize_transcription'), {
+                method: 'POST',
+                body: formData
+            });
+        }).then(function(response) {
+            if (!response.ok) {
+                throw new Error(`Finalize failed with status ${response.status}`);
+            }
+            return response.json();
+        }).catch(function(error) {
+            // A failed segment upload or an incomplete recording: transcribe the whole answer instead
+            console.warn('Falling back to a full transcription:', error);
+            return current.full.blob.then(transcribeFull);
+        }).then(function(payload) {
+            $('#status-message').text('');
+            if (payload.transcription) {
+                const existing = $('#answer_1').val();
+                $('#answer_1').val(existing ? `${existing} ${payload.transcription}` : payload.transcription);
+            } else {
+                console.error('Error occurred:', payload.error);
+            }
+        }).catch(function(error) {
+            $('#status-message').text('');
+            console.error('Error occurred:', error);
+        });
+    }
+
+    function transcribeFull(blob) {
+        const formData = new FormData();
+        formData.append('audio', blob, 'answer');
+        return fetch(Flask.url_for('transcription.transcribe_audio'), {
+            method: 'POST',
+            body: formData
+        }).then(function(response) {
+            return response.json();
+        });
+    }
+
     // Add event listener for Wrap-up Interview button
     $('#wrap-up-interview').on('click', function() {
         endInterview();
@@ -60,7 +212,11 @@ $(document).ready(function() {
     $('#response-form').on('submit', function(event) {
         event.preventDefault();
         const answer = $('#answer_1').val();
-        submitAnswer(answer);
+        if (window.fetch && window.ReadableStream && window.TextDecoder) {
+            submitAnswerStream(answer);
+        } else {
+            submitAnswer(answer);
+        }
     });
 
     function submitAnswer(answer) {
@@ -72,6 +228,7 @@ $(document).ready(function() {
             interview_round: $('input[name="interview_round"]').val(),
             question_id: $('input[name="question_id"]').val(),
             question_num: $('input[name="question_num"]').val(),
+            voice: $('#voice').val(),
             current_time: $('#interview-timer').text() // Send the current interview timer time
         };
 
@@ -90,6 +247,7 @@ $(document).ready(function() {
 
                 if (response.question) {
                     appendQuestion(response.question);
+                    playQuestionAudio(response.question_audio);
 
                     $('input[name="question"]').val(response.question);
                     $('input[name="question_id"]').val(response.question_id || '');
@@ -109,6 +267,117 @@ $(document).ready(function() {
         });
     }
 
+    // Stream the feedback as Server-Sent Events, then receive the score and the next question
+    function submitAnswerStream(answer) {
+        const formData = new URLSearchParams({
+            session_id: $('input[name="session_id"]').val(),
+            user_id: $('input[name="user_id"]').val(),
+            question: $('input[name="question"]').val(),
+            answer_1: answer,
+            interview_round: $('input[name="interview_round"]').val(),
+            question_id: $('input[name="question_id"]').val(),
+            question_num: $('input[name="question_num"]').val(),
+            voice: $('#voice').val(),
+            current_time: $('#interview-timer').text() // Send the current interview timer time
+        });
+
+        appendAnswer(answer);
+        $('#answer_1').val('');
+        const feedbackElement = appendFeedback();
+
+        fetch(Flask.url_for('first_round.submit_answer_stream'), {
+            method: 'POST',
+            headers: { 'Content-Type': 'application/x-www-form-urlencoded' },
+            body: formData
+        }).then(function(response) {
+            if (!response.ok) {
+                throw new Error(`Request failed with status ${response.status}`);
+            }
+            const reader = response.body.getReader();
+            const decoder = new TextDecoder();
+            let buffer = '';
+
+            function read() {
+                return reader.read().then(function(result) {
+                    if (result.done) {
+                        return;
+                    }
+                    buffer += decoder.decode(result.value, { stream: true });
+                    const events = buffer.split('\n\n');
+                    buffer = events.pop();
+                    events.forEach(function(rawEvent) {
+                        handleStreamEvent(rawEvent, feedbackElement);
+                    });
+                    return read();
+                });
+            }
+            return read();
+        }).catch(function(error) {
+            console.error('Error occurred:', error);
+        });
+    }
+
+    function handleStreamEvent(rawEvent, feedbackElement) {
+        let eventName = 'message';
+        let data = '';
+        rawEvent.split('\n').forEach(function(line) {
+            if (line.startsWith('event: ')) {
+                eventName = line.slice(7);
+            } else if (line.startsWith('data: ')) {
+                data += line.slice(6);
+            }
+        });
+        if (!data) {
+            return;
+        }
+        const payload = JSON.parse(data);
+
+        if (eventName === 'feedback') {
+            feedbackElement.text(feedbackElement.text() + payload.token);
+        } else if (eventName === 'score') {
+            if (payload.score !== null) {
+                feedbackElement.append(`<br><strong>Score: ${payload.score}/10</strong>`);
+            }
+        } else if (eventName === 'question') {
+            appendQuestion(payload.question);
+            playQuestionAudio(payload.question_audio);
+
+            $('input[name="question"]').val(payload.question);
+            $('input[name="question_id"]').val(payload.question_id || '');
+            $('input[name="question_num"]').val(payload.question_num);
+
+            sessionStorage.setItem('question_time', $('#interview-timer').text());
+        } else if (eventName === 'complete') {
+            displaySummaryMessage(payload.summary);
+        } else if (eventName === 'error') {
+            console.error('Error occurred:', payload.error);
+        }
+    }
+
+    function appendFeedback() {
+        const feedbackHtml = `
+            <div class="chat-block">
+                <div class="chat-image">
+                    <img src="https://interview-bot-public-images.s3.amazonaws.com/beans_bot_light_bg_500.png" alt="Beans Bot" class="chat-image">
+                </div>
+                <div class="speech-bubble">
+                    <p class="feedback-text"></p>
+                </div>
+            </div>
+        `;
+        $('#chat').append(feedbackHtml);
+        return $('#chat .feedback-text').last();
+    }
+
+    function playQuestionAudio(audioUrl) {
+        if (!audioUrl) {
+            return;
+        }
+        new Audio(audioUrl).play().catch(function(error) {
+            console.error('Error playing question audio:', error);
+        });
+    }
+
     function appendQuestion(question) {
         const questionHtml = `
             <div class="chat-block">
@@ -165,6 +434,7 @@ $(document).ready(function() {
             interview_round: $('input[name="interview_round"]').val(),
             question_id: $('input[name="question_id"]').val(),
             question_num: $('input[name="question_num"]').val(),
+            voice: $('#voice').val(),
             current_time: $('#interview-timer').text() // Send the current interview timer time
         };
 
@@ -177,6 +447,7 @@ $(document).ready(function() {
 
                 if (response.question) {
                     appendQuestion(response.question);
+                    playQuestionAudio(response.question_audio);
                     $('input[name="question"]').val(response.question);
                     $('input[name="question_id"]').val(response.question_id || '');
                     $('input[name="question_num"]').val('last');
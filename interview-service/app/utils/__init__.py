@@ -1,7 +1,7 @@
 # app/utils/__init__.py
 
 from .audio_utils import text_to_speech_file
-from .unique_session_utils import generate_session_id, ensure_unique_session_id
+from .unique_session_utils import generate_session_id
 
 # Placeholder for future imports from first_round_utils
 from .first_round_utils import *
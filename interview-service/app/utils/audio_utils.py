@@ -1,10 +1,21 @@
 import os
+import hmac
+import json
 import uuid
+import zlib
+import time
+import base64
+import hashlib
+import threading
+import logging
+from collections import OrderedDict
 from pydub import AudioSegment
 from pydub.utils import which
-from flask import current_app
-from elevenlabs.client import ElevenLabs, ApiError
+from elevenlabs.client import AsyncElevenLabs, ElevenLabs, ApiError
 from elevenlabs import VoiceSettings
+from app.metrics import increment, register_gauge
+
+logger = logging.getLogger(__name__)
 
 # Ensure environment variables are set
 ELEVENLABS_API_KEY = os.getenv("ELEVENLABS_API_KEY")
@@ -24,44 +35,303 @@ AudioSegment.converter = which("ffmpeg") or os.getenv('FFMPEG_LOCATION')
 
 # Initialize ElevenLabs client
 elevenlabs_client = ElevenLabs(api_key=os.getenv("ELEVENLABS_API_KEY"))
+# Used by the ASGI entry point, so relays wait on the event loop instead of holding a thread
+async_elevenlabs_client = AsyncElevenLabs(api_key=os.getenv("ELEVENLABS_API_KEY"))
+
+TTS_MODEL_ID = "eleven_turbo_v2"
+TTS_OUTPUT_FORMAT = "mp3_22050_32"
+
+# Synthesized audio is stored once per (text, voice, model, format) and evicted least recently used first
+TTS_CACHE_DIR = os.getenv('TTS_CACHE_DIR', os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'audio_files', 'tts_cache'))
+TTS_CACHE_MAX_BYTES = int(os.getenv('TTS_CACHE_MAX_BYTES', str(500 * 1024 * 1024)))
+# Every worker shares the cache directory, so before evicting one re-reads sizes and access times
+# from disk at most this often, counting files other workers wrote or read in the meantime
+TTS_CACHE_RESCAN_SECONDS = int(os.getenv('TTS_CACHE_RESCAN_SECONDS', '60'))
+
+def tts_cache_key(text, voice_id, model_id=TTS_MODEL_ID, output_format=TTS_OUTPUT_FORMAT):
+    digest = hashlib.sha256()
+    for part in (text.strip(), voice_id, model_id, output_format):
+        digest.update(part.encode('utf-8'))
+        digest.update(b'\0')
+    return digest.hexdigest()
+
+class TTSCache:
+    # Size-bounded LRU of synthesized audio files, one file per content key
+    def __init__(self, directory, max_bytes):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        # key -> file size in bytes, least recently used first
+        self._entries = None
+        self._total_bytes = 0
+        self._loaded_at = 0
+        self.hits = 0
+        self.misses = 0
+
+    def path_for(self, key):
+        # Fan out by the first two hex characters so no directory grows too large
+        return os.path.join(self.directory, key[:2], f"{key}.mp3")
+
+    def _load(self):
+        # Rebuild the LRU order from the files already on disk, oldest access first
+        if self._entries is not None:
+            return
+        found = []
+        if os.path.isdir(self.directory):
+            for root, _, filenames in os.walk(self.directory):
+                for filename in filenames:
+                    if not filename.endswith('.mp3'):
+                        continue
+                    try:
+                        stat = os.stat(os.path.join(root, filename))
+                    except FileNotFoundError:
+                        # Evicted by another worker during the walk
+                        continue
+                    found.append((stat.st_mtime, filename[:-4], stat.st_size))
+        found.sort()
+        self._entries = OrderedDict((key, size) for _, key, size in found)
+        self._total_bytes = sum(self._entries.values())
+        self._loaded_at = time.monotonic()
+
+    def _adopt(self, key):
+        # Pick up a file written by another worker process since this one loaded the directory
+        try:
+            size = os.path.getsize(self.path_for(key))
+        except OSError:
+            return False
+        self._entries[key] = size
+        self._total_bytes += size
+        return True
+
+    def contains(self, key):
+        # Membership check for the warm-up job; does not touch the LRU order or the hit ratio
+        with self._lock:
+            self._load()
+            if not os.path.exists(self.path_for(key)):
+                # Possibly evicted by another worker
+                self._total_bytes -= self._entries.pop(key, 0)
+                return False
+            return key in self._entries or self._adopt(key)
+
+    def get(self, key):
+        with self._lock:
+            self._load()
+            if key not in self._entries and not self._adopt(key):
+                self.misses += 1
+                increment('tts.cache.misses')
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+        increment('tts.cache.hits')
+
+        path = self.path_for(key)
+        try:
+            # The modification time doubles as the access time when the LRU is rebuilt after a restart
+            os.utime(path, (time.time(), time.time()))
+        except FileNotFoundError:
+            with self._lock:
+                size = self._entries.pop(key, 0)
+                self._total_bytes -= size
+            return None
+        return path
+
+    def put(self, key, chunks):
+        for _ in self.tee(key, chunks):
+            pass
+        return self.path_for(key)
+
+    def tee(self, key, chunks):
+        # Yields each chunk while writing it to a temporary file. The file only becomes
+        # a cache entry once every chunk has been written, so readers never see partial audio
+        # and a relay abandoned by the client leaves nothing behind.
+        path, temp_path = self._temp_path(key)
+        size = 0
+        try:
+            with open(temp_path, "wb") as f:
+                for chunk in chunks:
+                    if chunk:
+                        f.write(chunk)
+                        size += len(chunk)
+                        yield chunk
+            os.replace(temp_path, path)
+        except BaseException:
+            if os.path.exists(temp_path):
+                os.unlink(temp_path)
+            raise
+        self._commit(key, size)
+
+    async def atee(self, key, chunks):
+        # tee for an async iterator of chunks; the local file writes are small enough to stay on the loop
+        path, temp_path = self._temp_path(key)
+        size = 0
+        try:
+            with open(temp_path, "wb") as f:
+                async for chunk in chunks:
+                    if chunk:
+                        f.write(chunk)
+                        size += len(chunk)
+                        yield chunk
+            os.replace(temp_path, path)
+        except BaseException:
+            if os.path.exists(temp_path):
+                os.unlink(temp_path)
+            raise
+        self._commit(key, size)
+
+    def _temp_path(self, key):
+        path = self.path_for(key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        return path, f"{path}.{uuid.uuid4().hex}.tmp"
+
+    def _commit(self, key, size):
+        with self._lock:
+            if time.monotonic() - self._loaded_at > TTS_CACHE_RESCAN_SECONDS:
+                # The directory, with the modification time as the access time, is the LRU all workers share
+                self._entries = None
+            self._load()
+            self._total_bytes += size - self._entries.pop(key, 0)
+            self._entries[key] = size
+            evicted = self._evict()
+        for evicted_key in evicted:
+            try:
+                os.unlink(self.path_for(evicted_key))
+            except FileNotFoundError:
+                pass
+
+    def _evict(self):
+        evicted = []
+        while self._total_bytes > self.max_bytes and len(self._entries) > 1:
+            key, size = self._entries.popitem(last=False)
+            self._total_bytes -= size
+            evicted.append(key)
+        if evicted:
+            increment('tts.cache.evictions', len(evicted))
+        return evicted
+
+    def hit_ratio(self):
+        lookups = self.hits + self.misses
+        return self.hits / lookups if lookups else 0.0
+
+    def total_bytes(self):
+        return self._total_bytes
+
+tts_cache = TTSCache(TTS_CACHE_DIR, TTS_CACHE_MAX_BYTES)
+
+register_gauge('tts.cache.bytes', tts_cache.total_bytes)
+register_gauge('tts.cache.hit_ratio', tts_cache.hit_ratio)
+
+def _speech_request(text, voice_id):
+    return dict(
+        voice_id=voice_id,
+        optimize_streaming_latency="0",
+        output_format=TTS_OUTPUT_FORMAT,
+        text=text,
+        model_id=TTS_MODEL_ID,
+        voice_settings=VoiceSettings(
+            stability=0.0,
+            similarity_boost=1.0,
+            style=0.0,
+            use_speaker_boost=True,
+        ),
+    )
+
+def synthesize_speech(text, voice_id):
+    # Uses the streaming endpoint, so the first chunks arrive before the whole clip is rendered
+    return elevenlabs_client.text_to_speech.convert_as_stream(**_speech_request(text, voice_id))
+
+def asynthesize_speech(text, voice_id):
+    # Async iterator of audio chunks from the same streaming endpoint
+    return async_elevenlabs_client.text_to_speech.convert_as_stream(**_speech_request(text, voice_id))
 
 def text_to_speech_file(text: str, voice_id: str) -> str:
     if not text.strip():
         print("Text is empty, skipping text-to-speech conversion.")
         return ""
 
-    try:
-        response = elevenlabs_client.text_to_speech.convert(
-            voice_id=voice_id,
-            optimize_streaming_latency="0",
-            output_format="mp3_22050_32",
-            text=text,
-            model_id="eleven_turbo_v2",
-            voice_settings=VoiceSettings(
-                stability=0.0,
-                similarity_boost=1.0,
-                style=0.0,
-                use_speaker_boost=True,
-            ),
-        )
-
-        audio_folder = os.path.join(current_app.root_path, 'audio_files')
-        # Remove existing files in the folder
-        for filename in os.listdir(audio_folder):
-            file_path = os.path.join(audio_folder, filename)
-            if os.path.isfile(file_path):
-                os.unlink(file_path)
-
-        save_file_path = os.path.join(audio_folder, f"{uuid.uuid4()}.mp3")
-        os.makedirs(os.path.dirname(save_file_path), exist_ok=True)
-
-        with open(save_file_path, "wb") as f:
-            for chunk in response:
-                if chunk:
-                    f.write(chunk)
+    key = tts_cache_key(text, voice_id)
+    cached_path = tts_cache.get(key)
+    if cached_path:
+        return cached_path
 
+    try:
+        save_file_path = tts_cache.put(key, synthesize_speech(text, voice_id))
         print(f"{save_file_path}: A new audio file was saved successfully!")
         return save_file_path
     except ApiError as e:
         print(f"Error generating speech: {e}")
-        return ""
\ No newline at end of file
+        return ""
+
+# Relayed audio is also written to the cache unless this is turned off
+TTS_STREAM_CACHE = os.getenv('TTS_STREAM_CACHE', 'true').lower() == 'true'
+
+def stream_speech(text, voice_id, cache=TTS_STREAM_CACHE):
+    # Returns an iterator of audio chunks for a relay. The first chunk is read here so API errors
+    # surface before the response starts instead of in the middle of the body.
+    chunks = iter(synthesize_speech(text, voice_id))
+    first_chunk = next(chunks, b"")
+    increment('tts.stream.relays')
+
+    def relay():
+        yield first_chunk
+        yield from chunks
+
+    if cache:
+        return tts_cache.tee(tts_cache_key(text, voice_id), relay())
+    return relay()
+
+async def astream_speech(text, voice_id, cache=TTS_STREAM_CACHE):
+    # stream_speech for the ASGI entry point; returns an async iterator of audio chunks
+    chunks = asynthesize_speech(text, voice_id).__aiter__()
+    try:
+        first_chunk = await chunks.__anext__()
+    except StopAsyncIteration:
+        first_chunk = b""
+    increment('tts.stream.relays')
+
+    async def relay():
+        yield first_chunk
+        async for chunk in chunks:
+            yield chunk
+
+    if cache:
+        return tts_cache.atee(tts_cache_key(text, voice_id), relay())
+    return relay()
+
+# The audio URL carries its own text and voice in a signed token, so whichever worker receives
+# the request can render it, and clients cannot have the server synthesize arbitrary text.
+# Config.SECRET_KEY has a public default, so only a secret set in the environment is used;
+# without one no token is signed or accepted and only cached audio is served.
+SPEECH_TOKEN_SECRET = (os.getenv('SPEECH_TOKEN_SECRET') or os.getenv('SECRET_KEY') or '').encode('utf-8')
+if not SPEECH_TOKEN_SECRET:
+    logger.error("Neither SPEECH_TOKEN_SECRET nor SECRET_KEY is set, question audio will not be synthesized on request")
+
+def _b64encode(data):
+    return base64.urlsafe_b64encode(data).rstrip(b'=').decode('ascii')
+
+def _b64decode(text):
+    return base64.urlsafe_b64decode(text + '=' * (-len(text) % 4))
+
+def _speech_signature(payload):
+    return _b64encode(hmac.new(SPEECH_TOKEN_SECRET, payload.encode('ascii'), hashlib.sha256).digest())
+
+def speech_token(text, voice_id):
+    # None when no secret is configured
+    if not SPEECH_TOKEN_SECRET:
+        return None
+    payload = _b64encode(zlib.compress(json.dumps([text, voice_id]).encode('utf-8')))
+    return f"{payload}.{_speech_signature(payload)}"
+
+def read_speech_token(key, token):
+    # Returns (text, voice_id) for a token signed by any worker, or None when it is forged or for another key
+    if not SPEECH_TOKEN_SECRET:
+        return None
+    payload, _, signature = (token or '').partition('.')
+    if not payload or not hmac.compare_digest(signature, _speech_signature(payload)):
+        return None
+    try:
+        text, voice_id = json.loads(zlib.decompress(_b64decode(payload)))
+    except (ValueError, TypeError, zlib.error):
+        return None
+    if tts_cache_key(text, voice_id) != key:
+        return None
+    return text, voice_id
@@ -0,0 +1,151 @@
+import os
+import json
+import time
+import fcntl
+import threading
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from app.database import db_session
+from app.models import Questions
+from app.metrics import increment, register_gauge
+from app.utils.audio_utils import tts_cache, tts_cache_key, synthesize_speech, TTS_CACHE_DIR, ELEVENLABS_API_KEY
+from app.utils.round_engine_utils import ROUNDS, BANK, STATIC, context_variables
+
+logger = logging.getLogger(__name__)
+
+# Pre-render question audio into the TTS cache so it is served from disk during interviews
+TTS_WARMUP_ENABLED = os.getenv('TTS_WARMUP_ENABLED', 'true').lower() == 'true'
+# Voices offered in the interview templates
+TTS_WARMUP_VOICES = [voice.strip() for voice in os.getenv('TTS_WARMUP_VOICES', 'WBPMIeOib7vXJnT2Iibp,P9OzYIULscDISblYABOC,tnSpp4vdxKPjI9w0GnoV,kBag1HOZlaVBH7ICPE8x,aTxZrSrp47xsP6Ot4Kgd').split(',') if voice.strip()]
+TTS_WARMUP_INTERVAL = int(os.getenv('TTS_WARMUP_INTERVAL', '3600'))
+TTS_WARMUP_WORKERS = int(os.getenv('TTS_WARMUP_WORKERS', '2'))
+
+# question id -> updated_at of the row text that was last rendered for every voice
+TTS_WARMUP_MANIFEST = os.path.join(TTS_CACHE_DIR, 'warmup_manifest.json')
+
+_coverage = {'rendered': 0, 'total': 0}
+
+register_gauge('tts.warmup.rendered_pairs', lambda: _coverage['rendered'])
+register_gauge('tts.warmup.total_pairs', lambda: _coverage['total'])
+register_gauge('tts.warmup.coverage', lambda: _coverage['rendered'] / _coverage['total'] if _coverage['total'] else 0.0)
+
+# Separate from the LLM executor so warm-up never takes a slot from an interview turn
+_phrase_executor = ThreadPoolExecutor(max_workers=TTS_WARMUP_WORKERS, thread_name_prefix='tts-warmup')
+_in_flight_lock = threading.Lock()
+_in_flight = set()
+_started = False
+
+def warmup_enabled():
+    return TTS_WARMUP_ENABLED and bool(ELEVENLABS_API_KEY) and bool(TTS_WARMUP_VOICES)
+
+def bank_question_types():
+    return sorted({step.question_type for interview_round in ROUNDS.values() for step in interview_round.steps if step.source == BANK})
+
+def render_speech(text, voice_id):
+    # Returns True when the audio is in the cache afterwards
+    key = tts_cache_key(text, voice_id)
+    if tts_cache.contains(key):
+        return True
+
+    with _in_flight_lock:
+        if key in _in_flight:
+            return False
+        _in_flight.add(key)
+    try:
+        tts_cache.put(key, synthesize_speech(text, voice_id))
+        increment('tts.warmup.rendered')
+        return True
+    except Exception as e:
+        logger.error(f"Error pre-rendering speech: {e}")
+        increment('tts.warmup.failures')
+        return False
+    finally:
+        with _in_flight_lock:
+            _in_flight.discard(key)
+
+def _load_manifest():
+    try:
+        with open(TTS_WARMUP_MANIFEST) as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+def _save_manifest(manifest):
+    temp_path = f"{TTS_WARMUP_MANIFEST}.{os.getpid()}.tmp"
+    with open(temp_path, 'w') as f:
+        json.dump(manifest, f)
+    os.replace(temp_path, TTS_WARMUP_MANIFEST)
+
+def warm_question_bank():
+    # One pass over the question bank. Only rows whose updated_at differs from the manifest are rendered.
+    os.makedirs(TTS_CACHE_DIR, exist_ok=True)
+    with open(f"{TTS_WARMUP_MANIFEST}.lock", 'w') as lock_file:
+        try:
+            # Every worker process runs this loop; only one of them renders at a time
+            fcntl.flock(lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except BlockingIOError:
+            logger.debug("Audio warm-up already running in another process")
+            return 0
+
+        try:
+            rows = db_session.query(Questions.id, Questions.question, Questions.updated_at).filter(Questions.question_type.in_(bank_question_types())).all()
+        finally:
+            db_session.remove()
+
+        manifest = _load_manifest()
+        rendered = 0
+        for question_id, text, updated_at in rows:
+            version = updated_at.isoformat() if updated_at else ''
+            # The manifest only says the row text was rendered; the LRU may have evicted the clips since
+            if manifest.get(str(question_id)) == version and all(tts_cache.contains(tts_cache_key(text, voice_id)) for voice_id in TTS_WARMUP_VOICES):
+                continue
+
+            complete = True
+            for voice_id in TTS_WARMUP_VOICES:
+                if tts_cache.contains(tts_cache_key(text, voice_id)):
+                    continue
+                if render_speech(text, voice_id):
+                    rendered += 1
+                else:
+                    complete = False
+            if complete:
+                manifest[str(question_id)] = version
+
+        # Forget deleted questions so the manifest does not grow forever
+        current_ids = {str(question_id) for question_id, _, _ in rows}
+        _save_manifest({question_id: version for question_id, version in manifest.items() if question_id in current_ids})
+
+    # Coverage counts cached (question, voice) pairs, so audio evicted since it was rendered shows up as a gap
+    _coverage['total'] = len(rows) * len(TTS_WARMUP_VOICES)
+    _coverage['rendered'] = sum(1 for _, text, _ in rows for voice_id in TTS_WARMUP_VOICES if tts_cache.contains(tts_cache_key(text, voice_id)))
+    logger.info(f"Audio warm-up rendered {rendered} clips, coverage {_coverage['rendered']}/{_coverage['total']}")
+    return rendered
+
+def _warmup_loop():
+    while True:
+        try:
+            warm_question_bank()
+        except Exception as e:
+            logger.error(f"Audio warm-up failed: {e}")
+        time.sleep(TTS_WARMUP_INTERVAL)
+
+def start_audio_warmup():
+    global _started
+    if _started or not warmup_enabled():
+        return
+    _started = True
+    threading.Thread(target=_warmup_loop, name='tts-warmup', daemon=True).start()
+
+def served_phrases(current_round, context):
+    # The first question is rendered into the page without audio; later static steps and the closing are spoken
+    variables = context_variables(context)
+    return [step.text.format(**variables) for step in current_round.steps[1:] + (current_round.closing,) if step.source == STATIC]
+
+def warm_interview_phrases(current_round, context, voice_id):
+    # Closers are templated with the candidate's details, so they are rendered during the interview,
+    # for the voice the candidate picked, ahead of the turn that serves them
+    if not warmup_enabled() or not voice_id or voice_id == 'none':
+        return
+    for text in served_phrases(current_round, context):
+        if not tts_cache.contains(tts_cache_key(text, voice_id)):
+            _phrase_executor.submit(render_speech, text, voice_id)
@@ -0,0 +1,163 @@
+import os
+import re
+import json
+import hashlib
+import logging
+from sqlalchemy import select
+from sqlalchemy.dialects.postgresql import insert
+from app.database import db_session, engine
+from app.async_database import get_async_engine
+from app.models import CompactedContexts, JobDescriptions, Resumes
+from app.metrics import increment, observe
+
+logger = logging.getLogger(__name__)
+
+# Resume and job listing fields are compacted once per change, then read by every interview prompt
+CONTEXT_COMPACT_MAX_ITEMS = int(os.getenv('CONTEXT_COMPACT_MAX_ITEMS', '8'))
+CONTEXT_COMPACT_ITEM_WORDS = int(os.getenv('CONTEXT_COMPACT_ITEM_WORDS', '25'))
+CONTEXT_COMPACT_FIELD_TOKENS = int(os.getenv('CONTEXT_COMPACT_FIELD_TOKENS', '200'))
+
+# Interview context field -> (model, column) it is compacted from
+COMPACTED_FIELDS = {
+    'job_responsibilities': (JobDescriptions, 'job_responsibilities'),
+    'required_professional_experiences': (JobDescriptions, 'required_professional_experiences'),
+    'key_technical_skills': (Resumes, 'key_technical_skills'),
+    'key_soft_skills': (Resumes, 'key_soft_skills'),
+}
+
+_BULLET = re.compile(r'^[\s\-•*\d.)]+')
+
+_encoding = None
+
+def count_tokens(text):
+    # Exact count with the chat model's tokenizer; about four characters a token if tiktoken cannot load
+    global _encoding
+    if not text:
+        return 0
+    if _encoding is None:
+        try:
+            import tiktoken
+            _encoding = tiktoken.encoding_for_model('gpt-3.5-turbo')
+        except Exception as e:
+            logger.warning(f"tiktoken unavailable, estimating token counts: {e}")
+            _encoding = False
+    if _encoding:
+        return len(_encoding.encode(text))
+    return (len(text) + 3) // 4
+
+def normalize_item(item):
+    item = _BULLET.sub('', ' '.join(str(item).split()))
+    return item.rstrip(' .;,')
+
+def truncate_words(text, max_words):
+    words = text.split()
+    return text if len(words) <= max_words else ' '.join(words[:max_words]) + '...'
+
+def compact_items(value):
+    # Deduplicate case-insensitively, shorten each item and stop at the field's token budget
+    items = value if isinstance(value, (list, tuple)) else [value] if value else []
+    seen = set()
+    kept = []
+    tokens = 0
+    for item in items:
+        item = normalize_item(item)
+        key = item.casefold()
+        if not item or key in seen:
+            continue
+        seen.add(key)
+
+        item = truncate_words(item, CONTEXT_COMPACT_ITEM_WORDS)
+        item_tokens = count_tokens(item) + 1
+        if kept and (len(kept) >= CONTEXT_COMPACT_MAX_ITEMS or tokens + item_tokens > CONTEXT_COMPACT_FIELD_TOKENS):
+            break
+        kept.append(item)
+        tokens += item_tokens
+    return '; '.join(kept)
+
+def source_hash(value):
+    return hashlib.sha256(json.dumps(value, default=str).encode('utf-8')).hexdigest()
+
+def _raw_text(value):
+    if isinstance(value, (list, tuple)):
+        return ', '.join(str(item) for item in value)
+    return value or ''
+
+def _store_statement(user_id, field_name, value_hash, compacted, original_tokens, compacted_tokens):
+    statement = insert(CompactedContexts).values(
+        user_id=user_id, field_name=field_name, source_hash=value_hash, compacted_text=compacted,
+        original_tokens=original_tokens, compacted_tokens=compacted_tokens,
+    )
+    statement = statement.on_conflict_do_update(
+        index_elements=[CompactedContexts.user_id, CompactedContexts.field_name],
+        set_={
+            'source_hash': statement.excluded.source_hash,
+            'compacted_text': statement.excluded.compacted_text,
+            'original_tokens': statement.excluded.original_tokens,
+            'compacted_tokens': statement.excluded.compacted_tokens,
+        },
+    )
+    return statement
+
+def _store(user_id, field_name, *compaction):
+    try:
+        # Own transaction, so the caller's session is never committed from here
+        with engine.begin() as connection:
+            connection.execute(_store_statement(user_id, field_name, *compaction))
+    except Exception as e:
+        logger.error(f"Error storing compacted {field_name} for user {user_id}: {e}")
+
+def _compact_stale_fields(user_id, raw_fields, rows):
+    # Returns (compacted text per field, compactions that need storing)
+    compacted_fields = {}
+    stale = []
+    for field_name, value in raw_fields.items():
+        value_hash = source_hash(value)
+        row = rows.get(field_name)
+        if row is not None and row.source_hash == value_hash:
+            compacted_fields[field_name] = row.compacted_text
+            continue
+
+        compacted = compact_items(value)
+        original_tokens = count_tokens(_raw_text(value))
+        compacted_tokens = count_tokens(compacted)
+        stale.append((field_name, value_hash, compacted, original_tokens, compacted_tokens))
+        increment('context_compaction.fields_compacted')
+        observe('context_compaction.tokens_saved', original_tokens - compacted_tokens)
+        logger.debug(f"Compacted {field_name} for user {user_id} from {original_tokens} to {compacted_tokens} tokens")
+        compacted_fields[field_name] = compacted
+    return compacted_fields, stale
+
+def compact_fields(user_id, raw_fields):
+    # raw_fields maps COMPACTED_FIELDS names to column values; returns the compacted text for each
+    rows = {row.field_name: row for row in db_session.query(CompactedContexts).filter_by(user_id=user_id).all()}
+    compacted_fields, stale = _compact_stale_fields(user_id, raw_fields, rows)
+    for compaction in stale:
+        _store(user_id, *compaction)
+    return compacted_fields
+
+async def acompact_fields(user_id, raw_fields):
+    # compact_fields for the ASGI handlers, reading and storing through the async engine
+    async with get_async_engine().connect() as connection:
+        result = await connection.execute(select(CompactedContexts.field_name, CompactedContexts.source_hash, CompactedContexts.compacted_text).where(CompactedContexts.user_id == user_id))
+        rows = {row.field_name: row for row in result}
+    compacted_fields, stale = _compact_stale_fields(user_id, raw_fields, rows)
+    if stale:
+        try:
+            async with get_async_engine().begin() as connection:
+                for compaction in stale:
+                    await connection.execute(_store_statement(user_id, *compaction))
+        except Exception as e:
+            logger.error(f"Error storing compacted fields for user {user_id}: {e}")
+    return compacted_fields
+
+def compact_user_context(user_id):
+    # Run when the training-data-service reports a new or edited resume or job listing
+    rows = {
+        JobDescriptions: db_session.query(JobDescriptions).filter_by(user_id=user_id).first(),
+        Resumes: db_session.query(Resumes).filter_by(user_id=user_id).first(),
+    }
+    raw_fields = {
+        field_name: getattr(rows[model], column) if rows[model] else None
+        for field_name, (model, column) in COMPACTED_FIELDS.items()
+    }
+    return compact_fields(int(user_id), raw_fields)
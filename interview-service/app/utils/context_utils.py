@@ -0,0 +1,200 @@
+import os
+import time
+import asyncio
+import threading
+import logging
+from collections import OrderedDict
+from sqlalchemy import insert, select, update
+from sqlalchemy.exc import IntegrityError
+from app.database import db_session, engine
+from app.async_database import async_session, get_async_engine
+from app.models import ContextVersions, JobDescriptions, Users, Resumes
+from app.metrics import increment, register_gauge
+from app.utils.context_compaction_utils import compact_fields, acompact_fields
+
+logger = logging.getLogger(__name__)
+
+# Upper bound on interview snapshots held by one process
+INTERVIEW_CONTEXT_MAX_SESSIONS = int(os.getenv('INTERVIEW_CONTEXT_MAX_SESSIONS', '2000'))
+# Snapshots are checked against the shared context version on every read. They also expire,
+# for edits made without a notification from the training-data-service.
+INTERVIEW_CONTEXT_TTL = int(os.getenv('INTERVIEW_CONTEXT_TTL', '600'))
+
+class InterviewContext:
+    # Immutable snapshot of the user, job listing and resume fields the interview prompts need
+    __slots__ = (
+        'user_id',
+        'username',
+        'job_title',
+        'job_level',
+        'company_name',
+        'company_industry',
+        'job_responsibilities',
+        'required_professional_experiences',
+        'key_technical_skills',
+        'key_soft_skills',
+        'most_recent_successful_project',
+        'version',
+        'loaded_at',
+    )
+
+    def __init__(self, **fields):
+        for name in self.__slots__:
+            value = fields.get(name)
+            if isinstance(value, list):
+                value = tuple(value)
+            object.__setattr__(self, name, value)
+
+    def __setattr__(self, name, value):
+        raise AttributeError("InterviewContext is immutable")
+
+    def __delattr__(self, name):
+        raise AttributeError("InterviewContext is immutable")
+
+    def __repr__(self):
+        return f"InterviewContext(user_id={self.user_id}, job_title={self.job_title!r}, company_name={self.company_name!r})"
+
+_lock = threading.Lock()
+# session_id -> InterviewContext
+_contexts = OrderedDict()
+
+register_gauge('interview_context.sessions', lambda: len(_contexts))
+
+versions_table = ContextVersions.__table__
+
+def _version_query(user_id):
+    return select(versions_table.c.version).where(versions_table.c.user_id == int(user_id))
+
+def context_version(user_id):
+    # 0 until the user's fields are first changed
+    with engine.connect() as connection:
+        return connection.execute(_version_query(user_id)).scalar() or 0
+
+async def acontext_version(user_id):
+    async with get_async_engine().connect() as connection:
+        return (await connection.execute(_version_query(user_id))).scalar() or 0
+
+def bump_context_version(user_id):
+    user_id = int(user_id)
+    with engine.begin() as connection:
+        bumped = connection.execute(update(versions_table).where(versions_table.c.user_id == user_id)
+                                    .values(version=versions_table.c.version + 1, updated_at=time.time())).rowcount
+    if bumped:
+        return
+    try:
+        with engine.begin() as connection:
+            connection.execute(insert(versions_table).values(user_id=user_id, version=1, updated_at=time.time()))
+    except IntegrityError:
+        # Another worker created the row first
+        bump_context_version(user_id)
+
+def _raw_list_fields(job_details, resume_details):
+    return {
+        'job_responsibilities': job_details.job_responsibilities if job_details else None,
+        'required_professional_experiences': job_details.required_professional_experiences if job_details else None,
+        'key_technical_skills': resume_details.key_technical_skills if resume_details else None,
+        'key_soft_skills': resume_details.key_soft_skills if resume_details else None,
+    }
+
+def load_interview_context(user_id, version=None):
+    # The version is read before the rows, so a change made during the load is never hidden by it
+    if version is None:
+        version = context_version(user_id)
+    user = db_session.query(Users).filter_by(id=user_id).first()
+    job_details = db_session.query(JobDescriptions).filter_by(user_id=user_id).first()
+    resume_details = db_session.query(Resumes).filter_by(user_id=user_id).first()
+
+    # The list fields go into the prompts as their compacted summaries rather than the raw lists
+    compacted = compact_fields(int(user_id), _raw_list_fields(job_details, resume_details))
+    return _build_context(user_id, user, job_details, resume_details, compacted, version)
+
+async def _afirst(statement):
+    # Each read gets its own session, so the three lookups below go out at the same time
+    async with async_session() as session:
+        return (await session.execute(statement)).scalars().first()
+
+async def aload_interview_context(user_id, version=None):
+    user_id = int(user_id)
+    if version is None:
+        version = await acontext_version(user_id)
+    user, job_details, resume_details = await asyncio.gather(
+        _afirst(select(Users).where(Users.id == user_id)),
+        _afirst(select(JobDescriptions).where(JobDescriptions.user_id == user_id)),
+        _afirst(select(Resumes).where(Resumes.user_id == user_id)),
+    )
+    compacted = await acompact_fields(user_id, _raw_list_fields(job_details, resume_details))
+    return _build_context(user_id, user, job_details, resume_details, compacted, version)
+
+def _build_context(user_id, user, job_details, resume_details, compacted, version):
+    return InterviewContext(
+        user_id=int(user_id),
+        username=user.username if user else None,
+        job_title=job_details.job_title if job_details else None,
+        job_level=job_details.job_level if job_details else None,
+        company_name=job_details.company_name if job_details else None,
+        company_industry=job_details.company_industry if job_details else None,
+        job_responsibilities=compacted['job_responsibilities'],
+        required_professional_experiences=compacted['required_professional_experiences'],
+        key_technical_skills=compacted['key_technical_skills'],
+        key_soft_skills=compacted['key_soft_skills'],
+        most_recent_successful_project=resume_details.most_recent_successful_project if resume_details else None,
+        version=version,
+        loaded_at=time.monotonic(),
+    )
+
+def start_interview_context(session_id, user_id, version=None):
+    # Called when the interview starts so every later turn reads the snapshot instead of the database
+    context = load_interview_context(user_id, version)
+    _store_context(session_id, context)
+    return context
+
+async def astart_interview_context(session_id, user_id, version=None):
+    context = await aload_interview_context(user_id, version)
+    _store_context(session_id, context)
+    return context
+
+def _cached_context(session_id, user_id, version):
+    key = str(session_id)
+    with _lock:
+        context = _contexts.get(key)
+        if (context is not None and context.user_id == int(user_id) and context.version == version
+                and time.monotonic() - context.loaded_at < INTERVIEW_CONTEXT_TTL):
+            _contexts.move_to_end(key)
+        else:
+            context = None
+
+    if context is not None:
+        increment('interview_context.hits')
+    else:
+        # Another worker started this interview, or the snapshot was invalidated, expired or evicted
+        increment('interview_context.misses')
+    return context
+
+def get_interview_context(session_id, user_id):
+    # One primary key read per turn tells whether the snapshot is still current in every process
+    version = context_version(user_id)
+    return _cached_context(session_id, user_id, version) or start_interview_context(session_id, user_id, version)
+
+async def aget_interview_context(session_id, user_id):
+    version = await acontext_version(user_id)
+    return _cached_context(session_id, user_id, version) or await astart_interview_context(session_id, user_id, version)
+
+def invalidate_user_contexts(user_id):
+    # The training-data-service edited this user's resume or job listing. The version bump makes every
+    # worker reload its snapshots on their next read; this worker's are dropped right away.
+    bump_context_version(user_id)
+    with _lock:
+        stale_keys = [key for key, context in _contexts.items() if context.user_id == int(user_id)]
+        for key in stale_keys:
+            del _contexts[key]
+
+    increment('interview_context.invalidations', len(stale_keys))
+    logger.debug(f"Invalidated {len(stale_keys)} interview contexts for user {user_id}")
+    return len(stale_keys)
+
+def _store_context(session_id, context):
+    with _lock:
+        _contexts[str(session_id)] = context
+        _contexts.move_to_end(str(session_id))
+        while len(_contexts) > INTERVIEW_CONTEXT_MAX_SESSIONS:
+            _contexts.popitem(last=False)
@@ -0,0 +1,24 @@
+import os
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from flask import copy_current_request_context, has_request_context
+
+logger = logging.getLogger(__name__)
+
+# Bounded pool used to overlap the blocking LLM round trips of an interview turn
+LLM_EXECUTOR_MAX_WORKERS = int(os.getenv('LLM_EXECUTOR_MAX_WORKERS', '8'))
+LLM_TASK_TIMEOUT = float(os.getenv('LLM_TASK_TIMEOUT', '60'))
+
+llm_executor = ThreadPoolExecutor(max_workers=LLM_EXECUTOR_MAX_WORKERS, thread_name_prefix='llm')
+
+def submit_llm_task(func, *args):
+    # Pooled tasks read rows through the thread-scoped db_session (rubric descriptions,
+    # question bank rows). Running them inside a copy of the request context means the
+    # app teardown handler removes that session when the task finishes, so pool threads
+    # never hold a connection or stale rows between turns.
+    if has_request_context():
+        func = copy_current_request_context(func)
+    return llm_executor.submit(func, *args)
+
+def wait_for_result(future):
+    return future.result(timeout=LLM_TASK_TIMEOUT)
@@ -1,25 +1,228 @@
-from app.models import InterviewHistory
-from app.database import db_session
+import os
+import time
+import atexit
+import threading
+import logging
+from sqlalchemy import insert, case, func, or_
+from sqlalchemy.dialects.postgresql import insert as upsert
+from sqlalchemy.exc import DataError, IntegrityError
+from app.models import InterviewHistory, InterviewSessions
+from app.database import engine
+from app.metrics import increment, observe, register_gauge
 from datetime import datetime
 
-def record_interview_history(session_id, user_id, question, answer, score, feedback, timer, interview_round, job_title, job_level, company_name, company_industry, question_id=None):
-    interview_entry = InterviewHistory(
-        session_id=session_id,
-        user_id=user_id,
-        created_at=datetime.utcnow(),
-        updated_at=datetime.utcnow(),  # Manually set updated_at
-        job_title=job_title,
-        job_level=job_level,
-        company_name=company_name,
-        company_industry=company_industry,
-        question=question,
-        question_id=question_id if question_id is not None else None,
-        answer=answer,
-        feedback=feedback,
-        score=score,
-        timer=timer,
-        interview_round=interview_round
+logger = logging.getLogger(__name__)
+
+# History rows are buffered per process and written in one multi-row insert
+HISTORY_FLUSH_SIZE = int(os.getenv('HISTORY_FLUSH_SIZE', '50'))
+HISTORY_FLUSH_INTERVAL = float(os.getenv('HISTORY_FLUSH_INTERVAL', '1.0'))
+# Rows kept for a retry while the database is unreachable; the oldest are dropped beyond this
+HISTORY_MAX_BUFFER = int(os.getenv('HISTORY_MAX_BUFFER', '5000'))
+
+def _score(value):
+    # Scores supplied by the client arrive as form strings
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        return None
+
+def session_aggregates(rows):
+    # Folds a batch into one delta per session, since an upsert can only touch each session once
+    aggregates = {}
+    for row in rows:
+        key = (int(row['user_id']), int(row['session_id']))
+        aggregate = aggregates.get(key)
+        if aggregate is None:
+            aggregate = aggregates[key] = {
+                'user_id': key[0],
+                'session_id': key[1],
+                'interview_round': row['interview_round'],
+                'started_at': row['created_at'],
+                'score_count': 0,
+                'score_sum': 0,
+                'score_min': None,
+                'score_max': None,
+                'top_score_question_id': None,
+                'top_score_question': None,
+                'low_score_question_id': None,
+                'low_score_question': None,
+            }
+
+        score = _score(row['score'])
+        if score is None:
+            continue
+        aggregate['score_count'] += 1
+        aggregate['score_sum'] += score
+        # Ties keep the earlier question
+        if aggregate['score_max'] is None or score > aggregate['score_max']:
+            aggregate['score_max'] = score
+            aggregate['top_score_question_id'] = row['question_id']
+            aggregate['top_score_question'] = row['question']
+        if aggregate['score_min'] is None or score < aggregate['score_min']:
+            aggregate['score_min'] = score
+            aggregate['low_score_question_id'] = row['question_id']
+            aggregate['low_score_question'] = row['question']
+    return list(aggregates.values())
+
+def _update_session_aggregates(connection, rows):
+    table = InterviewSessions.__table__
+    statement = upsert(table).values(session_aggregates(rows))
+    new = statement.excluded
+    higher = or_(table.c.score_max.is_(None), new.score_max > table.c.score_max)
+    lower = or_(table.c.score_min.is_(None), new.score_min < table.c.score_min)
+    statement = statement.on_conflict_do_update(
+        index_elements=[table.c.user_id, table.c.session_id],
+        set_={
+            'score_count': table.c.score_count + new.score_count,
+            'score_sum': table.c.score_sum + new.score_sum,
+            # LEAST and GREATEST skip NULLs, so a batch without scores leaves them unchanged
+            'score_min': func.least(table.c.score_min, new.score_min),
+            'score_max': func.greatest(table.c.score_max, new.score_max),
+            'top_score_question_id': case((higher, new.top_score_question_id), else_=table.c.top_score_question_id),
+            'top_score_question': case((higher, new.top_score_question), else_=table.c.top_score_question),
+            'low_score_question_id': case((lower, new.low_score_question_id), else_=table.c.low_score_question_id),
+            'low_score_question': case((lower, new.low_score_question), else_=table.c.low_score_question),
+            'updated_at': func.now(),
+        },
     )
-    db_session.add(interview_entry)
-    db_session.commit()
-    return interview_entry.id
\ No newline at end of file
+    connection.execute(statement)
+
+class InterviewHistoryWriter:
+    def __init__(self, flush_size, flush_interval, max_buffer):
+        self.flush_size = flush_size
+        self.flush_interval = flush_interval
+        self.max_buffer = max_buffer
+        self._rows = []
+        self._oldest = None
+        self._condition = threading.Condition()
+        # Only one flush writes at a time, so rows reach the table in the order they were recorded
+        self._flush_lock = threading.Lock()
+        self._thread = None
+
+    def queue_depth(self):
+        return len(self._rows)
+
+    def add(self, row):
+        with self._condition:
+            if self._thread is None:
+                # Started on first use, so it runs in the worker process rather than a pre-fork parent
+                self._thread = threading.Thread(target=self._run, name='history-writer', daemon=True)
+                self._thread.start()
+            if not self._rows:
+                self._oldest = time.monotonic()
+            self._rows.append(row)
+            if len(self._rows) >= self.flush_size:
+                self._condition.notify()
+
+    def _run(self):
+        while True:
+            with self._condition:
+                while not self._rows:
+                    self._condition.wait()
+                remaining = self.flush_interval - (time.monotonic() - self._oldest)
+                if len(self._rows) < self.flush_size and remaining > 0:
+                    self._condition.wait(remaining)
+            try:
+                flushed = self.flush()
+            except Exception as e:
+                logger.error(f"Unexpected error flushing interview history: {e}")
+                flushed = None
+            if flushed is None:
+                # The database is unavailable; give it an interval before the next attempt
+                time.sleep(self.flush_interval)
+
+    def _take(self):
+        with self._condition:
+            rows, self._rows = self._rows, []
+            return rows
+
+    def _requeue(self, rows):
+        with self._condition:
+            self._rows = rows + self._rows
+            dropped = len(self._rows) - self.max_buffer
+            if dropped > 0:
+                del self._rows[:dropped]
+                increment('interview_history.dropped_rows', dropped)
+                logger.error(f"Dropped {dropped} interview history rows while the database was unavailable")
+            self._oldest = time.monotonic()
+
+    def flush(self):
+        with self._flush_lock:
+            rows = self._take()
+            if not rows:
+                return 0
+
+            start = time.perf_counter()
+            try:
+                # The session aggregate is updated in the same transaction as the rows it counts
+                with engine.begin() as connection:
+                    connection.execute(insert(InterviewHistory.__table__).values(rows))
+                    _update_session_aggregates(connection, rows)
+            except (IntegrityError, DataError) as e:
+                # One bad row must not lose the rest of the batch
+                logger.error(f"Batched interview history insert failed, retrying row by row: {e}")
+                if not self._insert_one_by_one(rows):
+                    return None
+            except Exception as e:
+                # The rows were already taken from the buffer, so any failure puts them back
+                self._flush_failed(rows, e)
+                return None
+            finally:
+                observe('interview_history.flush_seconds', time.perf_counter() - start)
+
+            observe('interview_history.flush_rows', len(rows))
+            return len(rows)
+
+    def _flush_failed(self, rows, error):
+        logger.error(f"Interview history flush failed, keeping {len(rows)} rows for the next flush: {error}")
+        increment('interview_history.flush_failures')
+        self._requeue(rows)
+
+    def _insert_one_by_one(self, rows):
+        # Only a row the database rejects is dropped. Any other failure keeps it and the rows after it
+        # for the next flush; returns False in that case.
+        for position, row in enumerate(rows):
+            try:
+                with engine.begin() as connection:
+                    connection.execute(insert(InterviewHistory.__table__).values(row))
+                    _update_session_aggregates(connection, [row])
+            except (IntegrityError, DataError) as e:
+                increment('interview_history.rejected_rows')
+                logger.error(f"Error recording interview history for session {row['session_id']}: {e}")
+            except Exception as e:
+                self._flush_failed(rows[position:], e)
+                return False
+        return True
+
+history_writer = InterviewHistoryWriter(HISTORY_FLUSH_SIZE, HISTORY_FLUSH_INTERVAL, HISTORY_MAX_BUFFER)
+
+register_gauge('interview_history.queue_depth', history_writer.queue_depth)
+
+# Write whatever is still buffered when the worker shuts down
+atexit.register(history_writer.flush)
+
+def record_interview_history(session_id, user_id, question, answer, score, feedback, timer, interview_round, job_title, job_level, company_name, company_industry, question_id=None, flush=False):
+    # Buffered; pass flush=True at the end of an interview so every row is stored before the response
+    now = datetime.utcnow()
+    history_writer.add({
+        'session_id': session_id,
+        'user_id': user_id,
+        'created_at': now,
+        'updated_at': now,  # Manually set updated_at
+        'job_title': job_title,
+        'job_level': job_level,
+        'company_name': company_name,
+        'company_industry': company_industry,
+        'question': question,
+        'question_id': question_id if question_id is not None else None,
+        'answer': answer,
+        'feedback': feedback,
+        'score': score,
+        'timer': timer,
+        'interview_round': interview_round,
+    })
+    if flush:
+        history_writer.flush()
+
+def flush_interview_history():
+    return history_writer.flush()
@@ -0,0 +1,270 @@
+import os
+import json
+import time
+import random
+import asyncio
+import threading
+import logging
+from collections import OrderedDict
+from sqlalchemy import create_engine, delete, insert, select, update
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.ext.asyncio import create_async_engine
+from app.database import engine
+from app.async_database import get_async_engine, async_database_url
+from app.models import InterviewState
+from app.metrics import increment, register_gauge
+
+logger = logging.getLogger(__name__)
+
+# Per-interview progress (the previous question and answer, the timer) kept on the server, keyed by session_id.
+# 'memory' only works with a single worker; 'sql' and 'redis' let any worker or node serve any turn.
+INTERVIEW_STATE_BACKEND = os.getenv('INTERVIEW_STATE_BACKEND', 'sql')
+# Optional separate database for the sql backend, e.g. sqlite:////tmp/interview_state.db; defaults to the app database
+INTERVIEW_STATE_DATABASE_URL = os.getenv('INTERVIEW_STATE_DATABASE_URL')
+INTERVIEW_STATE_REDIS_URL = os.getenv('INTERVIEW_STATE_REDIS_URL', 'redis://localhost:6379/0')
+INTERVIEW_STATE_TTL = int(os.getenv('INTERVIEW_STATE_TTL', str(24 * 3600)))
+INTERVIEW_STATE_MAX_SESSIONS = int(os.getenv('INTERVIEW_STATE_MAX_SESSIONS', '5000'))
+# Attempts at a read-modify-write before a concurrent update wins
+INTERVIEW_STATE_MAX_RETRIES = int(os.getenv('INTERVIEW_STATE_MAX_RETRIES', '5'))
+# Each worker deletes expired sessions about this often, in the background
+INTERVIEW_STATE_EXPIRE_INTERVAL = int(os.getenv('INTERVIEW_STATE_EXPIRE_INTERVAL', '600'))
+
+class StateConflict(Exception):
+    pass
+
+# Every backend stores (version, state) and offers compare-and-set on the version, with
+# aget and acompare_and_set for the ASGI handlers. Version 0 means the session has no state yet.
+
+class MemoryStateBackend:
+    def __init__(self, ttl, max_sessions):
+        self.ttl = ttl
+        self.max_sessions = max_sessions
+        self._lock = threading.Lock()
+        # session_id -> (version, state, updated_at)
+        self._states = OrderedDict()
+
+    def __len__(self):
+        return len(self._states)
+
+    def get(self, session_id):
+        with self._lock:
+            entry = self._states.get(session_id)
+            if entry is None or time.monotonic() - entry[2] > self.ttl:
+                return 0, None
+            return entry[0], entry[1]
+
+    def compare_and_set(self, session_id, version, state):
+        with self._lock:
+            entry = self._states.get(session_id)
+            current = entry[0] if entry and time.monotonic() - entry[2] <= self.ttl else 0
+            if current != version:
+                return False
+            self._states[session_id] = (version + 1, state, time.monotonic())
+            self._states.move_to_end(session_id)
+            while len(self._states) > self.max_sessions:
+                self._states.popitem(last=False)
+            return True
+
+    def expire(self):
+        with self._lock:
+            now = time.monotonic()
+            for session_id in [key for key, entry in self._states.items() if now - entry[2] > self.ttl]:
+                del self._states[session_id]
+
+    # Nothing here waits on I/O, so the event loop calls straight through
+    async def aget(self, session_id):
+        return self.get(session_id)
+
+    async def acompare_and_set(self, session_id, version, state):
+        return self.compare_and_set(session_id, version, state)
+
+class SQLStateBackend:
+    # Works on Postgres and SQLite; the version column makes every write a conditional update
+    def __init__(self, state_engine, ttl, async_engine_factory=None):
+        self.engine = state_engine
+        self.ttl = ttl
+        self.table = InterviewState.__table__
+        self._async_engine_factory = async_engine_factory
+        self._async_engine = None
+
+    @property
+    def async_engine(self):
+        # Only built once an ASGI handler uses it; a separate state database gets its own async pool
+        if self._async_engine is None:
+            if self._async_engine_factory is not None:
+                self._async_engine = self._async_engine_factory()
+            else:
+                self._async_engine = create_async_engine(async_database_url(self.engine.url))
+        return self._async_engine
+
+    def _select(self, session_id):
+        return select(self.table.c.version, self.table.c.state).where(self.table.c.session_id == session_id)
+
+    def _row_state(self, row):
+        if row is None:
+            return 0, None
+        return row.version, json.loads(row.state)
+
+    def _insert(self, session_id, state):
+        return insert(self.table).values(session_id=session_id, version=1, state=json.dumps(state), updated_at=time.time())
+
+    def _update(self, session_id, version, state):
+        return (update(self.table)
+                .where(self.table.c.session_id == session_id, self.table.c.version == version)
+                .values(version=version + 1, state=json.dumps(state), updated_at=time.time()))
+
+    def get(self, session_id):
+        with self.engine.connect() as connection:
+            return self._row_state(connection.execute(self._select(session_id)).first())
+
+    def compare_and_set(self, session_id, version, state):
+        with self.engine.begin() as connection:
+            if version == 0:
+                try:
+                    connection.execute(self._insert(session_id, state))
+                except IntegrityError:
+                    return False
+                return True
+            return connection.execute(self._update(session_id, version, state)).rowcount == 1
+
+    async def aget(self, session_id):
+        async with self.async_engine.connect() as connection:
+            return self._row_state((await connection.execute(self._select(session_id))).first())
+
+    async def acompare_and_set(self, session_id, version, state):
+        try:
+            async with self.async_engine.begin() as connection:
+                if version == 0:
+                    await connection.execute(self._insert(session_id, state))
+                    return True
+                return (await connection.execute(self._update(session_id, version, state))).rowcount == 1
+        except IntegrityError:
+            return False
+
+    def expire(self):
+        with self.engine.begin() as connection:
+            connection.execute(delete(self.table).where(self.table.c.updated_at < time.time() - self.ttl))
+
+class RedisStateBackend:
+    # Any server that speaks the Redis protocol; versions are checked with WATCH/MULTI
+    def __init__(self, url, ttl):
+        import redis
+        self._redis = redis
+        self.client = redis.Redis.from_url(url)
+        self.ttl = ttl
+
+    def _key(self, session_id):
+        return f"interview_state:{session_id}"
+
+    def get(self, session_id):
+        value = self.client.get(self._key(session_id))
+        if value is None:
+            return 0, None
+        entry = json.loads(value)
+        return entry['version'], entry['state']
+
+    def compare_and_set(self, session_id, version, state):
+        key = self._key(session_id)
+        with self.client.pipeline() as pipe:
+            try:
+                pipe.watch(key)
+                value = pipe.get(key)
+                current = json.loads(value)['version'] if value is not None else 0
+                if current != version:
+                    return False
+                pipe.multi()
+                pipe.set(key, json.dumps({'version': version + 1, 'state': state}), ex=self.ttl)
+                pipe.execute()
+                return True
+            except self._redis.WatchError:
+                return False
+
+    def expire(self):
+        # Keys carry their own TTL
+        pass
+
+    # WATCH/MULTI holds a pipeline connection across calls, so the blocking client runs on a thread
+    async def aget(self, session_id):
+        return await asyncio.to_thread(self.get, session_id)
+
+    async def acompare_and_set(self, session_id, version, state):
+        return await asyncio.to_thread(self.compare_and_set, session_id, version, state)
+
+def create_state_backend(name):
+    if name == 'memory':
+        return MemoryStateBackend(INTERVIEW_STATE_TTL, INTERVIEW_STATE_MAX_SESSIONS)
+    if name == 'redis':
+        return RedisStateBackend(INTERVIEW_STATE_REDIS_URL, INTERVIEW_STATE_TTL)
+    if name == 'sql':
+        if INTERVIEW_STATE_DATABASE_URL:
+            state_engine = create_engine(INTERVIEW_STATE_DATABASE_URL, pool_pre_ping=True)
+            InterviewState.__table__.create(state_engine, checkfirst=True)
+            return SQLStateBackend(state_engine, INTERVIEW_STATE_TTL)
+        return SQLStateBackend(engine, INTERVIEW_STATE_TTL, get_async_engine)
+    raise ValueError(f"Unknown INTERVIEW_STATE_BACKEND: {name}")
+
+state_backend = create_state_backend(INTERVIEW_STATE_BACKEND)
+
+if isinstance(state_backend, MemoryStateBackend):
+    register_gauge('interview_state.sessions', lambda: len(state_backend))
+
+def get_interview_state(session_id):
+    _, state = state_backend.get(int(session_id))
+    return state or {}
+
+async def aget_interview_state(session_id):
+    _, state = await state_backend.aget(int(session_id))
+    return state or {}
+
+def update_interview_state(session_id, **changes):
+    # Read-modify-write with optimistic versioning; retried when another worker wrote in between
+    session_id = int(session_id)
+    for _ in range(INTERVIEW_STATE_MAX_RETRIES):
+        version, state = state_backend.get(session_id)
+        state = dict(state or {}, **changes)
+        if state_backend.compare_and_set(session_id, version, state):
+            return state
+        increment('interview_state.conflicts')
+    raise StateConflict(f"Interview state for session {session_id} kept changing")
+
+async def aupdate_interview_state(session_id, **changes):
+    session_id = int(session_id)
+    for _ in range(INTERVIEW_STATE_MAX_RETRIES):
+        version, state = await state_backend.aget(session_id)
+        state = dict(state or {}, **changes)
+        if await state_backend.acompare_and_set(session_id, version, state):
+            return state
+        increment('interview_state.conflicts')
+    raise StateConflict(f"Interview state for session {session_id} kept changing")
+
+_expiry_lock = threading.Lock()
+_expiry_thread = None
+
+def _expire_periodically():
+    while True:
+        # Jittered, so the workers do not all scan the table at once
+        time.sleep(INTERVIEW_STATE_EXPIRE_INTERVAL * random.uniform(0.5, 1.5))
+        try:
+            state_backend.expire()
+        except Exception as e:
+            logger.error(f"Error expiring interview state: {e}")
+
+def _ensure_expiry_thread():
+    global _expiry_thread
+    with _expiry_lock:
+        if _expiry_thread is None:
+            # Started on first use, so it runs in the worker process rather than a pre-fork parent
+            _expiry_thread = threading.Thread(target=_expire_periodically, name='interview-state-expiry', daemon=True)
+            _expiry_thread.start()
+
+def start_interview_state(session_id, **state):
+    # A new interview replaces whatever this session id held before; no old key is carried forward
+    _ensure_expiry_thread()
+    session_id = int(session_id)
+    state = dict(state, most_recent_question=None, most_recent_answer=None)
+    for _ in range(INTERVIEW_STATE_MAX_RETRIES):
+        version, _ = state_backend.get(session_id)
+        if state_backend.compare_and_set(session_id, version, state):
+            return state
+        increment('interview_state.conflicts')
+    raise StateConflict(f"Interview state for session {session_id} kept changing")
@@ -0,0 +1,189 @@
+import os
+import hashlib
+import threading
+import logging
+from collections import OrderedDict
+from datetime import datetime, timedelta, timezone
+from sqlalchemy import delete, select
+from sqlalchemy.dialects.postgresql import insert
+from app.database import engine
+from app.async_database import get_async_engine
+from app.models import LLMCache
+from app.metrics import increment, register_gauge
+
+logger = logging.getLogger(__name__)
+
+# Prompt types whose responses are cached; each one must be built only from stored rows
+LLM_CACHE_PROMPT_TYPES = {prompt_type.strip() for prompt_type in os.getenv('LLM_CACHE_PROMPT_TYPES', 'technical_skill_question,soft_skill_question,project_question').split(',') if prompt_type.strip()}
+LLM_CACHE_TTL = int(os.getenv('LLM_CACHE_TTL', str(7 * 24 * 3600)))
+# Upper bound on responses held in memory by one process, in front of the llm_cache table
+LLM_CACHE_LRU_SIZE = int(os.getenv('LLM_CACHE_LRU_SIZE', '1000'))
+
+def normalize_prompt(text):
+    # Whitespace differences between renders do not change what the model is asked
+    return ' '.join(text.split())
+
+def llm_cache_key(model_name, temperature, prompt_text):
+    digest = hashlib.sha256()
+    for part in (model_name, f"{temperature:.3f}", normalize_prompt(prompt_text)):
+        digest.update(part.encode('utf-8'))
+        digest.update(b'\0')
+    return digest.hexdigest()
+
+class LLMResponseCache:
+    # Keys hash the rendered prompt, which includes every resume and job field it uses,
+    # so an edited row produces a new key. invalidate_user drops the old responses early.
+    def __init__(self, ttl, max_entries):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self._lock = threading.Lock()
+        # cache_key -> (response, user_id, expires_at)
+        self._entries = OrderedDict()
+
+    def __len__(self):
+        return len(self._entries)
+
+    def _remember(self, key, response, user_id, expires_at):
+        with self._lock:
+            self._entries[key] = (response, user_id, expires_at)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def _memory_get(self, key, now):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[2] > now:
+                self._entries.move_to_end(key)
+            elif entry is not None:
+                del self._entries[key]
+                entry = None
+        if entry is not None:
+            increment('llm_cache.hits.memory')
+            return entry[0]
+        return None
+
+    def _database_hit(self, key, row):
+        if row is None:
+            increment('llm_cache.misses')
+            return None
+        increment('llm_cache.hits.database')
+        self._remember(key, row.response, row.user_id, row.expires_at)
+        return row.response
+
+    def _select(self, key, now):
+        return (select(LLMCache.response, LLMCache.user_id, LLMCache.expires_at)
+                .where(LLMCache.cache_key == key, LLMCache.expires_at > now))
+
+    def get(self, key):
+        now = datetime.now(timezone.utc)
+        cached = self._memory_get(key, now)
+        if cached is not None:
+            return cached
+
+        try:
+            with engine.connect() as connection:
+                row = connection.execute(self._select(key, now)).first()
+        except Exception as e:
+            logger.error(f"Error reading the LLM cache: {e}")
+            row = None
+        return self._database_hit(key, row)
+
+    async def aget(self, key):
+        now = datetime.now(timezone.utc)
+        cached = self._memory_get(key, now)
+        if cached is not None:
+            return cached
+
+        try:
+            async with get_async_engine().connect() as connection:
+                row = (await connection.execute(self._select(key, now))).first()
+        except Exception as e:
+            logger.error(f"Error reading the LLM cache: {e}")
+            row = None
+        return self._database_hit(key, row)
+
+    def _put_statements(self, key, prompt_type, response, user_id):
+        expires_at = datetime.now(timezone.utc) + timedelta(seconds=self.ttl)
+        self._remember(key, response, user_id, expires_at)
+
+        statement = insert(LLMCache).values(cache_key=key, prompt_type=prompt_type, user_id=user_id, response=response, expires_at=expires_at)
+        statement = statement.on_conflict_do_update(
+            index_elements=[LLMCache.cache_key],
+            set_={'response': statement.excluded.response, 'user_id': statement.excluded.user_id, 'expires_at': statement.excluded.expires_at},
+        )
+        return statement, delete(LLMCache).where(LLMCache.expires_at <= datetime.now(timezone.utc))
+
+    def put(self, key, prompt_type, response, user_id=None):
+        try:
+            # Own transaction, so caching never commits or rolls back the caller's session
+            with engine.begin() as connection:
+                for statement in self._put_statements(key, prompt_type, response, user_id):
+                    connection.execute(statement)
+        except Exception as e:
+            logger.error(f"Error writing the LLM cache: {e}")
+            increment('llm_cache.write_failures')
+
+    async def aput(self, key, prompt_type, response, user_id=None):
+        try:
+            async with get_async_engine().begin() as connection:
+                for statement in self._put_statements(key, prompt_type, response, user_id):
+                    await connection.execute(statement)
+        except Exception as e:
+            logger.error(f"Error writing the LLM cache: {e}")
+            increment('llm_cache.write_failures')
+
+    def invalidate_user(self, user_id):
+        user_id = int(user_id)
+        with self._lock:
+            stale_keys = [key for key, entry in self._entries.items() if entry[1] == user_id]
+            for key in stale_keys:
+                del self._entries[key]
+
+        try:
+            with engine.begin() as connection:
+                deleted = connection.execute(delete(LLMCache).where(LLMCache.user_id == user_id)).rowcount
+        except Exception as e:
+            logger.error(f"Error invalidating the LLM cache for user {user_id}: {e}")
+            deleted = 0
+
+        increment('llm_cache.invalidations', deleted)
+        return deleted
+
+llm_response_cache = LLMResponseCache(LLM_CACHE_TTL, LLM_CACHE_LRU_SIZE)
+
+register_gauge('llm_cache.memory_entries', lambda: len(llm_response_cache))
+
+def invoke_cached(prompt_value, llm, prompt_type, user_id=None):
+    # Returns the response text for a rendered prompt, asking the model only on a miss
+    if prompt_type not in LLM_CACHE_PROMPT_TYPES:
+        response = llm.invoke(prompt_value)
+        return response.content.strip() if response.content else ""
+
+    key = llm_cache_key(llm.model_name, llm.temperature, prompt_value.to_string())
+    cached = llm_response_cache.get(key)
+    if cached is not None:
+        return cached
+
+    response = llm.invoke(prompt_value)
+    content = response.content.strip() if response.content else ""
+    if content:
+        llm_response_cache.put(key, prompt_type, content, user_id)
+    return content
+
+async def ainvoke_cached(prompt_value, llm, prompt_type, user_id=None):
+    # invoke_cached for the ASGI handlers
+    if prompt_type not in LLM_CACHE_PROMPT_TYPES:
+        response = await llm.ainvoke(prompt_value)
+        return response.content.strip() if response.content else ""
+
+    key = llm_cache_key(llm.model_name, llm.temperature, prompt_value.to_string())
+    cached = await llm_response_cache.aget(key)
+    if cached is not None:
+        return cached
+
+    response = await llm.ainvoke(prompt_value)
+    content = response.content.strip() if response.content else ""
+    if content:
+        await llm_response_cache.aput(key, prompt_type, content, user_id)
+    return content
@@ -0,0 +1,156 @@
+import os
+import time
+import queue
+import threading
+import logging
+import multiprocessing
+from concurrent.futures import Future, ProcessPoolExecutor
+from app.metrics import increment, observe, register_gauge
+
+logger = logging.getLogger(__name__)
+
+# Local Whisper inference, used when TRANSCRIPTION_BACKEND=local
+WHISPER_MODEL_SIZE = os.getenv('WHISPER_MODEL_SIZE', 'base')
+WHISPER_WORKERS = int(os.getenv('WHISPER_WORKERS', '1'))
+WHISPER_LANGUAGE = os.getenv('WHISPER_LANGUAGE', 'en') or None
+# Short utterances that arrive within this window share one decode pass
+WHISPER_MAX_BATCH = int(os.getenv('WHISPER_MAX_BATCH', '8'))
+WHISPER_BATCH_WINDOW = float(os.getenv('WHISPER_BATCH_WINDOW_MS', '50')) / 1000
+WHISPER_TIMEOUT = float(os.getenv('WHISPER_TIMEOUT', '120'))
+
+WHISPER_SAMPLE_RATE = 16000
+# Whisper decodes 30 second windows; anything longer goes through model.transcribe on its own
+WHISPER_WINDOW_SAMPLES = 30 * WHISPER_SAMPLE_RATE
+
+# Set in each worker process by _load_worker_model
+_worker_model = None
+
+def _load_worker_model(model_size):
+    global _worker_model
+    import whisper
+    _worker_model = whisper.load_model(model_size)
+
+def _worker_ready():
+    return _worker_model is not None
+
+def _transcribe_batch(audios):
+    # Runs in a worker: pads each utterance to one window and decodes them as a single batch
+    import torch
+    import whisper
+
+    model = _worker_model
+    mels = torch.stack([
+        whisper.log_mel_spectrogram(whisper.pad_or_trim(torch.from_numpy(audio)), model.dims.n_mels)
+        for audio in audios
+    ]).to(model.device)
+    options = whisper.DecodingOptions(language=WHISPER_LANGUAGE, without_timestamps=True, fp16=model.device.type == 'cuda')
+    results = whisper.decode(model, mels, options)
+    return [result.text.strip() for result in results]
+
+def _transcribe_long(audio):
+    model = _worker_model
+    result = model.transcribe(audio, language=WHISPER_LANGUAGE, fp16=model.device.type == 'cuda')
+    return [result['text'].strip()]
+
+class LocalWhisperEngine:
+    # Process pool with one preloaded model per worker, fed by a dispatcher thread that batches short utterances
+    def __init__(self, model_size, workers, max_batch, batch_window):
+        self.max_batch = max_batch
+        self.batch_window = batch_window
+        self._queue = queue.Queue()
+        self._in_flight = 0
+        self._in_flight_lock = threading.Lock()
+        # One batch per worker at a time; while every worker is busy new requests queue up and form a bigger batch
+        self._free_workers = threading.Semaphore(workers)
+        # Fork before the app starts its own threads, so workers do not re-import the Flask app
+        self._pool = ProcessPoolExecutor(
+            max_workers=workers,
+            mp_context=multiprocessing.get_context('fork'),
+            initializer=_load_worker_model,
+            initargs=(model_size,),
+        )
+        # Start every worker now so the model load happens at startup rather than on the first answer
+        for ready in [self._pool.submit(_worker_ready) for _ in range(workers)]:
+            ready.result()
+        threading.Thread(target=self._dispatch, name='whisper-dispatch', daemon=True).start()
+        logger.info(f"Loaded Whisper {model_size} model in {workers} worker processes")
+
+    def queue_depth(self):
+        return self._queue.qsize() + self._in_flight
+
+    def submit(self, audio):
+        # audio is a float32 numpy array sampled at 16 kHz
+        future = Future()
+        self._queue.put((audio, future))
+        return future
+
+    def _dispatch(self):
+        while True:
+            self._free_workers.acquire()
+            batch = [self._queue.get()]
+
+            if len(batch[0][0]) <= WHISPER_WINDOW_SAMPLES:
+                deadline = time.monotonic() + self.batch_window
+                while len(batch) < self.max_batch:
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        break
+                    try:
+                        item = self._queue.get(timeout=remaining)
+                    except queue.Empty:
+                        break
+                    if len(item[0]) > WHISPER_WINDOW_SAMPLES:
+                        # Long answers are never padded into a batch; put it back for the next pass
+                        self._queue.put(item)
+                        break
+                    batch.append(item)
+
+            self._run(batch)
+
+    def _run(self, batch):
+        audios = [audio for audio, _ in batch]
+        futures = [future for _, future in batch]
+        function = _transcribe_long if len(audios[0]) > WHISPER_WINDOW_SAMPLES else _transcribe_batch
+        payload = audios[0] if function is _transcribe_long else audios
+
+        with self._in_flight_lock:
+            self._in_flight += len(batch)
+        observe('transcription.local.batch_size', len(batch))
+        start = time.perf_counter()
+
+        def complete(pool_future):
+            self._free_workers.release()
+            with self._in_flight_lock:
+                self._in_flight -= len(batch)
+            observe('transcription.local.batch_seconds', time.perf_counter() - start)
+            try:
+                texts = pool_future.result()
+            except Exception as e:
+                increment('transcription.local.failures', len(batch))
+                for future in futures:
+                    future.set_exception(e)
+                return
+            for future, text in zip(futures, texts):
+                future.set_result(text)
+
+        try:
+            self._pool.submit(function, payload).add_done_callback(complete)
+        except Exception as e:
+            self._free_workers.release()
+            with self._in_flight_lock:
+                self._in_flight -= len(batch)
+            for future in futures:
+                future.set_exception(e)
+
+_engine = None
+
+def start_local_transcription():
+    global _engine
+    if _engine is None:
+        _engine = LocalWhisperEngine(WHISPER_MODEL_SIZE, WHISPER_WORKERS, WHISPER_MAX_BATCH, WHISPER_BATCH_WINDOW)
+    return _engine
+
+register_gauge('transcription.local.queue_depth', lambda: _engine.queue_depth() if _engine else 0)
+
+def transcribe_locally(audio):
+    return start_local_transcription().submit(audio).result(timeout=WHISPER_TIMEOUT)
@@ -0,0 +1,128 @@
+import os
+import asyncio
+import threading
+import logging
+from collections import OrderedDict
+from concurrent.futures import Future
+from app.utils.executor_utils import submit_llm_task
+from app.utils.interview_state_utils import update_interview_state, aupdate_interview_state
+from app.metrics import increment, register_gauge
+
+logger = logging.getLogger(__name__)
+
+# Upper bound on interviews holding a speculative question at the same time
+PREFETCH_MAX_SESSIONS = int(os.getenv('PREFETCH_MAX_SESSIONS', '1000'))
+
+_lock = threading.Lock()
+# session_id -> (question_num, context version, future)
+_prefetched = OrderedDict()
+
+register_gauge('prefetch.pending', lambda: len(_prefetched))
+
+# A finished prefetch is also written to the interview state under 'prefetched', so the next
+# turn can take it on whichever worker serves it. It is only used for the same question number
+# and the same context version it was generated from.
+
+def _shared_entry(question_num, context, result):
+    question, question_id = result
+    return {'question_num': str(question_num), 'context_version': context.version, 'question': question, 'question_id': question_id}
+
+def prefetch_question(session_id, question_num, question_function, context):
+    # Start generating question N+1 while the candidate is still answering question N
+    def generate():
+        result = question_function(context)
+        try:
+            update_interview_state(session_id, prefetched=_shared_entry(question_num, context, result))
+        except Exception as e:
+            logger.error(f"Error sharing prefetched question {question_num} for session {session_id}: {e}")
+        return result
+
+    return _remember_prefetch(session_id, question_num, context, submit_llm_task(generate))
+
+def prefetch_question_async(session_id, question_num, question_coroutine, context):
+    # prefetch_question for the ASGI handlers: the question is generated by a task on the running loop.
+    # Its concurrent future works with the same registry, so either kind of handler can take it.
+    async def generate():
+        result = await question_coroutine(context)
+        try:
+            await aupdate_interview_state(session_id, prefetched=_shared_entry(question_num, context, result))
+        except Exception as e:
+            logger.error(f"Error sharing prefetched question {question_num} for session {session_id}: {e}")
+        return result
+
+    future = asyncio.run_coroutine_threadsafe(generate(), asyncio.get_running_loop())
+    return _remember_prefetch(session_id, question_num, context, future)
+
+def _remember_prefetch(session_id, question_num, context, future):
+    key = str(session_id)
+    evicted = []
+    with _lock:
+        previous = _prefetched.pop(key, None)
+        if previous:
+            evicted.append(previous[2])
+        _prefetched[key] = (str(question_num), context.version, future)
+        while len(_prefetched) > PREFETCH_MAX_SESSIONS:
+            _, (_, _, oldest_future) = _prefetched.popitem(last=False)
+            evicted.append(oldest_future)
+
+    for old_future in evicted:
+        old_future.cancel()
+
+    increment('prefetch.scheduled')
+    logger.debug(f"Prefetching question {question_num} for session {session_id}")
+    return future
+
+def _take_local(session_id, question_num, context):
+    key = str(session_id)
+    with _lock:
+        entry = _prefetched.get(key)
+        if entry and entry[0] == str(question_num):
+            _prefetched.pop(key)
+        else:
+            return None
+
+    future = entry[2]
+    if entry[1] != context.version:
+        # Generated from fields that have since changed
+        future.cancel()
+        increment('prefetch.stale')
+        return None
+    if future.cancelled() or (future.done() and future.exception() is not None):
+        return None
+    return future
+
+def _take_shared(question_num, context, state):
+    entry = (state or {}).get('prefetched')
+    if not entry or entry.get('question_num') != str(question_num):
+        return None
+    if entry.get('context_version') != context.version:
+        increment('prefetch.stale')
+        return None
+    future = Future()
+    future.set_result((entry['question'], entry.get('question_id')))
+    return future
+
+def take_prefetched_question(session_id, question_num, context, state=None):
+    # Returns the future for a matching prefetch, or None when the caller must generate inline.
+    # A prefetch started by this process is preferred; otherwise one another worker finished and
+    # wrote to the interview state the caller read.
+    future = _take_local(session_id, question_num, context)
+    if future is not None:
+        increment('prefetch.hits')
+        return future
+
+    future = _take_shared(question_num, context, state)
+    if future is not None:
+        increment('prefetch.hits.shared')
+        return future
+
+    increment('prefetch.misses')
+    return None
+
+def cancel_prefetch(session_id):
+    with _lock:
+        entry = _prefetched.pop(str(session_id), None)
+
+    if entry:
+        entry[2].cancel()
+        increment('prefetch.cancelled')
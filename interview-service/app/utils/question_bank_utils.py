@@ -0,0 +1,233 @@
+import os
+import time
+import asyncio
+import random
+import threading
+import logging
+from array import array
+from sqlalchemy import insert, select, update
+from sqlalchemy.exc import IntegrityError
+from app.database import db_session, engine
+from app.async_database import async_session
+from app.models import Questions, SharedVersions
+from app.metrics import increment, register_gauge
+
+logger = logging.getLogger(__name__)
+
+# Pick up rows written since the last refresh at most this often
+QUESTION_BANK_REFRESH_SECONDS = int(os.getenv('QUESTION_BANK_REFRESH_SECONDS', '60'))
+# Full rebuild interval, which also drops rows deleted without a notification
+QUESTION_BANK_REBUILD_SECONDS = int(os.getenv('QUESTION_BANK_REBUILD_SECONDS', '3600'))
+# Check the shared question bank version this often; a change notified to any worker rebuilds every index
+QUESTION_BANK_VERSION_CHECK_SECONDS = int(os.getenv('QUESTION_BANK_VERSION_CHECK_SECONDS', '5'))
+
+versions_table = SharedVersions.__table__
+
+def question_bank_version():
+    # 0 until the first change is notified
+    with engine.connect() as connection:
+        return connection.execute(select(versions_table.c.version).where(versions_table.c.name == 'question_bank')).scalar() or 0
+
+def bump_question_bank_version():
+    with engine.begin() as connection:
+        bumped = connection.execute(update(versions_table).where(versions_table.c.name == 'question_bank')
+                                    .values(version=versions_table.c.version + 1, updated_at=time.time())).rowcount
+    if bumped:
+        return
+    try:
+        with engine.begin() as connection:
+            connection.execute(insert(versions_table).values(name='question_bank', version=1, updated_at=time.time()))
+    except IntegrityError:
+        # Another worker created the row first
+        bump_question_bank_version()
+
+class _IdGroup:
+    # Question ids of one group in a compact array, with swap-remove for O(1) deletes
+    __slots__ = ('ids', 'positions')
+
+    def __init__(self):
+        self.ids = array('l')
+        self.positions = {}
+
+    def add(self, question_id):
+        if question_id in self.positions:
+            return
+        self.positions[question_id] = len(self.ids)
+        self.ids.append(question_id)
+
+    def remove(self, question_id):
+        position = self.positions.pop(question_id, None)
+        if position is None:
+            return
+        last_id = self.ids.pop()
+        if last_id != question_id:
+            self.ids[position] = last_id
+            self.positions[last_id] = position
+
+    def sample(self):
+        if not self.ids:
+            return None
+        return self.ids[random.randrange(len(self.ids))]
+
+    def __len__(self):
+        return len(self.ids)
+
+class QuestionBankIndex:
+    # Process-level index of question ids grouped by question_type and job_title
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._type_codes = {}
+        self._title_codes = {None: 0}
+        # question id -> (type_code, title_code)
+        self._row_codes = {}
+        self._by_type = {}
+        self._by_type_and_title = {}
+        self._watermark = None
+        self._refreshed_at = 0.0
+        self._rebuilt_at = 0.0
+        self._version = None
+        self._version_checked_at = 0.0
+
+    def _code_for(self, codes, value):
+        if value not in codes:
+            codes[value] = len(codes)
+        return codes[value]
+
+    def _add(self, question_id, question_type, job_title):
+        self._remove(question_id)
+        type_code = self._code_for(self._type_codes, question_type)
+        title_code = self._code_for(self._title_codes, job_title.lower() if job_title else None)
+        self._row_codes[question_id] = (type_code, title_code)
+        self._by_type.setdefault(type_code, _IdGroup()).add(question_id)
+        self._by_type_and_title.setdefault((type_code, title_code), _IdGroup()).add(question_id)
+
+    def _remove(self, question_id):
+        codes = self._row_codes.pop(question_id, None)
+        if codes is None:
+            return
+        type_code, title_code = codes
+        self._by_type[type_code].remove(question_id)
+        self._by_type_and_title[(type_code, title_code)].remove(question_id)
+
+    def rebuild(self):
+        rows = db_session.query(Questions.id, Questions.question_type, Questions.job_title, Questions.updated_at).all()
+        with self._lock:
+            self._row_codes = {}
+            self._by_type = {}
+            self._by_type_and_title = {}
+            self._watermark = None
+            for question_id, question_type, job_title, updated_at in rows:
+                self._add(question_id, question_type, job_title)
+                if updated_at and (self._watermark is None or updated_at > self._watermark):
+                    self._watermark = updated_at
+            self._refreshed_at = self._rebuilt_at = time.monotonic()
+        increment('question_bank.rebuilds')
+        logger.debug(f"Question bank index rebuilt with {len(rows)} questions")
+
+    def refresh(self):
+        # Incremental refresh: only rows created or updated since the last watermark
+        query = db_session.query(Questions.id, Questions.question_type, Questions.job_title, Questions.updated_at)
+        if self._watermark is not None:
+            query = query.filter(Questions.updated_at > self._watermark)
+        rows = query.all()
+        with self._lock:
+            for question_id, question_type, job_title, updated_at in rows:
+                self._add(question_id, question_type, job_title)
+                if updated_at and (self._watermark is None or updated_at > self._watermark):
+                    self._watermark = updated_at
+            self._refreshed_at = time.monotonic()
+        increment('question_bank.refreshes')
+
+    def upsert(self, question_id):
+        row = db_session.query(Questions.id, Questions.question_type, Questions.job_title).filter_by(id=question_id).first()
+        with self._lock:
+            if row:
+                self._add(row.id, row.question_type, row.job_title)
+            else:
+                self._remove(int(question_id))
+
+    def remove(self, question_id):
+        with self._lock:
+            self._remove(int(question_id))
+
+    def is_stale(self):
+        now = time.monotonic()
+        return (now - self._rebuilt_at > QUESTION_BANK_REBUILD_SECONDS or now - self._refreshed_at > QUESTION_BANK_REFRESH_SECONDS
+                or now - self._version_checked_at > QUESTION_BANK_VERSION_CHECK_SECONDS)
+
+    def ensure_fresh(self):
+        now = time.monotonic()
+        if now - self._version_checked_at > QUESTION_BANK_VERSION_CHECK_SECONDS:
+            self._version_checked_at = now
+            version = question_bank_version()
+            if version != self._version:
+                # Recorded before the rebuild, so a change notified during it is picked up on the next check
+                self._version = version
+                self.rebuild()
+                return
+        if now - self._rebuilt_at > QUESTION_BANK_REBUILD_SECONDS:
+            self.rebuild()
+        elif now - self._refreshed_at > QUESTION_BANK_REFRESH_SECONDS:
+            self.refresh()
+
+    def sample(self, question_type, job_title=None):
+        # Never queries; callers run ensure_fresh first, on a thread when they are on the event loop
+        with self._lock:
+            type_code = self._type_codes.get(question_type)
+            if type_code is None:
+                return None
+            if job_title is None:
+                group = self._by_type.get(type_code)
+            else:
+                group = self._by_type_and_title.get((type_code, self._title_codes.get(job_title.lower())))
+            return group.sample() if group else None
+
+    def __len__(self):
+        return len(self._row_codes)
+
+question_bank = QuestionBankIndex()
+
+register_gauge('question_bank.size', lambda: len(question_bank))
+
+def get_question_bank_question(question_type, job_title=None):
+    # Constant-time sample from the index, then a primary key read for the text
+    question_bank.ensure_fresh()
+    for _ in range(3):
+        question_id = question_bank.sample(question_type, job_title)
+        if question_id is None:
+            break
+
+        question_data = db_session.get(Questions, question_id)
+        if question_data:
+            logger.debug(f"Selected question {question_data.id}: {question_data.question}")
+            return question_data.question, question_data.id
+
+        # The row was deleted since the index last saw it
+        question_bank.remove(question_id)
+
+    raise ValueError(f"No {question_type} found in the database.")
+
+def _refresh_index():
+    try:
+        question_bank.ensure_fresh()
+    finally:
+        db_session.remove()
+
+async def aget_question_bank_question(question_type, job_title=None):
+    # The occasional index refresh runs on a thread; the row read goes through the async engine
+    if question_bank.is_stale():
+        await asyncio.to_thread(_refresh_index)
+    for _ in range(3):
+        question_id = question_bank.sample(question_type, job_title)
+        if question_id is None:
+            break
+
+        async with async_session() as session:
+            question_data = await session.get(Questions, question_id)
+        if question_data:
+            logger.debug(f"Selected question {question_data.id}: {question_data.question}")
+            return question_data.question, question_data.id
+
+        question_bank.remove(question_id)
+
+    raise ValueError(f"No {question_type} found in the database.")
@@ -0,0 +1,432 @@
+import os
+import re
+import json
+import asyncio
+import logging
+from langchain_core.prompts import ChatPromptTemplate
+from app.database import db_session
+from app.async_database import async_session
+from app.models import Questions
+from app.metrics import increment, observe
+from app.utils.executor_utils import submit_llm_task, wait_for_result
+from app.utils.question_bank_utils import get_question_bank_question, aget_question_bank_question
+from app.utils.first_round_utils import model
+from app.utils.llm_cache_utils import invoke_cached, ainvoke_cached
+from app.utils.context_compaction_utils import count_tokens
+
+logger = logging.getLogger(__name__)
+
+# Combined evaluation: one structured call returning the score and the feedback together.
+# Falls back to separate score and feedback calls when the JSON does not validate.
+EVALUATION_MODE = os.getenv('EVALUATION_MODE', 'combined')
+
+# Where a step's question comes from
+STATIC = 'static'
+GENERATED = 'generated'
+BANK = 'bank'
+
+# Question bank questions are judged against the description stored on the row
+QUESTION_BANK_CRITERIA = ("Specifically, {description} "
+                          "Did my answer meet that specific description? "
+                          "Did I answer the question in a reasonable amount of time that lasted no more than 2 minutes? ")
+
+SHORT_ANSWER_RULE = "If my answer is less than 100 characters then you should always give a 1 as the score. "
+
+# Shared prompt templates. Each step binds its own rubric into them once, when the rounds below are built.
+QUESTION_PREAMBLE = ("You are the world's best interview coach. We are conducting a mock interview where I am interviewing for the role of {job_title} at {company_name} company. "
+                     "I want you to ask me a question as if you are the actual hiring manager. You have my resume in front of you. ")
+
+feedback_prompt = ChatPromptTemplate.from_messages([
+    ("system", "You are helping me land a new job by conducting realistic interviews with me. "
+               "I’m interviewing to be a {job_title} at {company_name} company in the {company_industry} industry. "
+               "You just asked me the question: '{most_recent_question}'. "
+               "I am going to answer you and I want you to give me a very critical critique of how well I answered the question. "
+               "{criteria}"
+               "Finally, please give me a recommendation on how I could have presented my experience better."),
+    ("user", "{answer}"),
+])
+
+score_prompt = ChatPromptTemplate.from_messages([
+    ("system", "You are a career coach conducting a mock job interview with me. I’m interviewing to be a {job_title} at {company_name} company in the {company_industry} industry. "
+               "You just asked me this question: {most_recent_question} "
+               "Your job is to give me an honest and critical score that ranges between 1-10. You are scoring me based on how accurate my answer was, how concise it was and how well I used realistic examples to illustrate my relevant experience. "
+               "{length_rule}"
+               "Don't return any text in your response. Only return a single integer for the score ranging between 1-10 where 10 is the best. For example your response should be: 1 or 2 or 3 or 4 or 5 or 6 or 7 or 8 or 9 or 10."),
+    ("user", "{answer}"),
+])
+
+combined_evaluation_prompt = ChatPromptTemplate.from_messages([
+    ("system", "You are a career coach conducting a realistic mock job interview with me. "
+               "I’m interviewing to be a {job_title} at {company_name} company in the {company_industry} industry. "
+               "You just asked me the question: '{most_recent_question}'. "
+               "I am going to answer you and I want you to give me a very critical critique of how well I answered the question. "
+               "{criteria}"
+               "Finally, give me a recommendation on how I could have presented my experience better. "
+               "Also give me an honest and critical score that ranges between 1-10 where 10 is the best. You are scoring me based on how accurate my answer was, how concise it was and how well I used realistic examples to illustrate my relevant experience. "
+               "{length_rule}"
+               "Respond only with a JSON object with exactly two keys: \"score\", a single integer between 1 and 10, and \"feedback\", your critique as a string. "
+               "For example: {{\"score\": 6, \"feedback\": \"Your opening answered the question directly, but...\"}}"),
+    ("user", "{answer}"),
+])
+
+json_model = model.bind(response_format={"type": "json_object"})
+
+def context_variables(context):
+    # Template variables for one interview, with resume and job lists flattened into text
+    variables = {}
+    for name in context.__slots__:
+        value = getattr(context, name)
+        variables[name] = ', '.join(str(item) for item in value) if isinstance(value, tuple) else value
+    return variables
+
+def render_prompt(template, variables, prompt_name):
+    # Every call reports the size of the prompt it sends
+    prompt_value = template.invoke(variables)
+    prompt_tokens = count_tokens(prompt_value.to_string())
+    observe(f'prompt_tokens.{prompt_name}', prompt_tokens)
+    logger.debug(f"{prompt_name} prompt is {prompt_tokens} tokens")
+    return prompt_value
+
+def parse_combined_evaluation(response_text):
+    if not response_text:
+        return None
+
+    response_text = response_text.strip()
+    if response_text.startswith("```"):
+        response_text = response_text.replace("```json", "").replace("```", "").strip()
+
+    try:
+        evaluation = json.loads(response_text)
+    except json.JSONDecodeError as e:
+        logger.warning(f"Combined evaluation is not valid JSON: {e}")
+        return None
+
+    # Validate against the expected schema: {"score": int 1-10, "feedback": non-empty string}
+    if not isinstance(evaluation, dict) or set(evaluation.keys()) != {'score', 'feedback'}:
+        logger.warning(f"Combined evaluation has unexpected keys: {evaluation}")
+        return None
+
+    score = evaluation['score']
+    if isinstance(score, str) and score.strip().isdigit():
+        score = int(score.strip())
+    if isinstance(score, bool) or not isinstance(score, int) or not 1 <= score <= 10:
+        logger.warning(f"Combined evaluation score is out of range: {score}")
+        return None
+
+    feedback = evaluation['feedback']
+    if not isinstance(feedback, str) or not feedback.strip():
+        logger.warning("Combined evaluation feedback is empty")
+        return None
+
+    return score, feedback.strip()
+
+def parse_score(score_text):
+    # Use regex to find the first integer in the response
+    score_match = re.search(r'\b\d+\b', score_text or "")
+    if score_match:
+        return int(score_match.group())
+
+    logger.debug("No integer found in score response, setting score to None")
+    return None
+
+class QuestionStep:
+    # One turn of an interview round: where the question comes from and how the answer is judged
+    __slots__ = (
+        'ordinal',
+        'source',
+        'text',
+        'question_type',
+        'by_job_title',
+        'criteria',
+        'prompt_type',
+        'question_prompt',
+        'feedback_template',
+        'score_template',
+        'evaluation_template',
+    )
+
+    def __init__(self, ordinal, source, text=None, question_type=None, by_job_title=False, criteria=None, strict_length=False, prompt_type=None):
+        self.ordinal = ordinal
+        self.source = source
+        self.text = text
+        self.question_type = question_type
+        self.by_job_title = by_job_title
+        self.criteria = criteria
+        # Generated questions are cached per prompt type, see LLM_CACHE_PROMPT_TYPES
+        self.prompt_type = prompt_type
+
+        # Bind the templates once; bank steps fill in the criteria per question from the row description
+        length_rule = SHORT_ANSWER_RULE if strict_length else ""
+        feedback_template = feedback_prompt
+        evaluation_template = combined_evaluation_prompt.partial(length_rule=length_rule)
+        if criteria is not None:
+            feedback_template = feedback_template.partial(criteria=criteria)
+            evaluation_template = evaluation_template.partial(criteria=criteria)
+
+        self.question_prompt = None
+        if source == GENERATED:
+            self.question_prompt = ChatPromptTemplate.from_messages([("system", QUESTION_PREAMBLE + text)])
+        self.feedback_template = feedback_template
+        self.score_template = score_prompt.partial(length_rule=length_rule)
+        self.evaluation_template = evaluation_template
+
+    def ask(self, context):
+        # Returns (question, question_id); only question bank steps have an id
+        if self.source == STATIC:
+            return self.text.format(**context_variables(context)), None
+
+        if self.source == GENERATED:
+            prompt_value = render_prompt(self.question_prompt, context_variables(context), 'question')
+            question_text = invoke_cached(prompt_value, model, self.prompt_type, context.user_id) or "No question generated"
+            logger.debug(f"Generated {self.ordinal} question: {question_text}")
+            return question_text, None
+
+        if self.by_job_title and context.job_title:
+            try:
+                return get_question_bank_question(self.question_type, context.job_title)
+            except ValueError:
+                logger.debug(f"No {self.question_type} for {context.job_title}, sampling from every job title")
+        return get_question_bank_question(self.question_type)
+
+    async def aask(self, context):
+        # ask for the ASGI handlers
+        if self.source == STATIC:
+            return self.ask(context)
+
+        if self.source == GENERATED:
+            prompt_value = render_prompt(self.question_prompt, context_variables(context), 'question')
+            question_text = await ainvoke_cached(prompt_value, model, self.prompt_type, context.user_id) or "No question generated"
+            logger.debug(f"Generated {self.ordinal} question: {question_text}")
+            return question_text, None
+
+        if self.by_job_title and context.job_title:
+            try:
+                return await aget_question_bank_question(self.question_type, context.job_title)
+            except ValueError:
+                logger.debug(f"No {self.question_type} for {context.job_title}, sampling from every job title")
+        return await aget_question_bank_question(self.question_type)
+
+    def _variables(self, answer, context, most_recent_question):
+        return {
+            "job_title": context.job_title,
+            "company_name": context.company_name,
+            "company_industry": context.company_industry,
+            "most_recent_question": most_recent_question,
+            "answer": answer,
+        }
+
+    def _with_criteria(self, variables, question_data):
+        description = question_data.description if question_data and question_data.description else "No specific description available."
+        variables["criteria"] = QUESTION_BANK_CRITERIA.format(description=description)
+        return variables
+
+    def _rubric_variables(self, answer, context, most_recent_question, question_id):
+        variables = self._variables(answer, context, most_recent_question)
+        if self.criteria is None:
+            # Fetch the description from the questions table using question_id
+            question_data = db_session.get(Questions, int(question_id)) if question_id else None
+            variables = self._with_criteria(variables, question_data)
+        return variables
+
+    async def _arubric_variables(self, answer, context, most_recent_question, question_id):
+        variables = self._variables(answer, context, most_recent_question)
+        if self.criteria is None:
+            question_data = None
+            if question_id:
+                async with async_session() as session:
+                    question_data = await session.get(Questions, int(question_id))
+            variables = self._with_criteria(variables, question_data)
+        return variables
+
+    def _parse_evaluation(self, evaluation_response):
+        logger.debug(f"Combined evaluation response: {evaluation_response.content}")
+        evaluation = parse_combined_evaluation(evaluation_response.content)
+        if evaluation is None:
+            increment('evaluation.combined.fallback')
+        else:
+            increment('evaluation.combined.ok')
+        return evaluation
+
+    def _feedback_text(self, feedback_response):
+        feedback_text = feedback_response.content.strip() if feedback_response.content else "No feedback received"
+        logger.debug(f"Feedback: {feedback_text}")
+        return feedback_text
+
+    def evaluate(self, answer, context, most_recent_question, question_id=None):
+        prompt_value = render_prompt(self.evaluation_template, self._rubric_variables(answer, context, most_recent_question, question_id), 'evaluation')
+        return self._parse_evaluation(json_model.invoke(prompt_value))
+
+    async def aevaluate(self, answer, context, most_recent_question, question_id=None):
+        prompt_value = render_prompt(self.evaluation_template, await self._arubric_variables(answer, context, most_recent_question, question_id), 'evaluation')
+        return self._parse_evaluation(await json_model.ainvoke(prompt_value))
+
+    def feedback(self, answer, context, most_recent_question, question_id=None):
+        prompt_value = render_prompt(self.feedback_template, self._rubric_variables(answer, context, most_recent_question, question_id), 'feedback')
+        return self._feedback_text(model.invoke(prompt_value))
+
+    async def afeedback(self, answer, context, most_recent_question, question_id=None):
+        prompt_value = render_prompt(self.feedback_template, await self._arubric_variables(answer, context, most_recent_question, question_id), 'feedback')
+        return self._feedback_text(await model.ainvoke(prompt_value))
+
+    def stream_feedback(self, answer, context, most_recent_question, question_id=None):
+        prompt_value = render_prompt(self.feedback_template, self._rubric_variables(answer, context, most_recent_question, question_id), 'feedback')
+        for chunk in model.stream(prompt_value):
+            if chunk.content:
+                yield chunk.content
+
+    async def astream_feedback(self, answer, context, most_recent_question, question_id=None):
+        prompt_value = render_prompt(self.feedback_template, await self._arubric_variables(answer, context, most_recent_question, question_id), 'feedback')
+        async for chunk in model.astream(prompt_value):
+            if chunk.content:
+                yield chunk.content
+
+    def score(self, answer, context, most_recent_question):
+        score_response = model.invoke(render_prompt(self.score_template, self._variables(answer, context, most_recent_question), 'score'))
+        return parse_score(score_response.content.strip() if score_response.content else "")
+
+    async def ascore(self, answer, context, most_recent_question):
+        score_response = await model.ainvoke(render_prompt(self.score_template, self._variables(answer, context, most_recent_question), 'score'))
+        return parse_score(score_response.content.strip() if score_response.content else "")
+
+class InterviewRound:
+    # An ordered table of question steps followed by a closing step
+    def __init__(self, name, steps, closing):
+        self.name = name
+        self.steps = tuple(steps)
+        self.closing = closing
+
+    def step(self, question_num):
+        # Question numbers run 1..len(steps); the closing question is 'last' or the number after the final step
+        if question_num == 'last':
+            return self.closing
+        question_num = int(question_num)
+        if 1 <= question_num <= len(self.steps):
+            return self.steps[question_num - 1]
+        if question_num == len(self.steps) + 1:
+            return self.closing
+        return None
+
+def evaluate_answer(step, answer, context, most_recent_question, question_id=None, feedback=None, score=None):
+    # Returns (score, feedback), keeping any value the client already supplied
+    if EVALUATION_MODE == 'combined' and feedback is None and score is None:
+        evaluation = step.evaluate(answer, context, most_recent_question, question_id)
+        if evaluation:
+            return evaluation
+
+    # Score and feedback are independent LLM calls, so send them at the same time
+    feedback_future = submit_llm_task(step.feedback, answer, context, most_recent_question, question_id) if feedback is None else None
+    score_future = submit_llm_task(step.score, answer, context, most_recent_question) if score is None else None
+    try:
+        if feedback_future:
+            feedback = wait_for_result(feedback_future)
+        if score_future:
+            score = wait_for_result(score_future)
+    except Exception:
+        for future in (feedback_future, score_future):
+            if future:
+                future.cancel()
+        raise
+    return score, feedback
+
+async def aevaluate_answer(step, answer, context, most_recent_question, question_id=None, feedback=None, score=None):
+    # evaluate_answer for the ASGI handlers; the fallback calls run as tasks on the event loop
+    if EVALUATION_MODE == 'combined' and feedback is None and score is None:
+        evaluation = await step.aevaluate(answer, context, most_recent_question, question_id)
+        if evaluation:
+            return evaluation
+
+    feedback_task = asyncio.ensure_future(step.afeedback(answer, context, most_recent_question, question_id)) if feedback is None else None
+    score_task = asyncio.ensure_future(step.ascore(answer, context, most_recent_question)) if score is None else None
+    try:
+        if feedback_task:
+            feedback = await feedback_task
+        if score_task:
+            score = await score_task
+    except BaseException:
+        for task in (feedback_task, score_task):
+            if task:
+                task.cancel()
+        raise
+    return score, feedback
+
+# Round definitions
+
+TECHNICAL_SKILL_CRITERIA = ("Specifically, check that my answer followed these best practices: Did I give an example of a specific project where I used this technical skill? "
+                            "Did I demonstrate a deep technical knowledge of the technical skill asked about? "
+                            "Did I demonstrate critical thinking and problem-solving skills in my answer? "
+                            "Did I quantify the impact of the results of a specific project where I used this skill? "
+                            "Did I answer the question in a reasonable amount of time that lasted no more than 2 minutes? ")
+
+SOFT_SKILL_CRITERIA = ("Specifically, check that my answer followed these best practices: Did I give an example of a specific project where I used this soft skill? "
+                       "Did I clearly define my role and actions in my example? "
+                       "Did I share the results of my actions and what I learned from the specific project? "
+                       "Did I answer the question in a reasonable amount of time that lasted no more than 2 minutes? ")
+
+PROJECT_CRITERIA = ("Specifically, check that my answer followed these best practices: Did I clearly outline my role and responsibilities in the project discussed? "
+                    "Did I demonstrate aspects of being a strong team member or leader in the project? "
+                    "Did I share the results of my actions and what I learned from the specific project? "
+                    "Did I answer the question in a reasonable amount of time that lasted no more than 2 minutes? ")
+
+OPENER_CRITERIA = ("Specifically, check that my answer followed these best practices: Is there an opening, middle and closing? "
+                   "Did my opening answer the question, without adding extra ideas or unnecessary words? "
+                   "Did the middle of my answer give details that support my opening sentence? Did I give one, two, or three details? "
+                   "Once I finished my answer did I say something that showed I was finished? "
+                   "Did I answer the question in a reasonable amount of time that lasted no more than 2 minutes? ")
+
+CLOSING_CRITERIA = ("Specifically, did I demonstrate enthusiasm for the role? "
+                    "Did I show critical thinking and insight in my questions? "
+                    "Did I demonstrate that I had prepared for this interview? ")
+
+TECHNICAL_SKILL_QUESTION = ("You can see from my resume that my top technical skills are: {key_technical_skills}. "
+                            "You have the job description in front of you which shows that the job responsibilities are: {job_responsibilities} and the required professional experiences are: {required_professional_experiences}. "
+                            "Identify similarities in the job description and my top technical skills. "
+                            "Select one of my top technical skills that matches the job description and ask me to elaborate on how I developed and have used that technical skill in the past.")
+
+SOFT_SKILL_QUESTION = ("You can see from my resume that my top soft skills are: {key_soft_skills}. "
+                       "You have the job description in front of you which shows that the job responsibilities are: {job_responsibilities} and the required professional experiences are: {required_professional_experiences}. "
+                       "Identify similarities in the job description and my top soft skills. "
+                       "Select one of my top soft skills that matches the job description and ask me to elaborate on how I developed and have used that soft skill in a specific project in the past.")
+
+PROJECT_QUESTION = ("You can see from my resume that my most recent successful project was: {most_recent_successful_project}. "
+                    "Start your next question with, 'I noticed from your resume that a recent accomplishment was {most_recent_successful_project}'. "
+                    "Follow that up by asking me to explain how I contributed and helped lead the team to the success of that project.")
+
+CLOSING_QUESTION = ("Thanks {username}. It looks like we need to start wrapping up this call. "
+                    "I’ve really enjoyed getting to know you. Before we end the call, however, "
+                    "do you have any questions for me? I’d be happy to answer what I can about the company, "
+                    "the role, or anything else that comes to mind. Please ask me all of the questions that you have in your response to this.")
+
+def closing_step():
+    return QuestionStep('last', STATIC, text=CLOSING_QUESTION, criteria=CLOSING_CRITERIA, strict_length=True)
+
+def bank_step(ordinal, question_type, by_job_title=False):
+    return QuestionStep(ordinal, BANK, question_type=question_type, by_job_title=by_job_title, strict_length=True)
+
+FIRST_ROUND = InterviewRound('first_round', [
+    QuestionStep('first', STATIC, criteria=OPENER_CRITERIA,
+                 text=("Hello {username}! Thanks for meeting with me today. My name is Beans. "
+                       "I’m the hiring manager for the {job_title} role on our team at {company_name}. "
+                       "I’d love to start by getting to know you and your background as it relates to this role. "
+                       "Then we’ll go over some more details about your background and experiences, as well as, "
+                       "discuss some topics about the {company_industry} industry. Can you please start by telling me about yourself?")),
+    QuestionStep('second', GENERATED, text=TECHNICAL_SKILL_QUESTION, criteria=TECHNICAL_SKILL_CRITERIA, prompt_type='technical_skill_question'),
+    QuestionStep('third', GENERATED, text=SOFT_SKILL_QUESTION, criteria=SOFT_SKILL_CRITERIA, prompt_type='soft_skill_question'),
+    QuestionStep('fourth', GENERATED, text=PROJECT_QUESTION, criteria=PROJECT_CRITERIA, prompt_type='project_question'),
+    bank_step('fifth', 'behavioral questions'),
+    bank_step('sixth', 'situational questions'),
+    bank_step('seventh', 'personality questions'),
+    bank_step('eighth', 'motivational questions'),
+    bank_step('ninth', 'competency based questions'),
+    bank_step('tenth', 'ethical questions'),
+], closing_step())
+
+# The second and third round views never had questions of their own; they ask the first round's
+# steps until their own content is written and reviewed
+SECOND_ROUND = InterviewRound('second_round', FIRST_ROUND.steps, FIRST_ROUND.closing)
+THIRD_ROUND = InterviewRound('third_round', FIRST_ROUND.steps, FIRST_ROUND.closing)
+
+ROUNDS = {interview_round.name: interview_round for interview_round in (FIRST_ROUND, SECOND_ROUND, THIRD_ROUND)}
+
+def get_round(name):
+    # Unknown or missing round names run the first round, as before rounds were configurable
+    return ROUNDS.get(name, FIRST_ROUND)
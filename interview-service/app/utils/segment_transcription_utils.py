@@ -0,0 +1,135 @@
+import os
+import time
+import threading
+import logging
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor, wait
+from sqlalchemy import delete, insert, select
+from app.database import engine
+from app.models import RecordingSegments
+from app.metrics import increment, register_gauge
+from app.utils.transcription_utils import transcribe_audio_bytes
+
+logger = logging.getLogger(__name__)
+
+# Answers are uploaded as self-contained segments while the candidate is still speaking.
+# Segments and the finalize can land on different workers, so transcripts are kept in the recording_segments table.
+# The process that received a segment also keeps its future, so a finalize there need not poll.
+TRANSCRIPT_SEGMENT_WORKERS = int(os.getenv('TRANSCRIPT_SEGMENT_WORKERS', '4'))
+TRANSCRIPT_RECORDING_TTL = int(os.getenv('TRANSCRIPT_RECORDING_TTL', '600'))
+TRANSCRIPT_MAX_RECORDINGS = int(os.getenv('TRANSCRIPT_MAX_RECORDINGS', '1000'))
+# Wait for segments this process is transcribing
+TRANSCRIPT_SEGMENT_TIMEOUT = float(os.getenv('TRANSCRIPT_SEGMENT_TIMEOUT', '120'))
+# Short wait for segments another worker received, polled in the table
+TRANSCRIPT_REMOTE_SEGMENT_WAIT = float(os.getenv('TRANSCRIPT_REMOTE_SEGMENT_WAIT', '10'))
+TRANSCRIPT_FINALIZE_POLL_INTERVAL = float(os.getenv('TRANSCRIPT_FINALIZE_POLL_INTERVAL', '0.2'))
+
+segment_executor = ThreadPoolExecutor(max_workers=TRANSCRIPT_SEGMENT_WORKERS, thread_name_prefix='transcribe')
+
+_lock = threading.Lock()
+# recording_id -> (updated_at, {segment index: future}) for segments transcribed by this process, least recently updated first
+_pending = OrderedDict()
+
+register_gauge('transcription.segments.recordings', lambda: len(_pending))
+
+table = RecordingSegments.__table__
+
+class IncompleteRecordingError(Exception):
+    pass
+
+def _store_segment(recording_id, index, transcript):
+    # Delete then insert, so a re-uploaded segment replaces the old transcript on Postgres and SQLite alike
+    with engine.begin() as connection:
+        connection.execute(delete(table).where(table.c.recording_id == recording_id, table.c.segment_index == index))
+        connection.execute(insert(table).values(recording_id=recording_id, segment_index=index, transcript=transcript, updated_at=time.time()))
+
+def _transcribe_segment(recording_id, index, data):
+    try:
+        transcript = transcribe_audio_bytes(data)
+    except Exception as e:
+        logger.error(f"Error transcribing segment {index} of recording {recording_id}: {e}")
+        increment('transcription.segments.failures')
+        transcript = None
+    _store_segment(recording_id, index, transcript)
+
+def _segment_done(recording_id, index, future):
+    if future.cancelled():
+        return
+    error = future.exception()
+    if error is not None:
+        # The transcript never reached the table, so finalize reports the segment missing
+        logger.error(f"Error storing segment {index} of recording {recording_id}: {error}")
+        increment('transcription.segments.store_failures')
+
+def _expire_pending(now):
+    while _pending:
+        updated_at = next(iter(_pending.values()))[0]
+        if len(_pending) <= TRANSCRIPT_MAX_RECORDINGS and now - updated_at < TRANSCRIPT_RECORDING_TTL:
+            break
+        _pending.popitem(last=False)
+
+def add_segment(recording_id, index, data):
+    # Transcription of the segment starts right away, while the next one is being recorded
+    increment('transcription.segments.received')
+    future = segment_executor.submit(_transcribe_segment, recording_id, index, data)
+    future.add_done_callback(lambda done: _segment_done(recording_id, index, done))
+    now = time.monotonic()
+    with _lock:
+        futures = _pending.pop(recording_id, (now, {}))[1]
+        futures[index] = future
+        _pending[recording_id] = (now, futures)
+        _expire_pending(now)
+    return future
+
+def stitch_segments(texts):
+    return ' '.join(text.strip() for text in texts if text and text.strip())
+
+def _segments(recording_id):
+    # segment index -> transcript, None for a failed segment
+    with engine.connect() as connection:
+        rows = connection.execute(select(table.c.segment_index, table.c.transcript)
+                                  .where(table.c.recording_id == recording_id)).all()
+    return {row.segment_index: row.transcript for row in rows}
+
+def partial_transcript(recording_id):
+    # The transcript of the leading segments that have already finished, in order
+    segments = _segments(recording_id)
+    texts = []
+    for index in range(len(segments)):
+        if segments.get(index) is None:
+            break
+        texts.append(segments[index])
+    return stitch_segments(texts)
+
+def _expire_recordings(connection):
+    connection.execute(delete(table).where(table.c.updated_at < time.time() - TRANSCRIPT_RECORDING_TTL))
+
+def finalize_recording(recording_id, segment_count):
+    # Raises IncompleteRecordingError unless segments 0..segment_count-1 all transcribed,
+    # so the client can send the whole answer instead
+    expected = list(range(segment_count))
+    with _lock:
+        local = _pending.pop(recording_id, (None, {}))[1]
+    # Segments transcribed here are waited on directly; only the others are polled, and briefly
+    if local:
+        wait(local.values(), timeout=TRANSCRIPT_SEGMENT_TIMEOUT)
+    segments = _segments(recording_id)
+    deadline = time.monotonic() + TRANSCRIPT_REMOTE_SEGMENT_WAIT
+    while any(index not in segments and index not in local for index in expected) and time.monotonic() < deadline:
+        time.sleep(TRANSCRIPT_FINALIZE_POLL_INTERVAL)
+        segments = _segments(recording_id)
+
+    with engine.begin() as connection:
+        connection.execute(delete(table).where(table.c.recording_id == recording_id))
+        _expire_recordings(connection)
+
+    if sorted(segments) != expected:
+        increment('transcription.segments.incomplete')
+        raise IncompleteRecordingError(f"Recording {recording_id} expected {segment_count} segments, received {sorted(segments)}")
+    failed = [index for index in expected if segments[index] is None]
+    if failed:
+        increment('transcription.segments.incomplete')
+        raise IncompleteRecordingError(f"Recording {recording_id} segments {failed} failed to transcribe")
+
+    increment('transcription.segments.finalized')
+    return stitch_segments(segments[index] for index in expected)
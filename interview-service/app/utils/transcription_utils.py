@@ -0,0 +1,162 @@
+import os
+import io
+import time
+import subprocess
+import logging
+import numpy as np
+from pydub.utils import which
+from llm_gateway import create_openai_client
+from app.metrics import increment, observe
+from app.utils.local_whisper_utils import transcribe_locally, WHISPER_SAMPLE_RATE
+from app.utils.vad_utils import trim_silence
+
+logger = logging.getLogger(__name__)
+
+# Containers the Whisper API accepts as uploaded, so they are sent without transcoding
+WHISPER_ACCEPTED_FORMATS = {'flac', 'm4a', 'mp3', 'mp4', 'mpeg', 'mpga', 'oga', 'ogg', 'wav', 'webm'}
+# The Whisper API rejects uploads over 25 MB
+TRANSCRIPTION_MAX_BYTES = int(os.getenv('TRANSCRIPTION_MAX_BYTES', str(25 * 1024 * 1024)))
+FFMPEG_TIMEOUT = int(os.getenv('FFMPEG_TIMEOUT', '60'))
+# 'remote' sends audio to the whisper-1 API, 'local' runs the openai-whisper model in a process pool
+TRANSCRIPTION_BACKEND = os.getenv('TRANSCRIPTION_BACKEND', 'remote')
+# Trim silence before either backend sees the audio, so the API receives a smaller Opus upload
+TRANSCRIPTION_VAD = os.getenv('TRANSCRIPTION_VAD', 'true').lower() == 'true'
+# Shorter recordings are sent to the API as uploaded; trimming them saves less than the decode costs
+VAD_MIN_RECORDING_SECONDS = float(os.getenv('VAD_MIN_RECORDING_SECONDS', '3'))
+
+ffmpeg_path = which("ffmpeg") or os.getenv('FFMPEG_LOCATION')
+
+openai_client = create_openai_client()
+
+class AudioFormatError(ValueError):
+    pass
+
+def detect_audio_format(data):
+    # Sniff the container from its magic bytes instead of trusting the upload's filename
+    header = data[:64]
+    if header[:4] == b'RIFF' and header[8:12] == b'WAVE':
+        return 'wav'
+    if header[:4] == b'fLaC':
+        return 'flac'
+    if header[:4] == b'OggS':
+        return 'ogg'
+    if header[:4] == b'\x1aE\xdf\xa3':
+        # Matroska; MediaRecorder in Chrome and Firefox writes the webm doctype
+        return 'webm' if b'webm' in header else 'mkv'
+    if header[4:8] == b'ftyp':
+        return 'm4a' if header[8:11] == b'M4A' else 'mp4'
+    if header[:3] == b'ID3' or (len(header) > 1 and header[0] == 0xFF and header[1] & 0xE0 == 0xE0):
+        return 'mp3'
+    if header[:5] == b'#!AMR':
+        return 'amr'
+    return None
+
+def run_ffmpeg(data, output_args, input_args=()):
+    # Pipe through ffmpeg stdin/stdout so nothing touches the disk; each call has its own pipes
+    if not ffmpeg_path:
+        raise AudioFormatError("ffmpeg is required to transcode this audio format")
+    result = subprocess.run(
+        [ffmpeg_path, '-hide_banner', '-loglevel', 'error'] + list(input_args) + ['-i', 'pipe:0'] + output_args + ['pipe:1'],
+        input=data,
+        stdout=subprocess.PIPE,
+        stderr=subprocess.PIPE,
+        timeout=FFMPEG_TIMEOUT,
+    )
+    if result.returncode != 0 or not result.stdout:
+        raise AudioFormatError(f"ffmpeg could not decode the audio: {result.stderr.decode(errors='replace').strip()}")
+    return result.stdout
+
+def transcode_to_wav(data):
+    return run_ffmpeg(data, ['-f', 'wav', '-ac', '1', '-ar', str(WHISPER_SAMPLE_RATE)])
+
+def decode_to_pcm(data):
+    # Mono float32 samples at 16 kHz, the input the local Whisper model expects
+    pcm = run_ffmpeg(data, ['-f', 's16le', '-acodec', 'pcm_s16le', '-ac', '1', '-ar', str(WHISPER_SAMPLE_RATE)])
+    return np.frombuffer(pcm, np.int16).astype(np.float32) / 32768.0
+
+def encode_pcm(samples):
+    # Re-encode trimmed samples as Ogg Opus, which is far smaller than the equivalent WAV
+    pcm = (np.clip(samples, -1.0, 1.0) * 32767).astype(np.int16).tobytes()
+    return run_ffmpeg(
+        pcm,
+        ['-c:a', 'libopus', '-b:a', '24k', '-f', 'ogg'],
+        input_args=['-f', 's16le', '-ar', str(WHISPER_SAMPLE_RATE), '-ac', '1'],
+    )
+
+def prepare_audio(data):
+    # Returns an in-memory file named with the extension Whisper uses to pick a decoder
+    if not data:
+        raise AudioFormatError("The audio upload is empty")
+    if len(data) > TRANSCRIPTION_MAX_BYTES:
+        raise AudioFormatError("The audio upload is too large")
+
+    audio_format = detect_audio_format(data)
+    if audio_format in WHISPER_ACCEPTED_FORMATS:
+        increment('transcription.passthrough')
+    else:
+        data = transcode_to_wav(data)
+        audio_format = 'wav'
+        increment('transcription.transcoded')
+
+    audio_file = io.BytesIO(data)
+    audio_file.name = f"audio.{audio_format}"
+    return audio_file
+
+def trim_upload(data):
+    # Returns the upload with its silence trimmed and re-encoded as Ogg Opus, b"" when it is all
+    # silence, or the upload unchanged when it is short, nothing was trimmed or ffmpeg cannot read it
+    try:
+        samples = decode_to_pcm(data)
+    except AudioFormatError:
+        if detect_audio_format(data) not in WHISPER_ACCEPTED_FORMATS:
+            raise
+        # The API may still read what ffmpeg could not
+        increment('transcription.vad.decode_failures')
+        return data
+    if len(samples) < VAD_MIN_RECORDING_SECONDS * WHISPER_SAMPLE_RATE:
+        return data
+
+    samples, removed = trim_silence(samples, WHISPER_SAMPLE_RATE)
+    if not len(samples):
+        return b""
+    if not removed:
+        return data
+    increment('transcription.vad.reencoded')
+    return encode_pcm(samples)
+
+def transcribe_audio_bytes(data):
+    if not data:
+        raise AudioFormatError("The audio upload is empty")
+
+    if TRANSCRIPTION_BACKEND == 'local':
+        samples = decode_to_pcm(data)
+        if TRANSCRIPTION_VAD:
+            samples, _ = trim_silence(samples, WHISPER_SAMPLE_RATE)
+        if not len(samples):
+            return ""
+        start = time.perf_counter()
+        text = transcribe_locally(samples)
+        observe('transcription.local_seconds', time.perf_counter() - start)
+        return text
+
+    if TRANSCRIPTION_VAD and ffmpeg_path:
+        # Without ffmpeg the formats the API accepts still pass through untouched
+        data = trim_upload(data)
+        if not data:
+            return ""
+
+    audio_file = prepare_audio(data)
+    start = time.perf_counter()
+    response = openai_client.audio.transcriptions.create(
+        model="whisper-1",
+        file=audio_file,
+        response_format="text"
+    )
+    observe('transcription.api_seconds', time.perf_counter() - start)
+
+    # Check the structure of the response to handle it properly
+    if isinstance(response, dict) and "text" in response:
+        return response["text"]
+    if isinstance(response, str):
+        return response
+    raise ValueError("Unexpected response format from transcription API")
@@ -1,15 +1,43 @@
-import random
-from app.database import db_session
-from app.models import InterviewHistory
+import os
+import threading
+from sqlalchemy import select
+from app.database import engine
+from app.models import session_id_sequence, SESSION_ID_BLOCK_SIZE
+from app.metrics import increment
 
-#Start of generating unique IDs:
+# Session ids come from a Postgres sequence. Each nextval reserves a block of
+# SESSION_ID_BLOCK_SIZE ids for this process, so most interviews start without a query.
+# Ids grow with time across processes, ordered to within one block.
 
-def generate_session_id():
-    return random.randint(100000, 999999)
+class SessionIdAllocator:
+    def __init__(self, block_size):
+        self.block_size = block_size
+        self._lock = threading.Lock()
+        self._next = 0
+        self._limit = 0
+
+    def _reserve_block(self):
+        with engine.connect() as connection:
+            start = connection.execute(select(session_id_sequence.next_value())).scalar()
+        increment('session_ids.blocks_reserved')
+        self._next, self._limit = start, start + self.block_size
 
-def ensure_unique_session_id(user_id):
-    while True:
-        session_id = generate_session_id()
-        existing_session = db_session.query(InterviewHistory).filter_by(user_id=user_id, session_id=session_id).first()
-        if not existing_session:
+    def allocate(self):
+        with self._lock:
+            if self._next >= self._limit:
+                self._reserve_block()
+            session_id = self._next
+            self._next += 1
             return session_id
+
+    def reset(self):
+        # A forked child must not hand out the rest of its parent's block
+        self._lock = threading.Lock()
+        self._next = self._limit = 0
+
+session_id_allocator = SessionIdAllocator(SESSION_ID_BLOCK_SIZE)
+
+os.register_at_fork(after_in_child=session_id_allocator.reset)
+
+def generate_session_id():
+    return session_id_allocator.allocate()
@@ -0,0 +1,61 @@
+import os
+import numpy as np
+from app.metrics import increment, observe
+
+# Energy based voice activity detection over 30 ms frames of decoded PCM
+VAD_FRAME_MS = int(os.getenv('VAD_FRAME_MS', '30'))
+# Frames quieter than this are never speech
+VAD_MIN_DBFS = float(os.getenv('VAD_MIN_DBFS', '-50'))
+# Speech must be this much louder than the estimated noise floor
+VAD_NOISE_MARGIN_DB = float(os.getenv('VAD_NOISE_MARGIN_DB', '10'))
+# Upper bound on the adaptive threshold, so a recording with almost no pauses is not mistaken for noise
+VAD_MAX_THRESHOLD_DBFS = float(os.getenv('VAD_MAX_THRESHOLD_DBFS', '-35'))
+# Silence kept around speech, so word onsets and endings are not clipped
+VAD_PADDING_MS = int(os.getenv('VAD_PADDING_MS', '200'))
+# Pauses inside the answer are shortened to this length
+VAD_MAX_PAUSE_MS = int(os.getenv('VAD_MAX_PAUSE_MS', '600'))
+
+def frame_energy_dbfs(frames):
+    # RMS level of each frame relative to full scale; frames is (n_frames, frame_length) float32 in [-1, 1]
+    rms = np.sqrt(np.mean(np.square(frames, dtype=np.float64), axis=1))
+    return 20 * np.log10(np.maximum(rms, 1e-10))
+
+def speech_mask(energy, padding_frames):
+    # Threshold against an adaptive noise floor, then widen each speech run by the padding on both sides
+    noise_floor = np.percentile(energy, 10)
+    threshold = max(VAD_MIN_DBFS, min(noise_floor + VAD_NOISE_MARGIN_DB, VAD_MAX_THRESHOLD_DBFS))
+    voiced = energy > threshold
+    if padding_frames and voiced.any():
+        kernel = np.ones(2 * padding_frames + 1, dtype=np.int32)
+        voiced = np.convolve(voiced.astype(np.int32), kernel)[padding_frames:padding_frames + len(voiced)] > 0
+    return voiced
+
+def trim_silence(samples, sample_rate):
+    # Drops leading and trailing silence and shortens long pauses. Returns (samples, seconds removed).
+    frame_length = sample_rate * VAD_FRAME_MS // 1000
+    frame_count = len(samples) // frame_length
+    if frame_count == 0:
+        return samples, 0.0
+
+    frames = samples[:frame_count * frame_length].reshape(frame_count, frame_length)
+    voiced = speech_mask(frame_energy_dbfs(frames), VAD_PADDING_MS // VAD_FRAME_MS)
+
+    if not voiced.any():
+        removed = len(samples) / sample_rate
+        increment('transcription.vad.silent_uploads')
+        observe('transcription.vad.removed_seconds', removed)
+        return samples[:0], removed
+
+    # Position of each frame inside its run of silence, from the index of the last voiced frame before it
+    index = np.arange(frame_count)
+    last_voiced = np.maximum.accumulate(np.where(voiced, index, -1))
+    position_in_pause = index - last_voiced - 1
+
+    voiced_indexes = np.flatnonzero(voiced)
+    inside_answer = (index > voiced_indexes[0]) & (index < voiced_indexes[-1])
+    keep = voiced | (inside_answer & (position_in_pause < VAD_MAX_PAUSE_MS // VAD_FRAME_MS))
+
+    trimmed = frames[keep].reshape(-1)
+    removed = (len(samples) - len(trimmed)) / sample_rate
+    observe('transcription.vad.removed_seconds', removed)
+    return trimmed, removed
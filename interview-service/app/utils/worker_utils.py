@@ -0,0 +1,83 @@
+import os
+import threading
+import logging
+from flask import g, jsonify, request
+from app.metrics import increment, observe, register_gauge
+
+logger = logging.getLogger(__name__)
+
+# Set by gunicorn.conf.py; empty when the app runs under the Flask dev server or a bare gunicorn command
+WORKER_CLASS = os.getenv('GUNICORN_WORKER_CLASS', '')
+# Refuse to boot a gevent worker whose I/O would still block the whole process
+WORKER_SELF_CHECK_STRICT = os.getenv('WORKER_SELF_CHECK_STRICT', 'true').lower() == 'true'
+# Requests one worker serves at once, across threads or greenlets; 0 turns the cap off
+WORKER_MAX_CONCURRENT_REQUESTS = int(os.getenv('WORKER_MAX_CONCURRENT_REQUESTS', '64'))
+# How long a request waits for a slot before it is turned away with a 503
+WORKER_QUEUE_TIMEOUT = float(os.getenv('WORKER_QUEUE_TIMEOUT', '5'))
+
+# Modules gevent must have replaced for LLM, TTS, Whisper and ffmpeg calls to yield
+COOPERATIVE_MODULES = ('socket', 'ssl', 'select', 'threading', 'subprocess', 'time')
+
+def cooperative_io_problems():
+    # Returns what is still blocking; an empty list means every kind of I/O the app does is cooperative
+    from gevent import monkey
+    import psycopg2.extensions
+
+    problems = [f"{module} is not monkey-patched" for module in COOPERATIVE_MODULES if not monkey.is_module_patched(module)]
+    if psycopg2.extensions.get_wait_callback() is None:
+        problems.append("psycopg2 has no wait callback (psycogreen not applied)")
+
+    from app.utils.transcription_utils import TRANSCRIPTION_BACKEND
+    if TRANSCRIPTION_BACKEND == 'local':
+        problems.append("TRANSCRIPTION_BACKEND=local forks a process pool, which is not supported under gevent")
+    return problems
+
+def run_worker_self_check():
+    if WORKER_CLASS != 'gevent':
+        logger.info(f"Serving with the {WORKER_CLASS or 'default'} worker class")
+        return
+
+    problems = cooperative_io_problems()
+    if not problems:
+        logger.info("gevent self-check passed: sockets, ssl, subprocess and psycopg2 are cooperative")
+        return
+
+    message = "gevent self-check failed: " + "; ".join(problems)
+    if WORKER_SELF_CHECK_STRICT:
+        raise RuntimeError(message)
+    logger.error(message)
+
+def install_concurrency_limit(app):
+    if WORKER_MAX_CONCURRENT_REQUESTS <= 0:
+        return
+
+    # threading is patched under gevent, so this semaphore parks greenlets rather than threads
+    slots = threading.BoundedSemaphore(WORKER_MAX_CONCURRENT_REQUESTS)
+    in_flight_lock = threading.Lock()
+    in_flight = {'count': 0}
+    register_gauge('worker.in_flight_requests', lambda: in_flight['count'])
+
+    @app.before_request
+    def acquire_worker_slot():
+        # Metrics stay reachable while the worker is saturated
+        if request.path.startswith('/internal/'):
+            return None
+        if not slots.acquire(timeout=WORKER_QUEUE_TIMEOUT):
+            increment('worker.rejected_requests')
+            response = jsonify({'error': 'Server is busy, please retry'})
+            response.headers['Retry-After'] = '1'
+            return response, 503
+        g.worker_slot = True
+        with in_flight_lock:
+            in_flight['count'] += 1
+            concurrent = in_flight['count']
+        observe('worker.concurrent_requests', concurrent)
+        return None
+
+    @app.teardown_request
+    def release_worker_slot(exception=None):
+        # Streamed responses tear down after the last chunk, so they hold their slot until then
+        if g.pop('worker_slot', None):
+            with in_flight_lock:
+                in_flight['count'] -= 1
+            slots.release()
@@ -0,0 +1,219 @@
+import asyncio
+import logging
+from urllib.parse import urlencode
+from a2wsgi import WSGIMiddleware
+from starlette.applications import Starlette
+from starlette.responses import FileResponse, JSONResponse, StreamingResponse
+from starlette.routing import Mount, Route
+from elevenlabs.client import ApiError
+from app import app as flask_app
+from app.async_database import init_async_database
+from app.metrics import increment
+from app.utils.first_round_utils import get_summary_message
+from app.utils.interview_history_utils import record_interview_history
+from app.utils.prefetch_utils import prefetch_question_async, take_prefetched_question
+from app.utils.context_utils import aget_interview_context
+from app.utils.interview_state_utils import aget_interview_state, aupdate_interview_state
+from app.utils.round_engine_utils import get_round, aevaluate_answer
+from app.utils.audio_utils import tts_cache, tts_cache_key, astream_speech, speech_token, read_speech_token
+from app.utils.executor_utils import LLM_TASK_TIMEOUT
+from app.utils.audio_warmup_utils import warm_interview_phrases
+from app.routes.first_round import calculate_timer, format_sse
+from app.routes.audio import AUDIO_KEY_PATTERN
+
+logger = logging.getLogger(__name__)
+
+# ASGI entry point. The interview turn handlers below are async end to end: LLM calls go through
+# ainvoke on the gateway's async pool, reads go through asyncpg and question audio is relayed from
+# the async ElevenLabs client, so one event loop overlaps the I/O of many interviews.
+# Every other route is served by the Flask app, mounted unchanged.
+#
+#   GUNICORN_WORKER_CLASS=asgi gunicorn -c gunicorn.conf.py
+
+# The asyncpg pool is only created in processes that serve this app
+init_async_database()
+
+def question_audio_url(text, voice_id):
+    # Same URL as the Flask audio blueprint, which url_for cannot build outside a Flask request
+    if not text or not voice_id or voice_id == 'none':
+        return None
+    token = speech_token(text, voice_id)
+    if token is None:
+        return None
+    return f"/audio/{tts_cache_key(text, voice_id)}.mp3?{urlencode({'s': token})}"
+
+def take_question(session_id, current_round, question_num, context, state=None):
+    # Returns an awaitable for the question, or None once the round has no more questions
+    step = current_round.step(question_num)
+    if step is None:
+        return None
+    future = take_prefetched_question(session_id, question_num, context, state)
+    if future is not None:
+        return asyncio.wrap_future(future)
+    return asyncio.ensure_future(step.aask(context))
+
+def schedule_question_prefetch(session_id, current_round, question_num, context):
+    step = current_round.step(question_num)
+    if step:
+        prefetch_question_async(session_id, question_num, step.aask, context)
+
+async def wait_for_question(question_future):
+    return await asyncio.wait_for(question_future, LLM_TASK_TIMEOUT)
+
+async def record_history(*args, flush=False):
+    # Rows are buffered in memory; only the flush at the end of an interview touches the database
+    if flush:
+        await asyncio.to_thread(record_interview_history, *args, flush=True)
+    else:
+        record_interview_history(*args)
+
+async def submit_answer(request):
+    form = await request.form()
+    session_id = form.get('session_id')
+    user_id = form.get('user_id')
+    question = form.get('question')
+    answer = form.get('answer_1')
+    feedback = form.get('feedback', None)
+    score = form.get('score', None)
+    interview_round = form.get('interview_round')
+    question_id = form.get('question_id', None)
+    voice = form.get('voice')
+
+    # The context and the interview state are independent reads
+    context, state = await asyncio.gather(aget_interview_context(session_id, user_id), aget_interview_state(session_id))
+    question_time = state.get('question_time')
+    current_time = form.get('current_time')
+    timer = calculate_timer(question_time, current_time)
+
+    question_num = form.get('question_num', 1)
+    current_round = get_round(interview_round)
+
+    next_question_num = None if question_num == 'last' else int(question_num) + 1
+    next_question_future = take_question(session_id, current_round, next_question_num, context, state) if next_question_num else None
+
+    try:
+        if answer == 'skipped':
+            feedback = 'skipped'
+            score = None
+        else:
+            most_recent_question = state.get('most_recent_question')
+            score, feedback = await aevaluate_answer(current_round.step(question_num), answer, context, most_recent_question, question_id or None, feedback, score)
+    except BaseException:
+        if next_question_future:
+            next_question_future.cancel()
+        raise
+
+    await record_history(session_id, user_id, question, answer, score, feedback, timer, interview_round, context.job_title, context.job_level, context.company_name, context.company_industry, question_id or None, flush=next_question_future is None)
+
+    if next_question_future is None:
+        await aupdate_interview_state(session_id, most_recent_question=question, most_recent_answer=answer)
+        return JSONResponse({'message': 'Interview complete', 'summary': get_summary_message()})
+
+    await aupdate_interview_state(session_id, most_recent_question=question, most_recent_answer=answer, question_time=current_time)
+
+    next_question, question_id = await wait_for_question(next_question_future)
+    schedule_question_prefetch(session_id, current_round, next_question_num + 1, context)
+    warm_interview_phrases(current_round, context, voice)
+
+    return JSONResponse({'question': next_question, 'question_num': next_question_num, 'question_id': question_id, 'question_audio': question_audio_url(next_question, voice)})
+
+async def submit_answer_stream(request):
+    form = await request.form()
+    session_id = form.get('session_id')
+    user_id = form.get('user_id')
+    question = form.get('question')
+    answer = form.get('answer_1')
+    interview_round = form.get('interview_round')
+    question_id = form.get('question_id', None) or None
+    question_num = form.get('question_num', 1)
+    voice = form.get('voice')
+
+    if not answer or answer == 'skipped':
+        return JSONResponse({'error': 'Skipped questions are submitted to skip_question'}, status_code=400)
+
+    current_round = get_round(interview_round)
+    step = current_round.step(question_num)
+
+    context, state = await asyncio.gather(aget_interview_context(session_id, user_id), aget_interview_state(session_id))
+    question_time = state.get('question_time')
+    current_time = form.get('current_time')
+    timer = calculate_timer(question_time, current_time)
+
+    most_recent_question = state.get('most_recent_question')
+
+    # The score and the next question are produced while the feedback streams
+    score_task = asyncio.ensure_future(step.ascore(answer, context, most_recent_question))
+
+    next_question_num = None if question_num == 'last' else int(question_num) + 1
+    next_question_future = take_question(session_id, current_round, next_question_num, context, state) if next_question_num else None
+
+    changes = {'most_recent_question': question, 'most_recent_answer': answer}
+    if next_question_future:
+        changes['question_time'] = current_time
+    await aupdate_interview_state(session_id, **changes)
+
+    async def generate():
+        try:
+            feedback_parts = []
+            async for token in step.astream_feedback(answer, context, most_recent_question, question_id):
+                feedback_parts.append(token)
+                yield format_sse('feedback', {'token': token})
+            feedback = ''.join(feedback_parts).strip() or "No feedback received"
+
+            score = await asyncio.wait_for(score_task, LLM_TASK_TIMEOUT)
+            yield format_sse('score', {'score': score})
+
+            await record_history(session_id, user_id, question, answer, score, feedback, timer, interview_round, context.job_title, context.job_level, context.company_name, context.company_industry, question_id, flush=next_question_future is None)
+
+            if next_question_future is None:
+                yield format_sse('complete', {'message': 'Interview complete', 'summary': get_summary_message()})
+                return
+
+            next_question, next_question_id = await wait_for_question(next_question_future)
+            schedule_question_prefetch(session_id, current_round, next_question_num + 1, context)
+            warm_interview_phrases(current_round, context, voice)
+            yield format_sse('question', {'question': next_question, 'question_num': next_question_num, 'question_id': next_question_id, 'question_audio': question_audio_url(next_question, voice)})
+        except Exception as e:
+            logger.error(f"Error streaming answer evaluation: {e}")
+            yield format_sse('error', {'error': 'Failed to evaluate answer'})
+        finally:
+            # Also reached when the client disconnects mid-stream
+            score_task.cancel()
+            if next_question_future:
+                next_question_future.cancel()
+
+    # Stop nginx from buffering the event stream
+    return StreamingResponse(generate(), media_type='text/event-stream', headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'})
+
+async def question_audio(request):
+    key = request.path_params['key']
+    if not AUDIO_KEY_PATTERN.match(key):
+        return JSONResponse({'error': 'Invalid audio key'}, status_code=404)
+
+    # The key is a hash of the text and voice settings, so the audio never changes
+    headers = {'Cache-Control': 'public, max-age=31536000, immutable'}
+
+    path = tts_cache.get(key)
+    if path:
+        return FileResponse(path, media_type='audio/mpeg', headers=headers)
+
+    speech = read_speech_token(key, request.query_params.get('s'))
+    if speech is None:
+        return JSONResponse({'error': 'Audio not found'}, status_code=404)
+
+    try:
+        chunks = await astream_speech(*speech)
+    except ApiError as e:
+        logger.error(f"Error generating speech: {e}")
+        return JSONResponse({'error': 'Failed to generate audio'}, status_code=502)
+
+    increment('tts.stream.async_relays')
+    headers['X-Accel-Buffering'] = 'no'
+    return StreamingResponse(chunks, media_type='audio/mpeg', headers=headers)
+
+app = Starlette(routes=[
+    Route('/first_round/submit_answer', submit_answer, methods=['POST']),
+    Route('/first_round/submit_answer_stream', submit_answer_stream, methods=['POST']),
+    Route('/audio/{key}.mp3', question_audio, methods=['GET']),
+    Mount('/', app=WSGIMiddleware(flask_app)),
+])
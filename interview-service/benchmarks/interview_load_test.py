@@ -0,0 +1,286 @@
+import sys
+import json
+import math
+import time
+import random
+import argparse
+import threading
+import urllib.error
+import urllib.parse
+import urllib.request
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+
+from stub_openai import serve
+
+# Drives complete first-round interviews against a running interview-service and reports
+# latency per step and per question, throughput and error rates as JSON.
+#
+#   python benchmarks/interview_load_test.py --base-url http://127.0.0.1:5013 --user-ids 1 2 3 \
+#       --concurrency 20 --interviews 200 --output report.json
+#
+# Each simulated candidate opens /first_round/, then answers, skips or ends early until the
+# service reports the interview complete. With --stub-port the harness also serves the stub
+# OpenAI API, for a service started with LLM_BASE_URL=http://127.0.0.1:<stub-port>/v1.
+
+ANSWER_WORDS = ("I led the migration of our reporting pipeline to a streaming design, which cut the time "
+                "to publish daily numbers from six hours to twenty minutes. I owned the design review, "
+                "worked with two other engineers on the rollout and measured the result against our "
+                "service level targets. ").split()
+
+INTERVIEW_START = 30 * 60
+
+class StepStats:
+    def __init__(self):
+        self.latencies = []
+        self.errors = 0
+
+def percentile(sorted_values, fraction):
+    # Nearest-rank percentile
+    if not sorted_values:
+        return None
+    return sorted_values[max(0, math.ceil(fraction * len(sorted_values)) - 1)]
+
+def summarize(stats, elapsed):
+    latencies = sorted(stats.latencies)
+    requests = len(latencies) + stats.errors
+    return {
+        'requests': requests,
+        'errors': stats.errors,
+        'error_rate': stats.errors / requests if requests else 0.0,
+        'throughput_rps': len(latencies) / elapsed if elapsed else 0.0,
+        'p50_seconds': percentile(latencies, 0.50),
+        'p95_seconds': percentile(latencies, 0.95),
+        'p99_seconds': percentile(latencies, 0.99),
+        'max_seconds': latencies[-1] if latencies else None,
+    }
+
+def parse_distribution(spec):
+    # "40:0.2,150:0.5,400:0.3" -> ([40, 150, 400], [0.2, 0.5, 0.3]), word counts and weights
+    lengths, weights = [], []
+    for part in spec.split(','):
+        length, _, weight = part.partition(':')
+        lengths.append(int(length))
+        weights.append(float(weight or 1))
+    return lengths, weights
+
+def format_clock(seconds):
+    seconds = max(0, int(seconds))
+    return f"{seconds // 60:02}:{seconds % 60:02}"
+
+class RequestError(Exception):
+    pass
+
+class LoadTest:
+    def __init__(self, args):
+        self.args = args
+        self.answer_lengths, self.answer_weights = parse_distribution(args.answer_words)
+        self._lock = threading.Lock()
+        self.steps = defaultdict(StepStats)
+        self.questions = defaultdict(StepStats)
+        self.interviews = {'started': 0, 'completed': 0, 'aborted': 0, 'ended_early': 0}
+        self.interview_seconds = []
+
+    def _record(self, step, question_num, latency=None):
+        # latency is None for a failed request
+        with self._lock:
+            targets = [self.steps[step]]
+            if question_num is not None:
+                targets.append(self.questions[str(question_num)])
+            for stats in targets:
+                if latency is None:
+                    stats.errors += 1
+                else:
+                    stats.latencies.append(latency)
+
+    def _request(self, step, question_num, path, form=None, params=None):
+        url = self.args.base_url.rstrip('/') + path
+        if params:
+            url += '?' + urllib.parse.urlencode(params)
+        data = urllib.parse.urlencode(form).encode('utf-8') if form is not None else None
+
+        start = time.perf_counter()
+        try:
+            with urllib.request.urlopen(url, data=data, timeout=self.args.timeout) as response:
+                body = response.read()
+                final_url = response.geturl()
+        except (urllib.error.URLError, OSError) as e:
+            self._record(step, question_num)
+            raise RequestError(f"{step} failed: {e}")
+        self._record(step, question_num, time.perf_counter() - start)
+        return body, final_url
+
+    def _post_json(self, step, question_num, path, form):
+        body, _ = self._request(step, question_num, path, form=form)
+        try:
+            return json.loads(body)
+        except ValueError:
+            raise RequestError(f"{step} returned a non-JSON body")
+
+    def _answer(self, rng):
+        words = rng.choices(self.answer_lengths, self.answer_weights)[0]
+        # Vary each answer around its bucket so prompts are not byte-identical
+        words = max(1, int(words * rng.uniform(0.8, 1.2)))
+        start = rng.randrange(len(ANSWER_WORDS))
+        return ' '.join(ANSWER_WORDS[(start + i) % len(ANSWER_WORDS)] for i in range(words))
+
+    def run_interview(self, index):
+        args = self.args
+        rng = random.Random(args.seed + index)
+        user_id = str(args.user_ids[index % len(args.user_ids)])
+        with self._lock:
+            self.interviews['started'] += 1
+        started = time.perf_counter()
+
+        try:
+            _, final_url = self._request('view', None, '/first_round/', params={
+                'username': f'loadtest{index}',
+                'user_id': user_id,
+                'interview_round': 'first_round',
+                'job_title': args.job_title,
+                'company_name': args.company_name,
+                'company_industry': args.company_industry,
+            })
+            session_id = urllib.parse.parse_qs(urllib.parse.urlparse(final_url).query).get('session_id', [None])[0]
+            if not session_id:
+                raise RequestError("view did not redirect to a session")
+
+            common = {'session_id': session_id, 'user_id': user_id, 'interview_round': 'first_round', 'voice': args.voice}
+            question_num, question, question_id = '1', 'Can you please start by telling me about yourself?', ''
+            clock = INTERVIEW_START
+            ended_early = False
+
+            while True:
+                time.sleep(args.think_time)
+                clock -= rng.uniform(30, 120)
+                form = dict(common, question=question, question_id=question_id or '', question_num=question_num, current_time=format_clock(clock))
+                roll = rng.random()
+
+                if question_num != 'last' and not ended_early and roll < args.end_probability:
+                    result = self._post_json('end_interview', question_num, '/first_round/end_interview', form)
+                    ended_early = True
+                elif question_num != 'last' and roll < args.end_probability + args.skip_probability:
+                    result = self._post_json('skip_question', question_num, '/first_round/skip_question', form)
+                else:
+                    result = self._post_json('submit_answer', question_num, '/first_round/submit_answer', dict(form, answer_1=self._answer(rng)))
+
+                if 'error' in result:
+                    raise RequestError(result['error'])
+                if 'question' not in result:
+                    break
+                question, question_id, question_num = result['question'], result.get('question_id') or '', str(result['question_num'])
+        except RequestError as e:
+            print(f"Interview {index} aborted: {e}", file=sys.stderr)
+            with self._lock:
+                self.interviews['aborted'] += 1
+            return
+
+        with self._lock:
+            self.interviews['completed'] += 1
+            if ended_early:
+                self.interviews['ended_early'] += 1
+            self.interview_seconds.append(time.perf_counter() - started)
+
+    def run(self):
+        args = self.args
+        deadline = time.monotonic() + args.duration if args.duration else None
+        counter = iter(range(args.interviews or sys.maxsize))
+        counter_lock = threading.Lock()
+
+        def candidate():
+            while deadline is None or time.monotonic() < deadline:
+                with counter_lock:
+                    index = next(counter, None)
+                if index is None:
+                    return
+                self.run_interview(index)
+
+        started = time.monotonic()
+        with ThreadPoolExecutor(max_workers=args.concurrency) as pool:
+            for _ in range(args.concurrency):
+                pool.submit(candidate)
+        elapsed = time.monotonic() - started
+        return self.report(elapsed)
+
+    def report(self, elapsed):
+        args = self.args
+        all_requests = StepStats()
+        for stats in self.steps.values():
+            all_requests.latencies.extend(stats.latencies)
+            all_requests.errors += stats.errors
+        interview_seconds = sorted(self.interview_seconds)
+
+        question_order = sorted(self.questions, key=lambda num: (num == 'last', int(num) if num.isdigit() else 0))
+        return {
+            'config': {
+                'base_url': args.base_url,
+                'concurrency': args.concurrency,
+                'interviews': args.interviews,
+                'duration_seconds': args.duration,
+                'answer_words': args.answer_words,
+                'skip_probability': args.skip_probability,
+                'end_probability': args.end_probability,
+                'think_time_seconds': args.think_time,
+                'seed': args.seed,
+            },
+            'elapsed_seconds': elapsed,
+            'interviews': dict(
+                self.interviews,
+                throughput_per_second=self.interviews['completed'] / elapsed if elapsed else 0.0,
+                p50_seconds=percentile(interview_seconds, 0.50),
+                p95_seconds=percentile(interview_seconds, 0.95),
+            ),
+            'requests': summarize(all_requests, elapsed),
+            'steps': {step: summarize(stats, elapsed) for step, stats in sorted(self.steps.items())},
+            'questions': {num: summarize(self.questions[num], elapsed) for num in question_order},
+        }
+
+def main():
+    parser = argparse.ArgumentParser(description='Load test complete first-round interviews')
+    parser.add_argument('--base-url', default='http://127.0.0.1:5013')
+    parser.add_argument('--user-ids', nargs='+', default=['1'], help='users with a resume and job listing; interviews cycle through them')
+    parser.add_argument('--concurrency', type=int, default=10, help='simulated candidates interviewing at once')
+    parser.add_argument('--interviews', type=int, default=50, help='interviews to run in total; 0 runs until --duration')
+    parser.add_argument('--duration', type=float, default=0, help='stop starting interviews after this many seconds')
+    parser.add_argument('--answer-words', default='15:0.2,120:0.5,300:0.3', help='answer length distribution, words:weight,...')
+    parser.add_argument('--skip-probability', type=float, default=0.1)
+    parser.add_argument('--end-probability', type=float, default=0.02, help='chance per question of ending the interview early')
+    parser.add_argument('--think-time', type=float, default=0.0, help='seconds a candidate waits before each step')
+    parser.add_argument('--timeout', type=float, default=120.0)
+    parser.add_argument('--voice', default='none', help="ElevenLabs voice id; 'none' skips question audio")
+    parser.add_argument('--job-title', default='Software Engineer')
+    parser.add_argument('--company-name', default='Example Co')
+    parser.add_argument('--company-industry', default='Technology')
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--stub-port', type=int, default=None, help='also serve the stub OpenAI API on this port')
+    parser.add_argument('--stub-latency', type=float, default=1.0)
+    parser.add_argument('--output', default=None, help='write the JSON report here instead of stdout')
+    args = parser.parse_args()
+    if not args.interviews and not args.duration:
+        parser.error('set --interviews, --duration or both')
+
+    stub = None
+    if args.stub_port:
+        stub = serve(args.stub_port, args.stub_latency)
+        threading.Thread(target=stub.serve_forever, daemon=True).start()
+
+    try:
+        report = LoadTest(args).run()
+    finally:
+        if stub:
+            stub.shutdown()
+
+    summary = report['requests']
+    print(f"{report['interviews']['completed']} interviews completed, {report['interviews']['aborted']} aborted, "
+          f"{summary['throughput_rps']:.1f} req/s, p95 {summary['p95_seconds'] or 0:.2f}s, error rate {summary['error_rate']:.2%}",
+          file=sys.stderr)
+
+    output = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, 'w') as f:
+            f.write(output + '\n')
+    else:
+        print(output)
+
+if __name__ == '__main__':
+    main()
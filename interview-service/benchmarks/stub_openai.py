@@ -0,0 +1,65 @@
+import os
+import sys
+import json
+import time
+import argparse
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+# Minimal stand-in for the OpenAI API: answers chat completions after a fixed delay.
+# Point the services at it with LLM_BASE_URL=http://127.0.0.1:<port>/v1
+
+class StubOpenAIHandler(BaseHTTPRequestHandler):
+    latency = 1.0
+    protocol_version = 'HTTP/1.1'
+
+    def log_message(self, format, *args):
+        pass
+
+    def do_POST(self):
+        length = int(self.headers.get('Content-Length') or 0)
+        request_body = json.loads(self.rfile.read(length) or b'{}')
+        time.sleep(self.latency)
+
+        if self.path.endswith('/chat/completions'):
+            wants_json = (request_body.get('response_format') or {}).get('type') == 'json_object'
+            content = json.dumps({'score': 7, 'feedback': 'Stub feedback.'}) if wants_json else 'Stub question: tell me about a recent project.'
+            body = {
+                'id': 'chatcmpl-stub',
+                'object': 'chat.completion',
+                'created': int(time.time()),
+                'model': request_body.get('model', 'gpt-3.5-turbo'),
+                'choices': [{'index': 0, 'message': {'role': 'assistant', 'content': content}, 'finish_reason': 'stop'}],
+                'usage': {'prompt_tokens': 100, 'completion_tokens': 20, 'total_tokens': 120},
+            }
+            self._send_json(200, body)
+        elif self.path.endswith('/audio/transcriptions'):
+            payload = b'Stub transcription of the answer.'
+            self.send_response(200)
+            self.send_header('Content-Type', 'text/plain')
+            self.send_header('Content-Length', str(len(payload)))
+            self.end_headers()
+            self.wfile.write(payload)
+        else:
+            self._send_json(404, {'error': {'message': f'Unknown path {self.path}'}})
+
+    def _send_json(self, status, body):
+        payload = json.dumps(body).encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+def serve(port, latency):
+    StubOpenAIHandler.latency = latency
+    server = ThreadingHTTPServer(('127.0.0.1', port), StubOpenAIHandler)
+    server.daemon_threads = True
+    return server
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Stub OpenAI server for benchmarks and load tests')
+    parser.add_argument('--port', type=int, default=int(os.getenv('STUB_OPENAI_PORT', '8799')))
+    parser.add_argument('--latency', type=float, default=1.0, help='seconds before each response')
+    args = parser.parse_args()
+    print(f"Stub OpenAI API on http://127.0.0.1:{args.port}/v1 with {args.latency}s latency", file=sys.stderr)
+    serve(args.port, args.latency).serve_forever()
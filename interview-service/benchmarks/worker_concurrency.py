@@ -0,0 +1,193 @@
+import os
+import sys
+import json
+import time
+import signal
+import argparse
+import subprocess
+import threading
+import urllib.error
+import urllib.request
+from types import SimpleNamespace
+from sqlalchemy import create_engine, text
+
+from stub_openai import serve
+from interview_load_test import LoadTest
+
+# Concurrent interview sessions one interview-service worker sustains under each worker class.
+# The real service is started with gunicorn.conf.py against DATABASE_URL and its LLM gateway is
+# pointed at the stub OpenAI API, so every turn runs the real handlers: interview state, context
+# and question bank reads, history writes and the evaluation and question calls. Only the model is
+# stubbed, with a fixed delay, so the result is the worker's I/O concurrency, not model speed.
+#
+# For each mode the number of candidates interviewing at once, with no think time, is stepped up.
+# A level is sustained while the request p95 stays within --p95-factor of the single-candidate p95
+# with no errors; sessions per worker is the highest sustained level over the worker count.
+#
+#   DATABASE_URL=postgresql://... python benchmarks/worker_concurrency.py --modes sync gthread gevent asgi --workers 2
+
+BENCHMARK_DIR = os.path.dirname(os.path.abspath(__file__))
+SERVICE_DIR = os.path.dirname(BENCHMARK_DIR)
+SHARED_DIR = os.path.join(os.path.dirname(SERVICE_DIR), 'shared')
+
+# Question types of the first round's question bank steps, see round_engine_utils
+BANK_QUESTION_TYPES = ('behavioral questions', 'situational questions', 'personality questions',
+                       'motivational questions', 'competency based questions', 'ethical questions')
+
+def seed_database(database_url, users):
+    # Benchmark users with a job listing and resume, and a question of every bank type; returns the user ids
+    engine = create_engine(database_url)
+    user_ids = []
+    with engine.begin() as connection:
+        for index in range(users):
+            username = f'benchmark{index}'
+            connection.execute(text(
+                "INSERT INTO users (username, email, password_hash, account_created_at, date_joined, last_login, job_situation) "
+                "VALUES (:username, :email, 'x', now(), now(), now(), 'employed') ON CONFLICT (username) DO NOTHING"),
+                {'username': username, 'email': f'{username}@example.com'})
+            user_id = connection.execute(text("SELECT id FROM users WHERE username = :username"), {'username': username}).scalar()
+            if not connection.execute(text("SELECT 1 FROM job_descriptions WHERE user_id = :user_id"), {'user_id': user_id}).first():
+                connection.execute(text(
+                    "INSERT INTO job_descriptions (user_id, job_title, job_level, company_name, company_industry, "
+                    "job_responsibilities, required_professional_experiences) VALUES (:user_id, 'Software Engineer', 'Senior', "
+                    "'Example Co', 'Technology', ARRAY['Design services', 'Review code'], ARRAY['Five years of backend work'])"),
+                    {'user_id': user_id})
+            if not connection.execute(text("SELECT 1 FROM resumes WHERE user_id = :user_id"), {'user_id': user_id}).first():
+                connection.execute(text(
+                    "INSERT INTO resumes (user_id, created_at, username, email, key_technical_skills, key_soft_skills, "
+                    "most_recent_successful_project) VALUES (:user_id, now(), :username, :email, ARRAY['Python', 'PostgreSQL'], "
+                    "ARRAY['Mentoring'], 'Moved daily reporting to a streaming pipeline')"),
+                    {'user_id': user_id, 'username': username, 'email': f'{username}@example.com'})
+            user_ids.append(str(user_id))
+        for question_type in BANK_QUESTION_TYPES:
+            if not connection.execute(text("SELECT 1 FROM questions WHERE question_type = :question_type"), {'question_type': question_type}).first():
+                connection.execute(text(
+                    "INSERT INTO questions (is_user_submitted, is_role_specific, is_resume_specific, is_question_ai_generated, "
+                    "question_type, question, description) VALUES (false, false, false, false, :question_type, :question, "
+                    "'The answer gives a specific example.')"),
+                    {'question_type': question_type, 'question': f'Tell me about a time that shows your {question_type[:-10]}.'})
+    engine.dispose()
+    return user_ids
+
+def wait_for_port(url, timeout=60):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            urllib.request.urlopen(url, timeout=5).read()
+            return
+        except urllib.error.HTTPError:
+            # Any response means the worker is serving
+            return
+        except Exception:
+            time.sleep(0.2)
+    raise RuntimeError(f"{url} did not come up")
+
+def start_service(mode, workers, port, stub_port, max_concurrency):
+    env = dict(
+        os.environ,
+        GUNICORN_WORKER_CLASS=mode,
+        GUNICORN_WORKERS=str(workers),
+        # gunicorn silently runs the sync class as gthread when threads > 1
+        GUNICORN_THREADS='1' if mode == 'sync' else str(max_concurrency),
+        GUNICORN_WORKER_CONNECTIONS=str(max_concurrency * 2),
+        GUNICORN_BIND=f'127.0.0.1:{port}',
+        WORKER_MAX_CONCURRENT_REQUESTS=str(max_concurrency),
+        # The provider-side limits are raised so the worker, not the gateway, is what saturates
+        LLM_BASE_URL=f'http://127.0.0.1:{stub_port}/v1',
+        LLM_MAX_CONCURRENCY=str(max_concurrency),
+        LLM_MAX_CONNECTIONS=str(max_concurrency),
+        LLM_EXECUTOR_MAX_WORKERS=str(max_concurrency),
+        OPENAI_API_KEY=os.getenv('OPENAI_API_KEY', 'stub'),
+        PYTHONPATH=os.pathsep.join([SHARED_DIR, os.getenv('PYTHONPATH', '')]),
+    )
+    return subprocess.Popen(
+        [sys.executable, '-m', 'gunicorn', '-c', os.path.join(SERVICE_DIR, 'gunicorn.conf.py')],
+        cwd=SERVICE_DIR,
+        env=env,
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.DEVNULL,
+    )
+
+def load_args(base_url, user_ids, concurrency, duration, interviews=0):
+    # The interview_load_test options, with candidates answering back to back
+    return SimpleNamespace(
+        base_url=base_url, user_ids=user_ids, concurrency=concurrency, interviews=interviews, duration=duration,
+        answer_words='15:0.2,120:0.5,300:0.3', skip_probability=0.1, end_probability=0.02, think_time=0.0,
+        timeout=120.0, voice='none', job_title='Software Engineer', company_name='Example Co',
+        company_industry='Technology', seed=0,
+    )
+
+def level_result(report):
+    requests = report['requests']
+    return {
+        'candidates': report['config']['concurrency'],
+        'interviews_completed': report['interviews']['completed'],
+        'interviews_aborted': report['interviews']['aborted'],
+        'requests': requests['requests'],
+        'errors': requests['errors'],
+        'throughput_rps': requests['throughput_rps'],
+        'p50_seconds': requests['p50_seconds'],
+        'p95_seconds': requests['p95_seconds'],
+    }
+
+def run_mode(base_url, user_ids, levels, duration, p95_factor):
+    # Every user's generated questions are cached first, so each level measures the same turns
+    LoadTest(load_args(base_url, user_ids, len(user_ids), 0, interviews=len(user_ids))).run()
+
+    results = []
+    target = None
+    for level in levels:
+        result = level_result(LoadTest(load_args(base_url, user_ids, level, duration)).run())
+        if target is None:
+            target = (result['p95_seconds'] or 0) * p95_factor
+        result['sustained'] = not result['errors'] and not result['interviews_aborted'] and (result['p95_seconds'] or 0) <= target
+        results.append(result)
+        print(f"  {level:4d} candidates  {result['throughput_rps']:6.1f} req/s  p95 {result['p95_seconds'] or 0:.2f}s  "
+              f"errors {result['errors']}{'' if result['sustained'] else '  (not sustained)'}", file=sys.stderr)
+        if not result['sustained']:
+            break
+    sustained = [result['candidates'] for result in results if result['sustained']]
+    return {'p95_target_seconds': target, 'sustained_sessions': max(sustained, default=0), 'levels': results}
+
+def main():
+    parser = argparse.ArgumentParser(description='Concurrent interview sessions per interview-service worker')
+    parser.add_argument('--modes', nargs='+', default=['sync', 'gthread', 'gevent', 'asgi'])
+    parser.add_argument('--workers', type=int, default=2)
+    parser.add_argument('--levels', type=int, nargs='+', default=[1, 2, 4, 8, 16, 32, 64, 128], help='candidates interviewing at once, in increasing order')
+    parser.add_argument('--duration', type=float, default=15.0, help='seconds of new interviews at each level')
+    parser.add_argument('--p95-factor', type=float, default=2.0)
+    parser.add_argument('--users', type=int, default=10, help='benchmark users to seed and cycle through')
+    parser.add_argument('--latency', type=float, default=1.0, help='stub LLM latency in seconds')
+    parser.add_argument('--port', type=int, default=8790)
+    parser.add_argument('--stub-port', type=int, default=8799)
+    args = parser.parse_args()
+    database_url = os.getenv('DATABASE_URL')
+    if not database_url:
+        parser.error('set DATABASE_URL to a Postgres database the benchmark may write to')
+
+    stub = serve(args.stub_port, args.latency)
+    threading.Thread(target=stub.serve_forever, daemon=True).start()
+
+    results = {}
+    user_ids = None
+    for mode in args.modes:
+        print(f"{mode}, {args.workers} workers", file=sys.stderr)
+        service = start_service(mode, args.workers, args.port, args.stub_port, max(args.levels))
+        try:
+            base_url = f'http://127.0.0.1:{args.port}'
+            wait_for_port(base_url + '/')
+            if user_ids is None:
+                # The service creates the tables on startup
+                user_ids = seed_database(database_url, args.users)
+            results[mode] = run_mode(base_url, user_ids, args.levels, args.duration, args.p95_factor)
+        finally:
+            service.send_signal(signal.SIGTERM)
+            service.wait(timeout=60)
+        results[mode]['sessions_per_worker'] = results[mode]['sustained_sessions'] / args.workers
+        print(f"{mode:8s} {results[mode]['sessions_per_worker']:6.1f} sessions/worker", file=sys.stderr)
+
+    stub.shutdown()
+    print(json.dumps({'workers': args.workers, 'stub_latency_seconds': args.latency, 'p95_factor': args.p95_factor, 'results': results}, indent=2))
+
+if __name__ == '__main__':
+    main()
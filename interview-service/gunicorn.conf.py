@@ -0,0 +1,34 @@
+import os
+
+# Serving modes:
+#   gthread - a pool of GUNICORN_THREADS threads per worker (default)
+#   gevent  - cooperative greenlets, up to GUNICORN_WORKER_CONNECTIONS per worker; sockets, subprocess and psycopg2 are patched
+#   sync    - one request per worker at a time
+#   asgi    - an event loop per worker serving asgi:app; the interview turn handlers are async, the rest is the Flask app
+SERVING_MODE = os.getenv('GUNICORN_WORKER_CLASS', 'gthread')
+if SERVING_MODE == 'asgi':
+    worker_class = 'uvicorn.workers.UvicornWorker'
+    wsgi_app = 'asgi:app'
+else:
+    worker_class = SERVING_MODE
+    wsgi_app = 'app:app'
+# Per-process state is kept coherent through the database, so any worker can serve any turn:
+# interview state and finished prefetches in the state backend, context snapshots and the question
+# bank index against shared versions, and the TTS cache accounted from its shared directory.
+workers = int(os.getenv('GUNICORN_WORKERS', '2'))
+threads = int(os.getenv('GUNICORN_THREADS', '16'))
+worker_connections = int(os.getenv('GUNICORN_WORKER_CONNECTIONS', '200'))
+bind = os.getenv('GUNICORN_BIND', '0.0.0.0:5013')
+# An interview turn waits on several LLM, TTS and Whisper calls
+timeout = int(os.getenv('GUNICORN_TIMEOUT', '120'))
+graceful_timeout = int(os.getenv('GUNICORN_GRACEFUL_TIMEOUT', '30'))
+keepalive = 5
+
+# The app reads this to decide which self-check to run
+os.environ['GUNICORN_WORKER_CLASS'] = SERVING_MODE
+
+def post_fork(server, worker):
+    if worker_class == 'gevent':
+        # psycopg2 waits inside libpq unless it is told to yield to the gevent hub
+        from psycogreen.gevent import patch_psycopg
+        patch_psycopg()
@@ -0,0 +1,380 @@
+import os
+import time
+import random
+import asyncio
+import threading
+import logging
+from collections import deque
+import httpx
+from openai import OpenAI
+from langchain_openai import ChatOpenAI
+
+logger = logging.getLogger(__name__)
+
+# One gateway for every service that talks to OpenAI: pooled keep-alive connections,
+# a per-process concurrency limit shared by threads and the event loop, jittered retries and latency/token metrics
+LLM_BASE_URL = os.getenv('LLM_BASE_URL') or os.getenv('OPENAI_BASE_URL') or None
+LLM_MAX_CONCURRENCY = int(os.getenv('LLM_MAX_CONCURRENCY', '8'))
+LLM_MAX_CONNECTIONS = int(os.getenv('LLM_MAX_CONNECTIONS', '20'))
+LLM_KEEPALIVE_EXPIRY = float(os.getenv('LLM_KEEPALIVE_EXPIRY', '60'))
+LLM_TIMEOUT = float(os.getenv('LLM_TIMEOUT', '60'))
+LLM_CONNECT_TIMEOUT = float(os.getenv('LLM_CONNECT_TIMEOUT', '5'))
+LLM_MAX_RETRIES = int(os.getenv('LLM_MAX_RETRIES', '3'))
+LLM_BACKOFF_BASE = float(os.getenv('LLM_BACKOFF_BASE', '0.5'))
+LLM_BACKOFF_MAX = float(os.getenv('LLM_BACKOFF_MAX', '8'))
+
+RETRY_STATUS_CODES = {429, 500, 502, 503, 504}
+
+_stats_lock = threading.Lock()
+_counters = {}
+_timings = {}
+
+def _increment(name, amount=1):
+    with _stats_lock:
+        _counters[name] = _counters.get(name, 0) + amount
+
+def _observe(name, value):
+    with _stats_lock:
+        timing = _timings.setdefault(name, {'count': 0, 'total': 0.0, 'max': 0.0})
+        timing['count'] += 1
+        timing['total'] += value
+        timing['max'] = max(timing['max'], value)
+
+def gateway_stats():
+    # Counters and timings since the process started, plus the calls currently holding a slot
+    with _stats_lock:
+        counters = dict(_counters)
+        timings = {name: dict(timing, avg=timing['total'] / timing['count'] if timing['count'] else 0.0) for name, timing in _timings.items()}
+    return {'counters': counters, 'timings': timings, 'in_flight': _slots.in_flight}
+
+def backoff_delay(attempt, retry_after=None):
+    # Full jitter, so workers that were throttled together do not retry together
+    if retry_after is not None:
+        return min(retry_after, LLM_BACKOFF_MAX)
+    return random.uniform(0, min(LLM_BACKOFF_MAX, LLM_BACKOFF_BASE * 2 ** attempt))
+
+def _retry_after(response):
+    try:
+        return float(response.headers.get('retry-after'))
+    except (TypeError, ValueError):
+        return None
+
+def _endpoint(request):
+    # 'chat/completions', 'audio/transcriptions', ...
+    path = request.url.path
+    return path.split('/v1/', 1)[1] if '/v1/' in path else path.strip('/')
+
+class _SlotBudget:
+    # LLM_MAX_CONCURRENCY slots for the whole process. Worker threads block on an Event and event
+    # loop tasks await a future, but both queue here in arrival order, so sync and async calls
+    # together never exceed the limit. A released slot is handed straight to the next waiter.
+    def __init__(self, size):
+        self.size = size
+        self._lock = threading.Lock()
+        self._used = 0
+        # threading.Event for a thread, (loop, future) for a task
+        self._waiters = deque()
+
+    @property
+    def in_flight(self):
+        return self._used
+
+    def _try_take(self):
+        if self._used < self.size and not self._waiters:
+            self._used += 1
+            return True
+        return False
+
+    def acquire(self):
+        with self._lock:
+            if self._try_take():
+                return
+            event = threading.Event()
+            self._waiters.append(event)
+        event.wait()
+
+    async def aacquire(self):
+        loop = asyncio.get_running_loop()
+        with self._lock:
+            if self._try_take():
+                return
+            waiter = (loop, loop.create_future())
+            self._waiters.append(waiter)
+        try:
+            await waiter[1]
+        except asyncio.CancelledError:
+            with self._lock:
+                queued = waiter in self._waiters
+                if queued:
+                    self._waiters.remove(waiter)
+            # A slot already handed over is passed on; a cancelled future is released by _hand_over
+            if not queued and waiter[1].done() and not waiter[1].cancelled():
+                self.release()
+            raise
+
+    def release(self):
+        with self._lock:
+            if not self._waiters:
+                self._used -= 1
+                return
+            waiter = self._waiters.popleft()
+        if isinstance(waiter, threading.Event):
+            waiter.set()
+            return
+        loop, future = waiter
+        try:
+            loop.call_soon_threadsafe(self._hand_over, future)
+        except RuntimeError:
+            # The waiter's loop has closed
+            self.release()
+
+    def _hand_over(self, future):
+        # Runs on the waiting task's loop
+        if future.cancelled():
+            self.release()
+        else:
+            future.set_result(None)
+
+_slots = _SlotBudget(LLM_MAX_CONCURRENCY)
+
+def _acquire_slot():
+    start = time.perf_counter()
+    _slots.acquire()
+    _observe('llm.slot_wait_seconds', time.perf_counter() - start)
+
+async def _aacquire_slot():
+    start = time.perf_counter()
+    await _slots.aacquire()
+    _observe('llm.slot_wait_seconds', time.perf_counter() - start)
+
+def _release_slot():
+    _slots.release()
+
+def _record_usage(response):
+    if not response.headers.get('content-type', '').startswith('application/json'):
+        return
+    try:
+        usage = response.json().get('usage') or {}
+    except ValueError:
+        return
+    if usage.get('prompt_tokens'):
+        _increment('llm.tokens.prompt', usage['prompt_tokens'])
+    if usage.get('completion_tokens'):
+        _increment('llm.tokens.completion', usage['completion_tokens'])
+
+class _SlotReleasingStream(httpx.SyncByteStream):
+    # Streamed responses keep their slot until the body is consumed or closed
+    def __init__(self, stream, on_close):
+        self._stream = stream
+        self._on_close = on_close
+        self._closed = False
+
+    def __iter__(self):
+        for chunk in self._stream:
+            yield chunk
+
+    def close(self):
+        try:
+            self._stream.close()
+        finally:
+            if not self._closed:
+                self._closed = True
+                self._on_close()
+
+class GatewayTransport(httpx.BaseTransport):
+    # Wraps the pooled transport, so both the openai SDK and langchain get the same limits and retries
+    def __init__(self, transport):
+        self._transport = transport
+
+    def handle_request(self, request):
+        endpoint = _endpoint(request)
+        _acquire_slot()
+        start = time.perf_counter()
+        try:
+            response = self._send_with_retries(request, endpoint)
+        except BaseException:
+            _release_slot()
+            _increment(f'llm.{endpoint}.failures')
+            raise
+
+        if response.headers.get('content-type', '').startswith('text/event-stream'):
+            def finish():
+                _observe(f'llm.{endpoint}.seconds', time.perf_counter() - start)
+                _release_slot()
+            return httpx.Response(response.status_code, headers=response.headers, stream=_SlotReleasingStream(response.stream, finish), extensions=response.extensions)
+
+        try:
+            response.read()
+        finally:
+            _observe(f'llm.{endpoint}.seconds', time.perf_counter() - start)
+            _release_slot()
+        _record_usage(response)
+        return response
+
+    def _send_with_retries(self, request, endpoint):
+        attempt = 0
+        while True:
+            try:
+                response = self._transport.handle_request(request)
+            except (httpx.TimeoutException, httpx.NetworkError) as e:
+                if attempt >= LLM_MAX_RETRIES:
+                    raise
+                delay = backoff_delay(attempt)
+                logger.warning(f"LLM request to {endpoint} failed ({e}), retrying in {delay:.2f}s")
+            else:
+                if response.status_code not in RETRY_STATUS_CODES or attempt >= LLM_MAX_RETRIES:
+                    if response.status_code >= 400:
+                        _increment(f'llm.{endpoint}.status_{response.status_code}')
+                    return response
+                delay = backoff_delay(attempt, _retry_after(response))
+                response.close()
+                logger.warning(f"LLM request to {endpoint} returned {response.status_code}, retrying in {delay:.2f}s")
+
+            _increment(f'llm.{endpoint}.retries')
+            attempt += 1
+            time.sleep(delay)
+
+    def close(self):
+        self._transport.close()
+
+class _AsyncSlotReleasingStream(httpx.AsyncByteStream):
+    def __init__(self, stream, on_close):
+        self._stream = stream
+        self._on_close = on_close
+        self._closed = False
+
+    async def __aiter__(self):
+        async for chunk in self._stream:
+            yield chunk
+
+    async def aclose(self):
+        try:
+            await self._stream.aclose()
+        finally:
+            if not self._closed:
+                self._closed = True
+                self._on_close()
+
+class AsyncGatewayTransport(httpx.AsyncBaseTransport):
+    # The same limits, retries and metrics for ainvoke/astream calls made from an event loop.
+    # Slots come from the budget the sync transport uses.
+    def __init__(self, transport):
+        self._transport = transport
+
+    async def handle_async_request(self, request):
+        endpoint = _endpoint(request)
+        await _aacquire_slot()
+
+        start = time.perf_counter()
+        try:
+            response = await self._send_with_retries(request, endpoint)
+        except BaseException:
+            _release_slot()
+            _increment(f'llm.{endpoint}.failures')
+            raise
+
+        if response.headers.get('content-type', '').startswith('text/event-stream'):
+            def finish():
+                _observe(f'llm.{endpoint}.seconds', time.perf_counter() - start)
+                _release_slot()
+            return httpx.Response(response.status_code, headers=response.headers, stream=_AsyncSlotReleasingStream(response.stream, finish), extensions=response.extensions)
+
+        try:
+            await response.aread()
+        finally:
+            _observe(f'llm.{endpoint}.seconds', time.perf_counter() - start)
+            _release_slot()
+        _record_usage(response)
+        return response
+
+    async def _send_with_retries(self, request, endpoint):
+        attempt = 0
+        while True:
+            try:
+                response = await self._transport.handle_async_request(request)
+            except (httpx.TimeoutException, httpx.NetworkError) as e:
+                if attempt >= LLM_MAX_RETRIES:
+                    raise
+                delay = backoff_delay(attempt)
+                logger.warning(f"LLM request to {endpoint} failed ({e}), retrying in {delay:.2f}s")
+            else:
+                if response.status_code not in RETRY_STATUS_CODES or attempt >= LLM_MAX_RETRIES:
+                    if response.status_code >= 400:
+                        _increment(f'llm.{endpoint}.status_{response.status_code}')
+                    return response
+                delay = backoff_delay(attempt, _retry_after(response))
+                await response.aclose()
+                logger.warning(f"LLM request to {endpoint} returned {response.status_code}, retrying in {delay:.2f}s")
+
+            _increment(f'llm.{endpoint}.retries')
+            attempt += 1
+            await asyncio.sleep(delay)
+
+    async def aclose(self):
+        await self._transport.aclose()
+
+def _pool_limits():
+    return httpx.Limits(
+        max_connections=LLM_MAX_CONNECTIONS,
+        max_keepalive_connections=LLM_MAX_CONNECTIONS,
+        keepalive_expiry=LLM_KEEPALIVE_EXPIRY,
+    )
+
+_client_lock = threading.Lock()
+_http_client = None
+_async_http_client = None
+
+def get_http_client():
+    # One keep-alive pool per process, shared by every client the gateway creates
+    global _http_client
+    with _client_lock:
+        if _http_client is None:
+            _http_client = httpx.Client(
+                transport=GatewayTransport(httpx.HTTPTransport(limits=_pool_limits())),
+                timeout=httpx.Timeout(LLM_TIMEOUT, connect=LLM_CONNECT_TIMEOUT),
+            )
+        return _http_client
+
+def get_async_http_client():
+    # Used by the ASGI entry point; one event loop per process, so one async pool per process
+    global _async_http_client
+    with _client_lock:
+        if _async_http_client is None:
+            _async_http_client = httpx.AsyncClient(
+                transport=AsyncGatewayTransport(httpx.AsyncHTTPTransport(limits=_pool_limits())),
+                timeout=httpx.Timeout(LLM_TIMEOUT, connect=LLM_CONNECT_TIMEOUT),
+            )
+        return _async_http_client
+
+def _after_fork():
+    # A child forked while another thread held a slot or a lock starts with fresh ones.
+    # Clients should still be created after the fork (gunicorn does not preload the app),
+    # so pooled sockets are never shared between processes.
+    global _slots, _stats_lock, _client_lock
+    _slots = _SlotBudget(LLM_MAX_CONCURRENCY)
+    _stats_lock = threading.Lock()
+    _client_lock = threading.Lock()
+
+os.register_at_fork(after_in_child=_after_fork)
+
+def create_openai_client(timeout=None, base_url=None):
+    # Retries happen in the gateway transport, so the SDK's own retries are turned off
+    return OpenAI(
+        api_key=os.getenv('OPENAI_API_KEY'),
+        base_url=base_url or LLM_BASE_URL,
+        http_client=get_http_client(),
+        timeout=timeout or LLM_TIMEOUT,
+        max_retries=0,
+    )
+
+def create_chat_model(timeout=None, base_url=None, **kwargs):
+    # kwargs are passed to ChatOpenAI as is, e.g. model and temperature
+    return ChatOpenAI(
+        api_key=os.getenv('OPENAI_API_KEY'),
+        base_url=base_url or LLM_BASE_URL,
+        http_client=get_http_client(),
+        http_async_client=get_async_http_client(),
+        timeout=timeout or LLM_TIMEOUT,
+        max_retries=0,
+        **kwargs,
+    )
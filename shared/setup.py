@@ -0,0 +1,9 @@
+from setuptools import setup
+
+# Code shared by the auth, interview and training data services
+setup(
+    name='beans-bot-shared',
+    version='0.1.0',
+    py_modules=['llm_gateway'],
+    install_requires=['httpx', 'openai', 'langchain_openai'],
+)
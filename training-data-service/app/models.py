@@ -51,6 +51,28 @@ class InterviewHistory(Base):
     user = relationship("Users", back_populates="interview_history")
     question_rel = relationship("Questions", back_populates="interview_history")
 
+class InterviewSessions(Base):
+    # Running score aggregate for one interview, updated as each history batch is written
+    __tablename__ = 'interview_sessions'
+    user_id = Column(Integer, ForeignKey('users.id'), primary_key=True)
+    session_id = Column(Integer, primary_key=True)
+    interview_round = Column(String(50), nullable=True)
+    started_at = Column(DateTime(timezone=True), server_default=func.now())
+    updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
+    score_count = Column(Integer, nullable=False, default=0)
+    score_sum = Column(Integer, nullable=False, default=0)
+    score_min = Column(Integer, nullable=True)
+    score_max = Column(Integer, nullable=True)
+    top_score_question_id = Column(Integer, nullable=True)
+    top_score_question = Column(Text, nullable=True)
+    low_score_question_id = Column(Integer, nullable=True)
+    low_score_question = Column(Text, nullable=True)
+    summary_next_steps = Column(Text, nullable=True)
+
+    @property
+    def score_average(self):
+        return round(self.score_sum / self.score_count) if self.score_count else None
+
 class JobDescriptions(Base):
     __tablename__ = 'job_descriptions'
     id = Column(Integer, primary_key=True)
@@ -4,8 +4,8 @@ import logging
 from flask import render_template, request, redirect, url_for, jsonify, current_app, send_from_directory
 from werkzeug.utils import secure_filename
 from app.database import get_db
-from app.models import JobDescriptions, Users, Questions, Resumes, InterviewHistory
-from app.utils import process_file, process_text, cleanup_uploads_folder, update_process_status, extract_text_from_file, get_resume_analysis, convert_to_date_format, process_new_job_title
+from app.models import JobDescriptions, Users, Questions, Resumes, InterviewHistory, InterviewSessions
+from app.utils import process_file, process_text, cleanup_uploads_folder, update_process_status, extract_text_from_file, get_resume_analysis, convert_to_date_format, process_new_job_title, notify_interview_context_changed, notify_question_bank_changed
 from sqlalchemy import func
 import fitz  # PyMuPDF for PDF processing
 import docx
@@ -101,8 +101,12 @@ def setup_routes(app, db_session):
 
             with app.app_context():
                 db_session = next(get_db())
+                affected_user_ids = [row.user_id for row in db_session.query(JobDescriptions.user_id).filter(JobDescriptions.id.in_(ids)).distinct()]
                 db_session.query(JobDescriptions).filter(JobDescriptions.id.in_(ids)).delete(synchronize_session=False)
                 db_session.commit()
+
+            for affected_user_id in affected_user_ids:
+                notify_interview_context_changed(affected_user_id)
             return jsonify({'success': True})
         except Exception as e:
             logging.error(f"Failed to delete selected files: {str(e)}")
@@ -218,6 +222,8 @@ def setup_routes(app, db_session):
 
                 db_session.commit()
 
+            notify_interview_context_changed(user_id)
+
             return jsonify({'success': True}), 200
         except Exception as e:
             logging.error(f"Failed to update job description: {str(e)}")
@@ -433,6 +439,8 @@ def setup_routes(app, db_session):
 
                 db_session.commit()
 
+            notify_interview_context_changed(user_id)
+
             return jsonify({'success': True}), 200
         except Exception as e:
             logging.error(f"Failed to update resume data: {str(e)}")
@@ -490,8 +498,10 @@ def setup_routes(app, db_session):
                 if not resume:
                     return jsonify({'error': 'Resume not found'}), 404
 
+                resume_user_id = resume.user_id
                 db_session.delete(resume)
                 db_session.commit()
+                notify_interview_context_changed(resume_user_id)
                 return jsonify({'message': 'Resume deleted successfully'}), 200
         except Exception as e:
             return jsonify({'error': str(e)}), 500
@@ -510,6 +520,7 @@ def setup_routes(app, db_session):
             new_question = Questions(**data)
             db_session.add(new_question)
             db_session.commit()
+            notify_question_bank_changed(new_question.id)
             return jsonify({'id': new_question.id, 'message': 'Question created successfully'}), 201
 
     @app.route('/api/questions', methods=['GET'])
@@ -534,6 +545,7 @@ def setup_routes(app, db_session):
                 for key, value in data.items():
                     setattr(updated_question, key, value)
                 db_session.commit()
+                notify_question_bank_changed(question_id)
                 return jsonify({'message': 'Question updated successfully'}), 200
             return jsonify({'error': 'Question not found'}), 404
 
@@ -545,6 +557,7 @@ def setup_routes(app, db_session):
             if question:
                 db_session.delete(question)
                 db_session.commit()
+                notify_question_bank_changed(question_id, action='delete')
                 return jsonify({'message': 'Question deleted successfully'}), 200
             return jsonify({'error': 'Question not found'}), 404
 
@@ -584,9 +597,8 @@ def setup_routes(app, db_session):
         try:
             with app.app_context():
                 db_session = next(get_db())
-                summary = db_session.query(InterviewHistory).filter_by(
-                    user_id=user_id, session_id=session_id
-                ).first()
+                # Maintained by the interview-service as each answer is recorded
+                summary = db_session.get(InterviewSessions, (user_id, session_id))
 
 
                 transcript = db_session.query(
@@ -603,10 +615,15 @@ def setup_routes(app, db_session):
 
                 return jsonify({
                     'summary': {
-                        'top_score': summary.session_top_score,
-                        'lowest_score': summary.session_low_score,
-                        'average_score': summary.session_score_average,
-                        'next_steps': summary.session_summary_next_steps
+                        'top_score': summary.score_max if summary else None,
+                        'top_score_question_id': summary.top_score_question_id if summary else None,
+                        'top_score_question': summary.top_score_question if summary else None,
+                        'lowest_score': summary.score_min if summary else None,
+                        'lowest_score_question_id': summary.low_score_question_id if summary else None,
+                        'lowest_score_question': summary.low_score_question if summary else None,
+                        'average_score': summary.score_average if summary else None,
+                        'questions_scored': summary.score_count if summary else 0,
+                        'next_steps': summary.summary_next_steps if summary else None
                     },
                     'transcript': [
                         {
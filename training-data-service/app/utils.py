@@ -7,10 +7,9 @@ from flask import Flask, current_app
 from flask_session import Session
 from app.models import JobDescriptions, InterviewHistory, Resumes, Users, Questions
 from app.database import get_db
-from langchain_openai import ChatOpenAI
 from langchain_core.prompts import ChatPromptTemplate
 from langchain_core.messages import SystemMessage, HumanMessage
-from openai import OpenAI
+from llm_gateway import create_chat_model, create_openai_client
 import requests
 import fitz  # PyMuPDF for PDF processing
 import docx
@@ -24,10 +23,18 @@ from dotenv import load_dotenv
 load_dotenv()
 
 # OpenAI API client
-client = OpenAI(api_key=os.getenv("OPENAI_API_KEY"))
-# Initialize the OpenAI chat model
-openai_api_key = os.getenv("OPENAI_API_KEY")
-model = ChatOpenAI(api_key=openai_api_key)
+client = create_openai_client()
+# Initialize the OpenAI chat models through the shared gateway
+model = create_chat_model()
+job_description_model = create_chat_model(model="gpt-3.5-turbo")
+
+# Where the interview-service's internal routes are reached; docker-compose points this at the service name
+INTERVIEW_SERVICE_URL = os.getenv('INTERVIEW_SERVICE_URL', 'http://localhost:5013')
+# Shared secret the interview-service requires on its internal routes
+INTERNAL_API_TOKEN = os.getenv('INTERNAL_API_TOKEN', '')
+
+def internal_headers():
+    return {'X-Internal-Token': INTERNAL_API_TOKEN}
 
 def update_process_status(app, user_id, status):
     with app.app_context():
@@ -43,6 +50,24 @@ def update_process_status(app, user_id, status):
         except Exception as e:
             logging.error(f"Exception while updating status for user_id: {user_id}. Status: {status}. Error: {str(e)}")
 
+def notify_interview_context_changed(user_id):
+    # Drop the interview-service's cached interview snapshot after a resume or job listing changes
+    try:
+        response = requests.post(f"{INTERVIEW_SERVICE_URL}/internal/context/invalidate", json={'user_id': user_id}, headers=internal_headers(), timeout=2)
+        if response.status_code != 200:
+            logging.error(f"Failed to invalidate interview context for user_id: {user_id}. Status: {response.status_code}")
+    except Exception as e:
+        logging.error(f"Exception while invalidating interview context for user_id: {user_id}. Error: {str(e)}")
+
+def notify_question_bank_changed(question_id=None, action='upsert'):
+    # Keep the interview-service's question bank index in step with the questions table
+    try:
+        response = requests.post(f"{INTERVIEW_SERVICE_URL}/internal/question_bank/refresh", json={'question_id': question_id, 'action': action}, headers=internal_headers(), timeout=2)
+        if response.status_code != 200:
+            logging.error(f"Failed to refresh question bank for question_id: {question_id}. Status: {response.status_code}")
+    except Exception as e:
+        logging.error(f"Exception while refreshing question bank for question_id: {question_id}. Error: {str(e)}")
+
 def process_text(app, text, user_id):
     with app.app_context():
         try:
@@ -102,9 +127,6 @@ def extract_text_from_docx(file_path):
     return text
 
 def get_job_description_analysis(job_description_text):
-    openai_api_key = os.getenv("OPENAI_API_KEY")
-    model = ChatOpenAI(api_key=openai_api_key, model="gpt-3.5-turbo")
-
     prompt_text = (
     "You are a professional Job Description analyst. Your job is to take the job description that I am sending you in my user message and extract the details below. "
     "Please extract the relevant information from the following job description and return the results in JSON format. If a job description is missing any detail, then return a JSON value of null for that field. "
@@ -140,7 +162,7 @@ def get_job_description_analysis(job_description_text):
 
     logging.debug(f"Prompt created: {prompt}")
 
-    chain = prompt | model
+    chain = prompt | job_description_model
 
     input_data = {
         "job_description_text": job_description_text.strip()
@@ -388,6 +410,7 @@ def store_resume_analysis(user_id, response_json):
             db_session.add(resume)
             db_session.commit()
             logging.info(f"Stored resume data for user_id: {user_id}")
+            notify_interview_context_changed(user_id)
         except Exception as e:
             logging.error(f"Error storing resume data: {str(e)}")
             db_session.rollback()
@@ -495,6 +518,7 @@ def store_job_description_data(response_json, user_id):
             db_session.add(job_description)
             db_session.commit()
             logging.info(f"Stored job description for user_id: {user_id}")
+            notify_interview_context_changed(user_id)
         except Exception as e:
             logging.error(f"Error storing job description: {str(e)}")
             db_session.rollback()
@@ -551,6 +575,7 @@ def process_new_job_title(job_title, db_session):
             )
             db_session.add(new_question)
         db_session.commit()
+        notify_question_bank_changed()
         return {'success': True}
     except Exception as e:
         logging.error(f"Failed to save questions for {job_title}: {str(e)}")